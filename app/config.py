@@ -19,6 +19,10 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     DESCRIPTION: str = "API RESTful para consulta de preços históricos de combustíveis no Brasil"
     
+    # Cache de consultas (contagens, mapas de apoio); escritas da API
+    # invalidam na hora, as de outros processos (loader) após o TTL
+    QUERY_CACHE_TTL_SECONDS: int = 300
+    
     # Admin User
     ADMIN_USERNAME: str = "admin"
     ADMIN_EMAIL: str = "admin@example.com"
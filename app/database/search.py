@@ -0,0 +1,74 @@
+"""
+Busca textual sem acentos em município e bandeira das revendas
+
+Os campos pesquisáveis têm uma cópia normalizada (sem acentos, maiúsculas,
+espaços colapsados) em colunas *_busca, indexadas por uma tabela SQLite
+FTS5 com tokenizador trigram. Isso permite busca por substring apoiada em
+índice, em vez do LIKE '%termo%' que percorre a tabela inteira.
+"""
+import re
+import unicodedata
+from typing import Optional
+import pandas as pd
+from sqlalchemy import Column, column, literal_column, select, table
+from sqlalchemy.sql.elements import ColumnElement
+
+# Tabela FTS5 (external content) sobre revendas, mantida por triggers
+FTS_TABLE = "revendas_busca"
+
+# O trigram só indexa termos com pelo menos 3 caracteres
+MIN_FTS_LENGTH = 3
+
+_SPACES = re.compile(r"\s+")
+
+
+def fold_text(value: Optional[str]) -> Optional[str]:
+    """
+    Normaliza um texto para busca: sem acentos, maiúsculo e com espaços colapsados
+
+    Ex.: "  São  Paulo " -> "SAO PAULO"
+    """
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _SPACES.sub(" ", folded).strip().upper()
+
+
+def fold_series(values: pd.Series) -> pd.Series:
+    """
+    fold_text aplicado a uma coluna de um DataFrame
+
+    Municípios e bandeiras se repetem muito: fold_text roda uma vez por
+    valor distinto e o resultado é mapeado para a coluna, com a mesma regra
+    (todas as marcas combinantes) usada nos termos de busca.
+    """
+    distintos = values.dropna().unique()
+    return values.map(dict(zip(distintos, map(fold_text, distintos))))
+
+
+def search_filter(id_column: Column, search_column: Column, term: str) -> ColumnElement:
+    """
+    Filtro de substring, sem acentos, sobre uma coluna *_busca de revendas
+
+    Termos com 3 ou mais caracteres consultam o índice FTS5 (restrito à
+    coluna pedida); termos menores, raros e pouco seletivos, usam LIKE
+    sobre a coluna normalizada.
+
+    Args:
+        id_column: Coluna de id da revenda (Revenda.id)
+        search_column: Coluna normalizada (ex.: Revenda.municipio_busca)
+        term: Termo digitado pelo usuário
+    """
+    folded = fold_text(term)
+    if len(folded) < MIN_FTS_LENGTH:
+        escaped = folded.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return search_column.like(f"%{escaped}%", escape="\\")
+
+    # Frase entre aspas: casa a substring literal (aspas internas são duplicadas)
+    phrase = '"' + folded.replace('"', '""') + '"'
+    fts = table(FTS_TABLE, column("rowid"))
+    subquery = select(fts.c.rowid).where(
+        literal_column(FTS_TABLE).op("MATCH")(f"{search_column.key} : {phrase}")
+    )
+    return id_column.in_(subquery)
@@ -2,11 +2,20 @@ from app.models.user import User, UserRole
 from app.models.revenda import Revenda
 from app.models.produto import Produto
 from app.models.coleta_preco import ColetaPreco
+from app.models.preco_diario import PrecoDiario
+from app.models.preco_atual import PrecoAtual
+from app.models.sketch_preco import SketchPreco
+from app.models.ingestao_arquivo import IngestaoArquivo, StatusIngestao
 
 __all__ = [
     "User",
     "UserRole",
     "Revenda",
     "Produto",
-    "ColetaPreco"
+    "ColetaPreco",
+    "PrecoDiario",
+    "PrecoAtual",
+    "SketchPreco",
+    "IngestaoArquivo",
+    "StatusIngestao"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.connection import Base
@@ -7,6 +7,15 @@ from app.database.connection import Base
 class ColetaPreco(Base):
     """Modelo de Coleta de Preço"""
     __tablename__ = "coletas_preco"
+    __table_args__ = (
+        # Chave natural: uma coleta por revenda, produto e data
+        UniqueConstraint("revenda_id", "produto_id", "data_coleta", name="uq_coleta_revenda_produto_data"),
+        # Listagens por produto ordenadas por data (e cursor em (data_coleta, id));
+        # valor_venda torna o índice de cobertura para a série de preços
+        Index("ix_coletas_preco_produto_data_valor", "produto_id", "data_coleta", "id", "valor_venda"),
+        # Histórico de uma revenda por período
+        Index("ix_coletas_preco_revenda_data", "revenda_id", "data_coleta"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     data_coleta = Column(Date, nullable=False, index=True)
@@ -15,8 +24,9 @@ class ColetaPreco(Base):
     unidade_medida = Column(String(10), nullable=False)  # R$/litro, R$/kg, etc
     
     # Foreign Keys
-    revenda_id = Column(Integer, ForeignKey("revendas.id"), nullable=False, index=True)
-    produto_id = Column(Integer, ForeignKey("produtos.id"), nullable=False, index=True)
+    # Sem índice próprio: são prefixo dos índices compostos acima
+    revenda_id = Column(Integer, ForeignKey("revendas.id"), nullable=False)
+    produto_id = Column(Integer, ForeignKey("produtos.id"), nullable=False)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Enum as SQLEnum
+from sqlalchemy.sql import func
+import enum
+from app.database.connection import Base
+
+
+class StatusIngestao(str, enum.Enum):
+    """Situação da carga de um arquivo"""
+    EM_ANDAMENTO = "em_andamento"
+    CONCLUIDO = "concluido"
+    FALHOU = "falhou"
+
+
+class IngestaoArquivo(Base):
+    """Manifesto de ingestão: um registro por arquivo CSV carregado"""
+    __tablename__ = "ingestao_arquivos"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    arquivo = Column(String(500), nullable=False)
+    hash_sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    tamanho_bytes = Column(BigInteger, nullable=False)
+    status = Column(SQLEnum(StatusIngestao), default=StatusIngestao.EM_ANDAMENTO, nullable=False)
+    
+    # Progresso: blocos confirmados permitem retomar uma carga interrompida
+    chunksize = Column(Integer, nullable=False)
+    blocos_gravados = Column(Integer, default=0, nullable=False)
+    linhas_lidas = Column(BigInteger, default=0, nullable=False)
+    linhas_carregadas = Column(BigInteger, default=0, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<IngestaoArquivo(id={self.id}, arquivo='{self.arquivo}', status='{self.status}')>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
+from app.database.connection import Base
+
+
+class PrecoAtual(Base):
+    """
+    Preço mais recente de cada produto em cada revenda
+    
+    Cópia da última coleta por (revenda, produto), mantida pelas escritas
+    em coletas_preco (ver PrecoAtualService): o preço atual é lido pela
+    chave primária, sem buscar a data máxima no histórico.
+    """
+    __tablename__ = "preco_atual"
+    __table_args__ = (
+        # Ranking de preços atuais de um produto
+        Index("ix_preco_atual_produto_valor", "produto_id", "valor_venda"),
+    )
+    
+    revenda_id = Column(Integer, ForeignKey("revendas.id"), primary_key=True)
+    produto_id = Column(Integer, ForeignKey("produtos.id"), primary_key=True)
+    data_coleta = Column(Date, nullable=False)
+    valor_venda = Column(Float, nullable=False)
+    valor_compra = Column(Float, nullable=True)
+    unidade_medida = Column(String(10), nullable=False)
+    
+    def __repr__(self):
+        return f"<PrecoAtual(revenda_id={self.revenda_id}, produto_id={self.produto_id}, valor={self.valor_venda})>"
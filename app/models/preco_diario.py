@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
+from app.database.connection import Base
+
+
+class PrecoDiario(Base):
+    """
+    Agregado diário de valor_venda por produto, UF e município
+    
+    Mantido a partir de coletas_preco (ver PrecoDiarioService): guarda as
+    somas necessárias para média e desvio padrão, de modo que estatísticas
+    e séries temporais leiam esta tabela em vez do histórico completo.
+    """
+    __tablename__ = "precos_diarios"
+    __table_args__ = (
+        # Séries de um produto por período
+        Index("ix_precos_diarios_produto_data", "produto_id", "data"),
+    )
+    
+    data = Column(Date, primary_key=True)
+    produto_id = Column(Integer, ForeignKey("produtos.id"), primary_key=True)
+    estado = Column(String(2), primary_key=True)
+    municipio = Column(String(100), primary_key=True)
+    regiao_sigla = Column(String(2), nullable=False)
+    
+    quantidade = Column(Integer, nullable=False)
+    soma = Column(Float, nullable=False)
+    soma_quadrados = Column(Float, nullable=False)
+    minimo = Column(Float, nullable=False)
+    maximo = Column(Float, nullable=False)
+    
+    def __repr__(self):
+        return f"<PrecoDiario(data='{self.data}', produto_id={self.produto_id}, estado='{self.estado}', municipio='{self.municipio}')>"
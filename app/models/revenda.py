@@ -1,7 +1,8 @@
 from sqlalchemy import Column, Integer, String, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.database.connection import Base
+from app.database.search import fold_text
 
 
 class Revenda(Base):
@@ -15,11 +16,21 @@ class Revenda(Base):
     estado = Column(String(2), nullable=False, index=True)
     regiao_sigla = Column(String(2), nullable=False, index=True)
     bandeira = Column(String(100), nullable=True)
+    
+    # Cópias sem acentos para busca (indexadas pela tabela FTS5 revendas_busca)
+    municipio_busca = Column(String(100), nullable=False, index=True)
+    bandeira_busca = Column(String(100), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relacionamento
     coletas = relationship("ColetaPreco", back_populates="revenda", cascade="all, delete-orphan")
     
+    @validates("municipio", "bandeira")
+    def _sync_busca(self, key, value):
+        """Mantém as colunas *_busca em dia com município e bandeira"""
+        setattr(self, f"{key}_busca", fold_text(value))
+        return value
+    
     def __repr__(self):
         return f"<Revenda(id={self.id}, nome='{self.nome}', municipio='{self.municipio}', estado='{self.estado}')>"
\ No newline at end of file
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Float, Date, LargeBinary, ForeignKey, Index
+from app.database.connection import Base
+
+
+class SketchPreco(Base):
+    """
+    Sketch de quantis (t-digest) de valor_venda por mês, produto e UF
+    
+    Mantido a partir de coletas_preco (ver SketchPrecoService): percentis de
+    qualquer recorte (região, ano, país) são estimados fundindo os sketches
+    do recorte, sem ordenar as coletas. Ver app.utils.tdigest para o
+    formato de centroides e o limite de erro.
+    """
+    __tablename__ = "sketches_preco"
+    __table_args__ = (
+        # Sketches de um produto por período
+        Index("ix_sketches_preco_produto_mes", "produto_id", "mes"),
+    )
+    
+    mes = Column(Date, primary_key=True)
+    produto_id = Column(Integer, ForeignKey("produtos.id"), primary_key=True)
+    estado = Column(String(2), primary_key=True)
+    regiao_sigla = Column(String(2), nullable=False)
+    
+    quantidade = Column(Integer, nullable=False)
+    minimo = Column(Float, nullable=False)
+    maximo = Column(Float, nullable=False)
+    centroides = Column(LargeBinary, nullable=False)
+    
+    def __repr__(self):
+        return f"<SketchPreco(mes='{self.mes}', produto_id={self.produto_id}, estado='{self.estado}')>"
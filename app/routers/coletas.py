@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import Optional
 from app.database.connection import get_db
-from app.schemas import ColetaPrecoCreate, ColetaPrecoUpdate, ColetaPrecoResponse, ColetaPrecoListResponse
-from app.services import ColetaService
+from app.schemas import (
+    ColetaPrecoCreate, ColetaPrecoUpdate, ColetaPrecoResponse, ColetaPrecoListResponse,
+    ColetaPrecoDetailResponse, ColetaPrecoDetailListResponse, ColetaPrecoBatchResponse,
+    ColetaBulkErro, ColetaBulkResponse, BatchGetRequest, EstatisticaListResponse,
+    PeriodoEstatistica, ColetaMaisBarataListResponse, DimensaoVariacao, VariacaoListResponse,
+    MargemListResponse, DimensaoPercentil, PeriodoPercentil, PercentilListResponse
+)
+from app.services import ColetaService, EstatisticaService
+from app.utils.fields import parse_fields, sparse_response
+from app.utils.pagination import IncludeTotal
 from app.utils.dependencies import get_current_active_user, require_admin
+from app.utils.bulk import NDJSON_TYPES, CSV_TYPES, iter_records
 from app.models import User
 
 router = APIRouter(prefix="/coletas", tags=["Coletas de Preço"])
 
+# Máximo de erros detalhados na resposta de uma carga em lote
+BULK_MAX_ERROS = 1000
+
 
 @router.get("", response_model=ColetaPrecoListResponse)
 def list_coletas(
@@ -20,24 +33,262 @@ def list_coletas(
     produto: Optional[str] = Query(None, max_length=50),
     data_inicio: Optional[date] = Query(None),
     data_fim: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None, max_length=200),
+    include_total: IncludeTotal = Query(IncludeTotal.EXACT),
+    fields: Optional[str] = Query(None, max_length=500),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Lista todas as coletas de preço com filtros opcionais
     
-    - **skip**: Número de registros a pular (paginação)
+    - **skip**: Número de registros a pular (paginação por offset)
     - **limit**: Número máximo de registros a retornar
     - **estado**: Filtrar por UF (ex: SP, RJ, MG)
-    - **municipio**: Filtrar por município
+    - **municipio**: Filtrar por município (busca parcial, sem acentos)
     - **produto**: Filtrar por tipo de combustível (ex: GASOLINA, ETANOL)
     - **data_inicio**: Data inicial do período
     - **data_fim**: Data final do período
+    - **cursor**: Paginação por cursor: envie vazio na primeira página e depois
+      o `next_cursor` da resposta anterior (ignora skip; custo constante por página)
+    - **include_total**: `exact` (padrão) conta os registros; `estimated` reutiliza
+      a contagem em cache para os mesmos filtros; `off` não conta (total nulo)
+    - **fields**: Campos de cada item separados por vírgula
+      (ex: `valor_venda,data_coleta,revenda_id`); só essas colunas são
+      consultadas e serializadas
+    """
+    campos = parse_fields(fields, ColetaPrecoResponse)
+    items, total, next_cursor = ColetaService.get_all(
+        db, skip, limit, estado, municipio, produto, data_inicio, data_fim,
+        cursor, include_total, campos
+    )
+    if campos:
+        return sparse_response(
+            items, campos, total=total, skip=skip, limit=limit, next_cursor=next_cursor
+        )
+    return ColetaPrecoListResponse(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor
+    )
+
+
+@router.get("/detalhado", response_model=ColetaPrecoDetailListResponse)
+def list_coletas_detalhado(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    estado: Optional[str] = Query(None, max_length=2),
+    municipio: Optional[str] = Query(None, max_length=100),
+    produto: Optional[str] = Query(None, max_length=50),
+    data_inicio: Optional[date] = Query(None),
+    data_fim: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None, max_length=200),
+    include_total: IncludeTotal = Query(IncludeTotal.EXACT),
+    fields: Optional[str] = Query(None, max_length=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Lista coletas com nome, município e UF da revenda e nome do produto
+    
+    Mesmos filtros e paginação de `GET /coletas`, mas cada item já traz os
+    dados da revenda e do produto, buscados na mesma consulta: uma única
+    requisição por página, sem consultas por revenda ou produto. Com
+    **fields**, só os campos pedidos são consultados e serializados.
+    """
+    campos = parse_fields(fields, ColetaPrecoDetailResponse)
+    items, total, next_cursor = ColetaService.get_all_detailed(
+        db, skip, limit, estado, municipio, produto, data_inicio, data_fim,
+        cursor, include_total, campos
+    )
+    if campos:
+        return sparse_response(
+            items, campos, total=total, skip=skip, limit=limit, next_cursor=next_cursor
+        )
+    return ColetaPrecoDetailListResponse(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor
+    )
+
+
+@router.get("/mais-baratas", response_model=ColetaMaisBarataListResponse)
+def list_coletas_mais_baratas(
+    produto: str = Query(..., min_length=1, max_length=50),
+    estado: Optional[str] = Query(None, max_length=2),
+    municipio: Optional[str] = Query(None, max_length=100),
+    k: int = Query(10, ge=1, le=100),
+    dias: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
     """
-    items, total = ColetaService.get_all(
-        db, skip, limit, estado, municipio, produto, data_inicio, data_fim
+    Revendas com o menor preço atual de um produto
+    
+    - **produto**: Tipo de combustível (ex: GASOLINA)
+    - **estado**: Filtrar por UF (ex: SP, RJ, MG)
+    - **municipio**: Filtrar por município (busca parcial, sem acentos)
+    - **k**: Número de revendas no ranking
+    - **dias**: Janela de atualidade, contada a partir da coleta mais recente
+      do produto (`data_referencia`)
+    
+    Considera apenas a coleta mais recente de cada revenda dentro da janela
+    e ordena pelo preço de venda.
+    """
+    referencia, items = ColetaService.get_mais_baratas(db, produto, estado, municipio, k, dias)
+    return ColetaMaisBarataListResponse(
+        produto=produto.upper(), data_referencia=referencia, dias=dias, items=items
+    )
+
+
+@router.get("/estatisticas", response_model=EstatisticaListResponse)
+def estatisticas_coletas(
+    agrupar_por: Optional[str] = Query(None, max_length=100),
+    periodo: Optional[PeriodoEstatistica] = Query(None),
+    data_inicio: Optional[date] = Query(None),
+    data_fim: Optional[date] = Query(None),
+    produto: Optional[str] = Query(None, max_length=50),
+    estado: Optional[str] = Query(None, max_length=2),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Estatísticas de preço de venda agregadas no servidor
+    
+    - **agrupar_por**: Dimensões separadas por vírgula entre `produto`, `estado`,
+      `regiao_sigla`, `municipio` e `bandeira` (vazio: um único grupo)
+    - **periodo**: Agrupa também por `dia`, `semana` (início na segunda-feira) ou `mes`
+    - **data_inicio** / **data_fim**: Período das coletas
+    - **produto** / **estado**: Filtros opcionais
+    
+    Cada grupo traz quantidade, média, mínimo, máximo e desvio padrão
+    (amostral) de `valor_venda`, calculados em uma única consulta agregada.
+    """
+    dimensoes = EstatisticaService.parse_dimensoes(agrupar_por)
+    items = EstatisticaService.get_estatisticas(
+        db, dimensoes, periodo, data_inicio, data_fim, produto, estado
     )
-    return ColetaPrecoListResponse(items=items, total=total, skip=skip, limit=limit)
+    return EstatisticaListResponse(agrupar_por=dimensoes, periodo=periodo, items=items)
+
+
+@router.get("/margens", response_model=MargemListResponse)
+def margens_coletas(
+    agrupar_por: Optional[str] = Query(None, max_length=100),
+    periodo: Optional[PeriodoEstatistica] = Query(None),
+    data_inicio: Optional[date] = Query(None),
+    data_fim: Optional[date] = Query(None),
+    produto: Optional[str] = Query(None, max_length=50),
+    estado: Optional[str] = Query(None, max_length=2),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Estatísticas da margem de revenda (`valor_venda - valor_compra`)
+    
+    - **agrupar_por**: Dimensões separadas por vírgula entre `produto`, `estado`,
+      `regiao_sigla`, `municipio` e `bandeira` (vazio: um único grupo)
+    - **periodo**: Agrupa também por `dia`, `semana` (início na segunda-feira) ou `mes`
+    - **data_inicio** / **data_fim**: Período das coletas
+    - **produto** / **estado**: Filtros opcionais
+    
+    Considera só coletas com `valor_compra`. Cada grupo traz quantidade,
+    média, mínimo, máximo, desvio padrão (amostral) e os percentis 10, 25,
+    50 (mediana), 75 e 90 da margem. O resultado fica em cache até a próxima
+    escrita de coletas.
+    """
+    dimensoes = EstatisticaService.parse_dimensoes(agrupar_por)
+    items = EstatisticaService.get_margens(
+        db, dimensoes, periodo, data_inicio, data_fim, produto, estado
+    )
+    return MargemListResponse(agrupar_por=dimensoes, periodo=periodo, items=items)
+
+
+@router.get("/percentis", response_model=PercentilListResponse)
+def percentis_coletas(
+    produto: str = Query(..., min_length=1, max_length=50),
+    percentis: str = Query("50,90", max_length=200),
+    agrupar_por: Optional[DimensaoPercentil] = Query(None),
+    periodo: Optional[PeriodoPercentil] = Query(None),
+    data_inicio: Optional[date] = Query(None),
+    data_fim: Optional[date] = Query(None),
+    estado: Optional[str] = Query(None, max_length=2),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Percentis do preço de venda de um produto, estimados por sketches
+    
+    - **produto**: Tipo de combustível (ex: GASOLINA)
+    - **percentis**: Percentis separados por vírgula (padrão: `50,90`)
+    - **agrupar_por**: `estado` ou `regiao_sigla` (vazio: país inteiro)
+    - **periodo**: Agrupa também por `mes` ou `ano`
+    - **data_inicio** / **data_fim**: Período, em meses inteiros
+    - **estado**: Restringe a uma UF
+    
+    Os percentis vêm da fusão de t-digests mensais por UF (tabela
+    sketches_preco), sem ordenar as coletas. O erro de posto fica abaixo de
+    2π·√(q(1−q))/200: ≈1,6% na mediana e ≈0,9% no p90.
+    """
+    valores = EstatisticaService.parse_percentis(percentis)
+    items = EstatisticaService.get_percentis(
+        db, produto, valores, agrupar_por, periodo, data_inicio, data_fim, estado
+    )
+    return PercentilListResponse(
+        produto=produto.upper(), agrupar_por=agrupar_por, periodo=periodo, items=items
+    )
+
+
+@router.get("/variacao", response_model=VariacaoListResponse)
+def variacao_coletas(
+    produto: str = Query(..., min_length=1, max_length=50),
+    base_inicio: date = Query(...),
+    base_fim: date = Query(...),
+    atual_inicio: date = Query(...),
+    atual_fim: date = Query(...),
+    agrupar_por: DimensaoVariacao = Query(DimensaoVariacao.ESTADO),
+    estado: Optional[str] = Query(None, max_length=2),
+    crescente: bool = Query(False),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Ranking da variação do preço médio entre dois períodos
+    
+    - **produto**: Tipo de combustível (ex: GASOLINA)
+    - **base_inicio** / **base_fim**: Período de comparação (ex: semana anterior)
+    - **atual_inicio** / **atual_fim**: Período comparado (ex: semana atual)
+    - **agrupar_por**: `estado`, `municipio`, `bandeira` ou `revenda`
+    - **estado**: Restringe o ranking a uma UF
+    - **crescente**: Ordena das maiores quedas para as maiores altas
+    - **limit**: Número de posições retornadas
+    
+    Para cada grupo com coletas nos dois períodos, traz a média de cada
+    período e a variação absoluta e percentual, ordenados pela variação
+    percentual (empates dividem a posição).
+    """
+    items = EstatisticaService.get_variacao(
+        db, produto, agrupar_por, base_inicio, base_fim, atual_inicio, atual_fim,
+        estado, crescente, limit
+    )
+    return VariacaoListResponse(
+        produto=produto.upper(), agrupar_por=agrupar_por, base_inicio=base_inicio,
+        base_fim=base_fim, atual_inicio=atual_inicio, atual_fim=atual_fim, items=items
+    )
+
+
+@router.post("/batch-get", response_model=ColetaPrecoBatchResponse)
+def batch_get_coletas(
+    batch: BatchGetRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Busca várias coletas por id em uma única requisição
+    
+    - **ids**: Lista de ids (até 1000)
+    
+    Os itens voltam na ordem dos ids pedidos, com `null` para os não
+    encontrados, que também são listados em `not_found`.
+    """
+    items, not_found = ColetaService.get_many(db, batch.ids)
+    return ColetaPrecoBatchResponse(items=items, not_found=not_found)
 
 
 @router.get("/{coleta_id}", response_model=ColetaPrecoResponse)
@@ -71,6 +322,70 @@ def create_coleta(
     return ColetaService.create(db, coleta_data)
 
 
+@router.post("/bulk", response_model=ColetaBulkResponse)
+async def bulk_create_coletas(
+    request: Request,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Registra coletas em lote a partir de um corpo NDJSON ou CSV (apenas admin)
+    
+    O corpo é lido em streaming e processado em lotes de **batch_size**
+    linhas, cada lote validado e gravado em uma única transação.
+    
+    - **Content-Type: application/x-ndjson**: um objeto JSON por linha
+    - **Content-Type: text/csv**: cabeçalho com os campos de ColetaPrecoCreate
+    
+    Retorna o número de linhas recebidas, aceitas e rejeitadas, com o motivo
+    das rejeições (até 1000 erros detalhados).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in NDJSON_TYPES | CSV_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Use Content-Type application/x-ndjson ou text/csv"
+        )
+    
+    recebidas = 0
+    aceitas = 0
+    rejeitadas = 0
+    erros = []
+    lote = []
+    
+    def reject(novos: list[tuple[int, str]]):
+        nonlocal rejeitadas
+        rejeitadas += len(novos)
+        erros.extend(novos[:max(0, BULK_MAX_ERROS - len(erros))])
+    
+    async def flush():
+        nonlocal aceitas
+        inseridas, rejeitadas_lote = await run_in_threadpool(ColetaService.bulk_create, db, lote)
+        aceitas += inseridas
+        reject(rejeitadas_lote)
+        lote.clear()
+    
+    async for numero, record in iter_records(request.stream(), content_type):
+        recebidas += 1
+        if isinstance(record, str):
+            reject([(numero, record)])
+            continue
+        lote.append((numero, record))
+        if len(lote) >= batch_size:
+            await flush()
+    if lote:
+        await flush()
+    
+    erros.sort()
+    return ColetaBulkResponse(
+        recebidas=recebidas,
+        aceitas=aceitas,
+        rejeitadas=rejeitadas,
+        erros=[ColetaBulkErro(linha=linha, motivo=motivo) for linha, motivo in erros]
+    )
+
+
 @router.put("/{coleta_id}", response_model=ColetaPrecoResponse)
 def update_coleta(
     coleta_id: int,
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, Query
 from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
 from app.database.connection import get_db
-from app.schemas import ProdutoCreate, ProdutoUpdate, ProdutoResponse, ProdutoListResponse
-from app.services import ProdutoService
+from app.schemas import (
+    ProdutoCreate, ProdutoUpdate, ProdutoResponse, ProdutoListResponse, ProdutoBatchResponse,
+    BatchGetRequest, FrequenciaSerie, SerieResponse
+)
+from app.services import ProdutoService, EstatisticaService
 from app.utils.dependencies import get_current_active_user, require_admin
 from app.models import User
 
@@ -21,6 +26,24 @@ def list_produtos(
     return ProdutoListResponse(items=items, total=len(items))
 
 
+@router.post("/batch-get", response_model=ProdutoBatchResponse)
+def batch_get_produtos(
+    batch: BatchGetRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Busca vários produtos por id em uma única requisição
+    
+    - **ids**: Lista de ids (até 1000)
+    
+    Os itens voltam na ordem dos ids pedidos, com `null` para os não
+    encontrados, que também são listados em `not_found`.
+    """
+    items, not_found = ProdutoService.get_many(db, batch.ids)
+    return ProdutoBatchResponse(items=items, not_found=not_found)
+
+
 @router.get("/{produto_id}", response_model=ProdutoResponse)
 def get_produto(
     produto_id: int,
@@ -33,6 +56,40 @@ def get_produto(
     return ProdutoService.get_by_id(db, produto_id)
 
 
+@router.get("/{produto_id}/serie", response_model=SerieResponse)
+def get_serie_produto(
+    produto_id: int,
+    frequencia: FrequenciaSerie = Query(FrequenciaSerie.MES),
+    estado: Optional[str] = Query(None, max_length=2),
+    municipio: Optional[str] = Query(None, max_length=100),
+    data_inicio: Optional[date] = Query(None),
+    data_fim: Optional[date] = Query(None),
+    preencher: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Série temporal do preço de venda de um produto
+    
+    - **frequencia**: `semana` (início na segunda-feira), `mes` ou `ano`
+    - **estado**: Filtrar por UF (ex: SP, RJ, MG)
+    - **municipio**: Filtrar por município (busca parcial, sem acentos)
+    - **data_inicio** / **data_fim**: Período; com ambos, a série cobre todo o intervalo
+    - **preencher**: Repete média e mediana do último período com coletas nos
+      períodos vazios
+    
+    Cada ponto traz média, mediana e quantidade de coletas do período;
+    períodos sem coletas aparecem com quantidade 0.
+    """
+    produto, pontos = EstatisticaService.get_serie(
+        db, produto_id, frequencia, estado, municipio, data_inicio, data_fim, preencher
+    )
+    return SerieResponse(
+        produto_id=produto.id, produto=produto.nome, frequencia=frequencia,
+        estado=estado, municipio=municipio, pontos=pontos
+    )
+
+
 @router.post("", response_model=ProdutoResponse, status_code=status.HTTP_201_CREATED)
 def create_produto(
     produto_data: ProdutoCreate,
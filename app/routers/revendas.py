@@ -2,8 +2,13 @@ from fastapi import APIRouter, Depends, status, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.database.connection import get_db
-from app.schemas import RevendaCreate, RevendaUpdate, RevendaResponse, RevendaListResponse
+from app.schemas import (
+    RevendaCreate, RevendaUpdate, RevendaResponse, RevendaListResponse, RevendaBatchResponse,
+    RevendaPrecoListResponse, BatchGetRequest
+)
 from app.services import RevendaService
+from app.utils.fields import parse_fields, sparse_response
+from app.utils.pagination import IncludeTotal
 from app.utils.dependencies import get_current_active_user, require_admin
 from app.models import User
 
@@ -17,20 +22,56 @@ def list_revendas(
     estado: Optional[str] = Query(None, max_length=2),
     municipio: Optional[str] = Query(None, max_length=100),
     bandeira: Optional[str] = Query(None, max_length=100),
+    cursor: Optional[str] = Query(None, max_length=200),
+    include_total: IncludeTotal = Query(IncludeTotal.EXACT),
+    fields: Optional[str] = Query(None, max_length=500),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Lista todas as revendas com filtros opcionais
     
-    - **skip**: Número de registros a pular (paginação)
+    - **skip**: Número de registros a pular (paginação por offset)
     - **limit**: Número máximo de registros a retornar
     - **estado**: Filtrar por UF (ex: SP, RJ, MG)
-    - **municipio**: Filtrar por município (busca parcial)
-    - **bandeira**: Filtrar por bandeira do posto
+    - **municipio**: Filtrar por município (busca parcial, sem acentos)
+    - **bandeira**: Filtrar por bandeira do posto (busca parcial, sem acentos)
+    - **cursor**: Paginação por cursor: envie vazio na primeira página e depois
+      o `next_cursor` da resposta anterior (ignora skip; custo constante por página)
+    - **include_total**: `exact` (padrão) conta os registros; `estimated` reutiliza
+      a contagem em cache para os mesmos filtros; `off` não conta (total nulo)
+    - **fields**: Campos de cada item separados por vírgula (ex: `id,nome,municipio`);
+      só essas colunas são consultadas e serializadas
     """
-    items, total = RevendaService.get_all(db, skip, limit, estado, municipio, bandeira)
-    return RevendaListResponse(items=items, total=total, skip=skip, limit=limit)
+    campos = parse_fields(fields, RevendaResponse)
+    items, total, next_cursor = RevendaService.get_all(
+        db, skip, limit, estado, municipio, bandeira, cursor, include_total, campos
+    )
+    if campos:
+        return sparse_response(
+            items, campos, total=total, skip=skip, limit=limit, next_cursor=next_cursor
+        )
+    return RevendaListResponse(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor
+    )
+
+
+@router.post("/batch-get", response_model=RevendaBatchResponse)
+def batch_get_revendas(
+    batch: BatchGetRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Busca várias revendas por id em uma única requisição
+    
+    - **ids**: Lista de ids (até 1000)
+    
+    Os itens voltam na ordem dos ids pedidos, com `null` para os não
+    encontrados, que também são listados em `not_found`.
+    """
+    items, not_found = RevendaService.get_many(db, batch.ids)
+    return RevendaBatchResponse(items=items, not_found=not_found)
 
 
 @router.get("/{revenda_id}", response_model=RevendaResponse)
@@ -45,6 +86,22 @@ def get_revenda(
     return RevendaService.get_by_id(db, revenda_id)
 
 
+@router.get("/{revenda_id}/precos", response_model=RevendaPrecoListResponse)
+def get_precos_revenda(
+    revenda_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Preços atuais de uma revenda
+    
+    Para cada produto, o preço da coleta mais recente da revenda, lido do
+    instantâneo de preços atuais (sem percorrer o histórico).
+    """
+    items = RevendaService.get_precos(db, revenda_id)
+    return RevendaPrecoListResponse(revenda_id=revenda_id, items=items)
+
+
 @router.post("", response_model=RevendaResponse, status_code=status.HTTP_201_CREATED)
 def create_revenda(
     revenda_data: RevendaCreate,
@@ -3,14 +3,24 @@ from app.schemas.user import (
     Token, TokenData
 )
 from app.schemas.revenda import (
-    RevendaCreate, RevendaUpdate, RevendaResponse, RevendaListResponse
+    RevendaCreate, RevendaUpdate, RevendaResponse, RevendaListResponse, RevendaBatchResponse,
+    RevendaPreco, RevendaPrecoListResponse
 )
 from app.schemas.produto import (
-    ProdutoCreate, ProdutoUpdate, ProdutoResponse, ProdutoListResponse
+    ProdutoCreate, ProdutoUpdate, ProdutoResponse, ProdutoListResponse, ProdutoBatchResponse
 )
 from app.schemas.coleta_preco import (
     ColetaPrecoCreate, ColetaPrecoUpdate, ColetaPrecoResponse,
-    ColetaPrecoDetailResponse, ColetaPrecoListResponse
+    ColetaPrecoDetailResponse, ColetaPrecoListResponse, ColetaPrecoDetailListResponse,
+    ColetaPrecoBatchResponse, ColetaBulkErro, ColetaBulkResponse, ColetaMaisBarata,
+    ColetaMaisBarataListResponse
+)
+from app.schemas.batch import BatchGetRequest
+from app.schemas.estatistica import (
+    DimensaoEstatistica, PeriodoEstatistica, FrequenciaSerie, DimensaoVariacao, EstatisticaPreco,
+    EstatisticaListResponse, PontoSerie, SerieResponse, VariacaoPreco, VariacaoListResponse,
+    MargemPreco, MargemListResponse, DimensaoPercentil, PeriodoPercentil, PercentilPreco,
+    PercentilListResponse
 )
 
 __all__ = [
@@ -19,9 +29,20 @@ __all__ = [
     "Token", "TokenData",
     # Revenda
     "RevendaCreate", "RevendaUpdate", "RevendaResponse", "RevendaListResponse",
+    "RevendaBatchResponse", "RevendaPreco", "RevendaPrecoListResponse",
     # Produto
     "ProdutoCreate", "ProdutoUpdate", "ProdutoResponse", "ProdutoListResponse",
+    "ProdutoBatchResponse",
     # ColetaPreco
     "ColetaPrecoCreate", "ColetaPrecoUpdate", "ColetaPrecoResponse",
-    "ColetaPrecoDetailResponse", "ColetaPrecoListResponse"
+    "ColetaPrecoDetailResponse", "ColetaPrecoListResponse", "ColetaPrecoDetailListResponse",
+    "ColetaPrecoBatchResponse", "ColetaBulkErro", "ColetaBulkResponse",
+    "ColetaMaisBarata", "ColetaMaisBarataListResponse",
+    # Lote
+    "BatchGetRequest",
+    # Estatísticas
+    "DimensaoEstatistica", "PeriodoEstatistica", "FrequenciaSerie", "DimensaoVariacao",
+    "EstatisticaPreco", "EstatisticaListResponse", "PontoSerie", "SerieResponse",
+    "VariacaoPreco", "VariacaoListResponse", "MargemPreco", "MargemListResponse",
+    "DimensaoPercentil", "PeriodoPercentil", "PercentilPreco", "PercentilListResponse"
 ]
\ No newline at end of file
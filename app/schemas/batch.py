@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+
+# Máximo de ids por requisição de busca em lote
+BATCH_MAX_IDS = 1000
+
+
+class BatchGetRequest(BaseModel):
+    """Schema de busca em lote por ids"""
+    ids: list[int] = Field(..., min_length=1, max_length=BATCH_MAX_IDS)
@@ -57,6 +57,60 @@ class ColetaPrecoDetailResponse(BaseModel):
 class ColetaPrecoListResponse(BaseModel):
     """Schema de listagem de Coletas de Preço"""
     items: list[ColetaPrecoResponse]
-    total: int
+    total: Optional[int]
     skip: int
-    limit: int
\ No newline at end of file
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class ColetaPrecoDetailListResponse(BaseModel):
+    """Schema de listagem detalhada de Coletas de Preço"""
+    items: list[ColetaPrecoDetailResponse]
+    total: Optional[int]
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class ColetaPrecoBatchResponse(BaseModel):
+    """Schema de busca em lote de Coletas de Preço (itens na ordem dos ids; null se não encontrado)"""
+    items: list[Optional[ColetaPrecoResponse]]
+    not_found: list[int]
+
+
+class ColetaBulkErro(BaseModel):
+    """Linha rejeitada em uma carga em lote"""
+    linha: int
+    motivo: str
+
+
+class ColetaBulkResponse(BaseModel):
+    """Resultado de uma carga em lote de Coletas de Preço"""
+    recebidas: int
+    aceitas: int
+    rejeitadas: int
+    erros: list[ColetaBulkErro]
+
+
+class ColetaMaisBarata(BaseModel):
+    """Preço mais recente de uma revenda na janela, com sua posição no ranking"""
+    posicao: int
+    revenda_id: int
+    revenda_nome: str
+    revenda_municipio: str
+    revenda_estado: str
+    revenda_bandeira: Optional[str]
+    data_coleta: date
+    valor_venda: float
+    unidade_medida: str
+
+    class Config:
+        from_attributes = True
+
+
+class ColetaMaisBarataListResponse(BaseModel):
+    """Schema de resposta do ranking de revendas mais baratas"""
+    produto: str
+    data_referencia: Optional[date]
+    dias: int
+    items: list[ColetaMaisBarata]
@@ -0,0 +1,160 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Optional
+import enum
+
+
+class DimensaoEstatistica(str, enum.Enum):
+    """Dimensões de agrupamento das estatísticas de preço"""
+    PRODUTO = "produto"
+    ESTADO = "estado"
+    REGIAO_SIGLA = "regiao_sigla"
+    MUNICIPIO = "municipio"
+    BANDEIRA = "bandeira"
+
+
+class PeriodoEstatistica(str, enum.Enum):
+    """Granularidade temporal das estatísticas"""
+    DIA = "dia"
+    SEMANA = "semana"
+    MES = "mes"
+
+
+class FrequenciaSerie(str, enum.Enum):
+    """Frequência de reamostragem da série de preços"""
+    SEMANA = "semana"
+    MES = "mes"
+    ANO = "ano"
+
+
+class DimensaoVariacao(str, enum.Enum):
+    """Agrupamento do ranking de variação de preço"""
+    ESTADO = "estado"
+    MUNICIPIO = "municipio"
+    BANDEIRA = "bandeira"
+    REVENDA = "revenda"
+
+
+class DimensaoPercentil(str, enum.Enum):
+    """Agrupamento geográfico dos percentis de preço"""
+    ESTADO = "estado"
+    REGIAO_SIGLA = "regiao_sigla"
+
+
+class PeriodoPercentil(str, enum.Enum):
+    """Granularidade temporal dos percentis de preço"""
+    MES = "mes"
+    ANO = "ano"
+
+
+class EstatisticaPreco(BaseModel):
+    """Estatísticas de valor_venda de um grupo; dimensões não agrupadas vêm nulas"""
+    produto: Optional[str] = None
+    estado: Optional[str] = None
+    regiao_sigla: Optional[str] = None
+    municipio: Optional[str] = None
+    bandeira: Optional[str] = None
+    periodo: Optional[date] = None
+    quantidade: int
+    media: float
+    minimo: float
+    maximo: float
+    desvio_padrao: Optional[float]
+
+
+class EstatisticaListResponse(BaseModel):
+    """Schema de resposta das estatísticas de preço"""
+    agrupar_por: list[DimensaoEstatistica]
+    periodo: Optional[PeriodoEstatistica]
+    items: list[EstatisticaPreco]
+
+
+class PontoSerie(BaseModel):
+    """Um período da série; períodos sem coletas têm quantidade 0"""
+    periodo: date
+    media: Optional[float]
+    mediana: Optional[float]
+    quantidade: int
+
+
+class SerieResponse(BaseModel):
+    """Schema de resposta da série temporal de preços de um produto"""
+    produto_id: int
+    produto: str
+    frequencia: FrequenciaSerie
+    estado: Optional[str]
+    municipio: Optional[str]
+    pontos: list[PontoSerie]
+
+
+class MargemPreco(BaseModel):
+    """Estatísticas da margem (valor_venda - valor_compra) de um grupo"""
+    produto: Optional[str] = None
+    estado: Optional[str] = None
+    regiao_sigla: Optional[str] = None
+    municipio: Optional[str] = None
+    bandeira: Optional[str] = None
+    periodo: Optional[date] = None
+    quantidade: int
+    media: float
+    minimo: float
+    maximo: float
+    desvio_padrao: Optional[float]
+    p10: float
+    p25: float
+    mediana: float
+    p75: float
+    p90: float
+
+
+class MargemListResponse(BaseModel):
+    """Schema de resposta das estatísticas de margem"""
+    agrupar_por: list[DimensaoEstatistica]
+    periodo: Optional[PeriodoEstatistica]
+    items: list[MargemPreco]
+
+
+class PercentilPreco(BaseModel):
+    """Percentis estimados de valor_venda de um grupo; dimensões não agrupadas vêm nulas"""
+    estado: Optional[str] = None
+    regiao_sigla: Optional[str] = None
+    periodo: Optional[date] = None
+    quantidade: int
+    minimo: float
+    maximo: float
+    percentis: dict[str, float]
+
+
+class PercentilListResponse(BaseModel):
+    """Schema de resposta dos percentis de preço"""
+    produto: str
+    agrupar_por: Optional[DimensaoPercentil]
+    periodo: Optional[PeriodoPercentil]
+    items: list[PercentilPreco]
+
+
+class VariacaoPreco(BaseModel):
+    """Variação da média de valor_venda de um grupo entre os dois períodos"""
+    posicao: int
+    estado: Optional[str] = None
+    municipio: Optional[str] = None
+    bandeira: Optional[str] = None
+    revenda_id: Optional[int] = None
+    revenda_nome: Optional[str] = None
+    quantidade_base: int
+    quantidade_atual: int
+    media_base: float
+    media_atual: float
+    variacao_absoluta: float
+    variacao_percentual: float
+
+
+class VariacaoListResponse(BaseModel):
+    """Schema de resposta do ranking de variação de preço"""
+    produto: str
+    agrupar_por: DimensaoVariacao
+    base_inicio: date
+    base_fim: date
+    atual_inicio: date
+    atual_fim: date
+    items: list[VariacaoPreco]
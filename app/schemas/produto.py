@@ -32,4 +32,10 @@ class ProdutoResponse(ProdutoBase):
 class ProdutoListResponse(BaseModel):
     """Schema de listagem de Produtos"""
     items: list[ProdutoResponse]
-    total: int
\ No newline at end of file
+    total: int
+
+
+class ProdutoBatchResponse(BaseModel):
+    """Schema de busca em lote de Produtos (itens na ordem dos ids; null se não encontrado)"""
+    items: list[Optional[ProdutoResponse]]
+    not_found: list[int]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 
@@ -39,6 +39,32 @@ class RevendaResponse(RevendaBase):
 class RevendaListResponse(BaseModel):
     """Schema de listagem de Revendas"""
     items: list[RevendaResponse]
-    total: int
+    total: Optional[int]
     skip: int
-    limit: int
\ No newline at end of file
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class RevendaBatchResponse(BaseModel):
+    """Schema de busca em lote de Revendas (itens na ordem dos ids; null se não encontrado)"""
+    items: list[Optional[RevendaResponse]]
+    not_found: list[int]
+
+
+class RevendaPreco(BaseModel):
+    """Preço atual de um produto na revenda (última coleta)"""
+    produto_id: int
+    produto_nome: str
+    data_coleta: date
+    valor_venda: float
+    valor_compra: Optional[float]
+    unidade_medida: str
+
+    class Config:
+        from_attributes = True
+
+
+class RevendaPrecoListResponse(BaseModel):
+    """Schema de resposta dos preços atuais de uma revenda"""
+    revenda_id: int
+    items: list[RevendaPreco]
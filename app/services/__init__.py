@@ -2,10 +2,18 @@ from app.services.auth_service import AuthService
 from app.services.revenda_service import RevendaService
 from app.services.produto_service import ProdutoService
 from app.services.coleta_service import ColetaService
+from app.services.preco_diario_service import PrecoDiarioService
+from app.services.preco_atual_service import PrecoAtualService
+from app.services.sketch_preco_service import SketchPrecoService
+from app.services.estatistica_service import EstatisticaService
 
 __all__ = [
     "AuthService",
     "RevendaService",
     "ProdutoService",
-    "ColetaService"
+    "ColetaService",
+    "PrecoDiarioService",
+    "PrecoAtualService",
+    "SketchPrecoService",
+    "EstatisticaService"
 ]
\ No newline at end of file
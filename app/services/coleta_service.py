@@ -1,14 +1,111 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, literal, tuple_, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, Query
 from fastapi import HTTPException, status
-from datetime import date
+from pydantic import ValidationError
+from datetime import date, timedelta
 from typing import Optional
-from app.models import ColetaPreco, Revenda, Produto
+from app.models import ColetaPreco, Revenda, Produto, PrecoAtual
 from app.schemas import ColetaPrecoCreate, ColetaPrecoUpdate
+from app.services.produto_service import ProdutoService
+from app.services.preco_diario_service import PrecoDiarioService
+from app.services.preco_atual_service import PrecoAtualService
+from app.services.sketch_preco_service import SketchPrecoService
+from app.utils.cache import query_cache
+from app.database.search import search_filter
+from app.utils.fields import project_columns
+from app.utils.pagination import IncludeTotal, encode_cursor, decode_cursor, count_total
+from app.utils.batch import IN_BATCH, fetch_by_ids
 
 
 class ColetaService:
     """Serviço de gestão de coletas de preço"""
     
+    # Colunas da listagem detalhada (ColetaPrecoDetailResponse), por campo
+    DETAIL_COLUMNS = {
+        "id": ColetaPreco.id,
+        "data_coleta": ColetaPreco.data_coleta,
+        "valor_venda": ColetaPreco.valor_venda,
+        "valor_compra": ColetaPreco.valor_compra,
+        "unidade_medida": ColetaPreco.unidade_medida,
+        "revenda_id": ColetaPreco.revenda_id,
+        "revenda_nome": Revenda.nome.label("revenda_nome"),
+        "revenda_municipio": Revenda.municipio.label("revenda_municipio"),
+        "revenda_estado": Revenda.estado.label("revenda_estado"),
+        "produto_id": ColetaPreco.produto_id,
+        "produto_nome": Produto.nome.label("produto_nome"),
+        "created_at": ColetaPreco.created_at,
+    }
+    
+    # Chaves de ordenação do cursor, sempre incluídas na projeção
+    CURSOR_KEYS = ("data_coleta", "id")
+    
+    @staticmethod
+    def _filter(
+        db: Session,
+        query: Query,
+        estado: Optional[str],
+        municipio: Optional[str],
+        produto: Optional[str],
+        data_inicio: Optional[date],
+        data_fim: Optional[date],
+        revenda_joined: bool = False
+    ) -> Optional[Query]:
+        """
+        Aplica os filtros de listagem a uma consulta sobre coletas_preco
+        
+        Só junta revendas quando há filtro por estado ou município (e a
+        consulta ainda não a juntou); o produto é resolvido para produto_id
+        pelo mapa em memória, sem juntar produtos.
+        
+        Returns:
+            Consulta filtrada, ou None se o produto não existir
+        """
+        if (estado or municipio) and not revenda_joined:
+            query = query.join(Revenda)
+        if estado:
+            query = query.filter(Revenda.estado == estado.upper())
+        if municipio:
+            query = query.filter(search_filter(Revenda.id, Revenda.municipio_busca, municipio))
+        if produto:
+            produto_id = ProdutoService.resolve_id(db, produto)
+            if produto_id is None:
+                return None
+            query = query.filter(ColetaPreco.produto_id == produto_id)
+        if data_inicio:
+            query = query.filter(ColetaPreco.data_coleta >= data_inicio)
+        if data_fim:
+            query = query.filter(ColetaPreco.data_coleta <= data_fim)
+        return query
+    
+    @staticmethod
+    def _page(query: Query, skip: int, limit: int, cursor: Optional[str]) -> tuple[list, Optional[str]]:
+        """
+        Ordena por (data_coleta, id) decrescente e busca uma página
+        
+        Com cursor (string vazia para a primeira página) a página é buscada
+        a partir da chave do último item da página anterior, em vez de skip.
+        
+        Returns:
+            (itens, cursor da próxima página ou None)
+        """
+        query = query.order_by(ColetaPreco.data_coleta.desc(), ColetaPreco.id.desc())
+        
+        if cursor is None:
+            return query.offset(skip).limit(limit).all(), None
+        
+        if cursor:
+            ultima_data, ultimo_id = decode_cursor(cursor, date, int)
+            query = query.filter(
+                tuple_(ColetaPreco.data_coleta, ColetaPreco.id) < (ultima_data, ultimo_id)
+            )
+        items = query.limit(limit).all()
+        
+        next_cursor = None
+        if len(items) == limit:
+            next_cursor = encode_cursor(items[-1].data_coleta, items[-1].id)
+        return items, next_cursor
+    
     @staticmethod
     def get_all(
         db: Session,
@@ -18,26 +115,143 @@ class ColetaService:
         municipio: Optional[str] = None,
         produto: Optional[str] = None,
         data_inicio: Optional[date] = None,
-        data_fim: Optional[date] = None
-    ) -> tuple[list[ColetaPreco], int]:
-        """Lista coletas com filtros opcionais"""
-        query = db.query(ColetaPreco).join(Revenda).join(Produto)
+        data_fim: Optional[date] = None,
+        cursor: Optional[str] = None,
+        include_total: IncludeTotal = IncludeTotal.EXACT,
+        fields: Optional[list[str]] = None
+    ) -> tuple[list[ColetaPreco], Optional[int], Optional[str]]:
+        """
+        Lista coletas com filtros opcionais
+        
+        Ordena por (data_coleta, id) decrescente, com paginação por skip ou
+        por cursor (ver _page). Listagens sem filtro por estado ou município
+        leem apenas coletas_preco (ver _filter).
+        
+        O total segue include_total (ver count_total): None quando
+        desligado ou uma contagem em cache quando estimado. Com fields, a
+        consulta projeta só essas colunas e retorna linhas em vez de
+        objetos ORM.
+        
+        Returns:
+            (coletas, total, cursor da próxima página ou None)
+        """
+        filtros = (estado, municipio, produto, data_inicio, data_fim)
+        if fields:
+            entities = project_columns(ColetaPreco, fields, ColetaService.CURSOR_KEYS)
+        else:
+            entities = [ColetaPreco]
+        query = ColetaService._filter(db, db.query(*entities), *filtros)
+        if query is None:
+            return [], None if include_total == IncludeTotal.OFF else 0, None
+        
+        total = count_total(query, include_total, "coletas", filtros)
+        items, next_cursor = ColetaService._page(query, skip, limit, cursor)
+        
+        return items, total, next_cursor
+    
+    @staticmethod
+    def get_all_detailed(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        estado: Optional[str] = None,
+        municipio: Optional[str] = None,
+        produto: Optional[str] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        cursor: Optional[str] = None,
+        include_total: IncludeTotal = IncludeTotal.EXACT,
+        fields: Optional[list[str]] = None
+    ) -> tuple[list, Optional[int], Optional[str]]:
+        """
+        Lista coletas com dados da revenda e do produto em uma única consulta
+        
+        Seleciona apenas as colunas de DETAIL_COLUMNS com junção a revendas
+        e produtos, sem carregar objetos ORM nem relacionamentos por linha.
+        Filtros, ordenação, paginação e total seguem get_all; a contagem é
+        feita sobre a consulta sem as junções de detalhe (e compartilha o
+        cache de get_all). Com fields, só essas colunas são selecionadas e
+        revendas/produtos só entram na junção se algum campo deles for pedido.
+        
+        Returns:
+            (linhas com os campos de ColetaPrecoDetailResponse, total, cursor)
+        """
+        filtros = (estado, municipio, produto, data_inicio, data_fim)
+        base = ColetaService._filter(db, db.query(ColetaPreco), *filtros)
+        if base is None:
+            return [], None if include_total == IncludeTotal.OFF else 0, None
+        total = count_total(base, include_total, "coletas", filtros)
+        
+        nomes = list(ColetaService.DETAIL_COLUMNS)
+        if fields:
+            nomes = list(dict.fromkeys([*fields, *ColetaService.CURSOR_KEYS]))
+        columns = [ColetaService.DETAIL_COLUMNS[nome] for nome in nomes]
+        query = db.query(*columns).select_from(ColetaPreco)
         
+        join_revenda = any(nome.startswith("revenda_") and nome != "revenda_id" for nome in nomes)
+        if join_revenda:
+            query = query.join(Revenda, ColetaPreco.revenda_id == Revenda.id)
+        if "produto_nome" in nomes:
+            query = query.join(Produto, ColetaPreco.produto_id == Produto.id)
+        query = ColetaService._filter(db, query, *filtros, revenda_joined=join_revenda)
+        items, next_cursor = ColetaService._page(query, skip, limit, cursor)
+        
+        return items, total, next_cursor
+    
+    @staticmethod
+    def get_mais_baratas(
+        db: Session,
+        produto: str,
+        estado: Optional[str] = None,
+        municipio: Optional[str] = None,
+        k: int = 10,
+        dias: int = 30
+    ) -> tuple[Optional[date], list]:
+        """
+        Ranking das revendas com o menor preço mais recente de um produto
+        
+        A janela de atualidade são os `dias` anteriores à coleta mais recente
+        do produto (data de referência). Os preços vêm do instantâneo
+        preco_atual (uma linha por revenda e produto), lido em ordem de preço
+        pelo índice ix_preco_atual_produto_valor ou, com filtro por
+        município, pela chave (revenda, produto) das revendas encontradas.
+        
+        Returns:
+            (data de referência, itens com os campos de ColetaMaisBarata);
+            (None, []) se o produto não existir ou não tiver coletas
+        """
+        produto_id = ProdutoService.resolve_id(db, produto)
+        if produto_id is None:
+            return None, []
+        referencia = db.query(func.max(ColetaPreco.data_coleta)).filter(
+            ColetaPreco.produto_id == produto_id
+        ).scalar()
+        if referencia is None:
+            return None, []
+        
+        query = db.query(
+            PrecoAtual.revenda_id,
+            Revenda.nome.label("revenda_nome"),
+            Revenda.municipio.label("revenda_municipio"),
+            Revenda.estado.label("revenda_estado"),
+            Revenda.bandeira.label("revenda_bandeira"),
+            PrecoAtual.data_coleta,
+            PrecoAtual.valor_venda,
+            PrecoAtual.unidade_medida,
+        ).join(Revenda, Revenda.id == PrecoAtual.revenda_id).filter(
+            PrecoAtual.produto_id == produto_id,
+            PrecoAtual.data_coleta >= referencia - timedelta(days=dias)
+        )
         if estado:
             query = query.filter(Revenda.estado == estado.upper())
         if municipio:
-            query = query.filter(Revenda.municipio.ilike(f"%{municipio}%"))
-        if produto:
-            query = query.filter(Produto.nome == produto.upper())
-        if data_inicio:
-            query = query.filter(ColetaPreco.data_coleta >= data_inicio)
-        if data_fim:
-            query = query.filter(ColetaPreco.data_coleta <= data_fim)
-        
-        total = query.count()
-        items = query.order_by(ColetaPreco.data_coleta.desc()).offset(skip).limit(limit).all()
+            query = query.filter(search_filter(Revenda.id, Revenda.municipio_busca, municipio))
+        rows = query.order_by(
+            PrecoAtual.valor_venda, PrecoAtual.data_coleta.desc(), PrecoAtual.revenda_id
+        ).limit(k).all()
         
-        return items, total
+        items = [{"posicao": posicao, **row._asdict()} for posicao, row in enumerate(rows, start=1)]
+        return referencia, items
     
     @staticmethod
     def get_by_id(db: Session, coleta_id: int) -> ColetaPreco:
@@ -50,6 +264,31 @@ class ColetaService:
             )
         return coleta
     
+    @staticmethod
+    def get_many(db: Session, ids: list[int]) -> tuple[list[Optional[ColetaPreco]], list[int]]:
+        """
+        Busca coletas por uma lista de ids com uma única consulta IN
+        
+        Returns:
+            (itens na ordem dos ids, com None para os não encontrados;
+            ids não encontrados)
+        """
+        return fetch_by_ids(db, ColetaPreco, ids)
+    
+    @staticmethod
+    def _check_natural_key(db: Session, revenda_id: int, produto_id: int, data_coleta: date) -> None:
+        """Garante que não exista outra coleta para a mesma revenda, produto e data"""
+        existing = db.query(ColetaPreco.id).filter(
+            ColetaPreco.revenda_id == revenda_id,
+            ColetaPreco.produto_id == produto_id,
+            ColetaPreco.data_coleta == data_coleta
+        ).first()
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Coleta já cadastrada para esta revenda, produto e data"
+            )
+    
     @staticmethod
     def create(db: Session, coleta_data: ColetaPrecoCreate) -> ColetaPreco:
         """Cria uma nova coleta de preço"""
@@ -69,9 +308,18 @@ class ColetaService:
                 detail="Produto não encontrado"
             )
         
+        ColetaService._check_natural_key(
+            db, coleta_data.revenda_id, coleta_data.produto_id, coleta_data.data_coleta
+        )
+        
         db_coleta = ColetaPreco(**coleta_data.model_dump())
         db.add(db_coleta)
+        db.flush()
+        PrecoDiarioService.add(db, [coleta_data.model_dump()])
+        PrecoAtualService.upsert(db, [coleta_data.model_dump()])
+        SketchPrecoService.add(db, [coleta_data.model_dump()])
         db.commit()
+        query_cache.invalidate("coletas")
         db.refresh(db_coleta)
         
         return db_coleta
@@ -82,10 +330,24 @@ class ColetaService:
         coleta = ColetaService.get_by_id(db, coleta_id)
         
         update_data = coleta_data.model_dump(exclude_unset=True)
+        if update_data.get('data_coleta') and update_data['data_coleta'] != coleta.data_coleta:
+            ColetaService._check_natural_key(
+                db, coleta.revenda_id, coleta.produto_id, update_data['data_coleta']
+            )
+        
+        chaves = [(coleta.data_coleta, coleta.produto_id)]
+        sketches = [(SketchPrecoService.mes(coleta.data_coleta), coleta.produto_id, coleta.revenda.estado)]
         for field, value in update_data.items():
             setattr(coleta, field, value)
         
+        db.flush()
+        PrecoDiarioService.refresh(db, chaves + [(coleta.data_coleta, coleta.produto_id)])
+        PrecoAtualService.refresh(db, [(coleta.revenda_id, coleta.produto_id)])
+        SketchPrecoService.refresh(db, sketches + [
+            (SketchPrecoService.mes(coleta.data_coleta), coleta.produto_id, coleta.revenda.estado)
+        ])
         db.commit()
+        query_cache.invalidate("coletas")
         db.refresh(coleta)
         
         return coleta
@@ -94,5 +356,94 @@ class ColetaService:
     def delete(db: Session, coleta_id: int) -> None:
         """Deleta uma coleta"""
         coleta = ColetaService.get_by_id(db, coleta_id)
+        sketch = (SketchPrecoService.mes(coleta.data_coleta), coleta.produto_id, coleta.revenda.estado)
         db.delete(coleta)
-        db.commit()
\ No newline at end of file
+        db.flush()
+        PrecoDiarioService.refresh(db, [(coleta.data_coleta, coleta.produto_id)])
+        PrecoAtualService.refresh(db, [(coleta.revenda_id, coleta.produto_id)])
+        SketchPrecoService.refresh(db, [sketch])
+        db.commit()
+        query_cache.invalidate("coletas")
+    
+    @staticmethod
+    def bulk_create(db: Session, rows: list[tuple[int, dict]]) -> tuple[int, list[tuple[int, str]]]:
+        """
+        Valida e insere um lote de coletas em uma única transação
+        
+        As linhas são validadas contra ColetaPrecoCreate e a existência de
+        revendas e produtos do lote é verificada em consultas IN de até
+        IN_BATCH ids. As linhas aceitas são gravadas com um único INSERT
+        executemany com ON CONFLICT DO NOTHING: as chaves naturais
+        (revenda, produto, data) devolvidas pelo RETURNING indicam as
+        inseridas, e as demais (já cadastradas, repetidas no lote ou
+        gravadas por outra escrita concorrente) são rejeitadas.
+        
+        Args:
+            db: Sessão do banco
+            rows: Pares (número da linha, registro) do lote
+        
+        Returns:
+            (número de coletas inseridas, lista de (linha, motivo) rejeitadas)
+        """
+        rejeitadas = []
+        validas = []
+        for numero, row in rows:
+            try:
+                validas.append((numero, ColetaPrecoCreate.model_validate(row)))
+            except ValidationError as e:
+                erro = e.errors()[0]
+                campo = ".".join(str(loc) for loc in erro["loc"])
+                rejeitadas.append((numero, f"{campo}: {erro['msg']}" if campo else erro["msg"]))
+        
+        if not validas:
+            return 0, rejeitadas
+        
+        revenda_ids = list({coleta.revenda_id for _, coleta in validas})
+        produto_ids = list({coleta.produto_id for _, coleta in validas})
+        revendas, produtos = set(), set()
+        for i in range(0, max(len(revenda_ids), len(produto_ids)), IN_BATCH):
+            existentes = db.execute(
+                select(literal("revenda"), Revenda.id).where(Revenda.id.in_(revenda_ids[i:i + IN_BATCH]))
+                .union_all(select(literal("produto"), Produto.id).where(Produto.id.in_(produto_ids[i:i + IN_BATCH])))
+            ).all()
+            revendas.update(id_ for tipo, id_ in existentes if tipo == "revenda")
+            produtos.update(id_ for tipo, id_ in existentes if tipo == "produto")
+        
+        candidatas = []
+        for numero, coleta in validas:
+            if coleta.revenda_id not in revendas:
+                rejeitadas.append((numero, "Revenda não encontrada"))
+            elif coleta.produto_id not in produtos:
+                rejeitadas.append((numero, "Produto não encontrado"))
+            else:
+                candidatas.append((numero, coleta.model_dump()))
+        
+        inseridas = set()
+        if candidatas:
+            tabela = ColetaPreco.__table__
+            inseridas = set(db.execute(
+                sqlite_insert(tabela).on_conflict_do_nothing(
+                    index_elements=["revenda_id", "produto_id", "data_coleta"]
+                ).returning(tabela.c.revenda_id, tabela.c.produto_id, tabela.c.data_coleta),
+                [registro for _, registro in candidatas]
+            ).tuples())
+        
+        # Cada chave devolvida foi inserida pela sua primeira linha no lote
+        registros = []
+        for numero, registro in candidatas:
+            chave = (registro["revenda_id"], registro["produto_id"], registro["data_coleta"])
+            if chave in inseridas:
+                inseridas.remove(chave)
+                registros.append(registro)
+            else:
+                rejeitadas.append((numero, "Coleta já cadastrada para esta revenda, produto e data"))
+        
+        if registros:
+            PrecoDiarioService.add(db, registros)
+            PrecoAtualService.upsert(db, registros)
+            SketchPrecoService.add(db, registros)
+        db.commit()
+        if registros:
+            query_cache.invalidate("coletas")
+        
+        return len(registros), rejeitadas
\ No newline at end of file
@@ -0,0 +1,755 @@
+from sqlalchemy import func, cast, type_coerce, case, literal, or_, Integer, Date, String
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from datetime import date, timedelta
+from math import sqrt
+from typing import Optional
+import pandas as pd
+from app.models import ColetaPreco, Revenda, Produto, PrecoDiario, SketchPreco
+from app.schemas import (
+    DimensaoEstatistica, PeriodoEstatistica, FrequenciaSerie, DimensaoVariacao, DimensaoPercentil,
+    PeriodoPercentil
+)
+from app.services.produto_service import ProdutoService
+from app.services.coleta_service import ColetaService
+from app.services.sketch_preco_service import SketchPrecoService
+from app.database.search import search_filter
+from app.utils.cache import query_cache
+from app.utils.tdigest import TDigest
+
+
+class EstatisticaService:
+    """Serviço de estatísticas agregadas de preço"""
+
+    # Máximo de grupos por resposta; acima disso o pedido deve ser restringido
+    MAX_GRUPOS = 10000
+
+    # Máximo de coletas lidas para a mediana exata da série (semanal ou
+    # por município)
+    MAX_COLETAS_SERIE = 200_000
+
+    # Máximo de margens individuais lidas para os percentis da margem
+    MAX_COLETAS_MARGEM = 200_000
+
+    # Percentis da margem: campo da resposta -> quantil
+    PERCENTIS_MARGEM = {"p10": 0.1, "p25": 0.25, "mediana": 0.5, "p75": 0.75, "p90": 0.9}
+
+    # Máximo de percentis por consulta aos sketches
+    MAX_PERCENTIS = 20
+
+    # Coluna de cada dimensão de agrupamento nas coletas
+    DIMENSOES = {
+        DimensaoEstatistica.PRODUTO: Produto.nome,
+        DimensaoEstatistica.ESTADO: Revenda.estado,
+        DimensaoEstatistica.REGIAO_SIGLA: Revenda.regiao_sigla,
+        DimensaoEstatistica.MUNICIPIO: Revenda.municipio,
+        DimensaoEstatistica.BANDEIRA: Revenda.bandeira,
+    }
+    
+    # Frequência -> (regra de reamostragem do pandas, período para o início do intervalo)
+    FREQUENCIAS = {
+        FrequenciaSerie.SEMANA: ("W-MON", "W-SUN"),
+        FrequenciaSerie.MES: ("MS", "M"),
+        FrequenciaSerie.ANO: ("YS", "Y"),
+    }
+    
+    # Coluna de cada dimensão no agregado diário (sem bandeira)
+    DIMENSOES_AGREGADO = {
+        DimensaoEstatistica.PRODUTO: Produto.nome,
+        DimensaoEstatistica.ESTADO: PrecoDiario.estado,
+        DimensaoEstatistica.REGIAO_SIGLA: PrecoDiario.regiao_sigla,
+        DimensaoEstatistica.MUNICIPIO: PrecoDiario.municipio,
+    }
+
+    @staticmethod
+    def parse_dimensoes(agrupar_por: Optional[str]) -> list[DimensaoEstatistica]:
+        """
+        Valida o parâmetro agrupar_por ("produto,estado")
+
+        Raises:
+            HTTPException 400 se alguma dimensão não existir
+        """
+        if not agrupar_por:
+            return []
+        nomes = list(dict.fromkeys(d.strip() for d in agrupar_por.split(",") if d.strip()))
+        validas = {d.value: d for d in DimensaoEstatistica}
+        invalidas = [n for n in nomes if n not in validas]
+        if invalidas:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Dimensões inválidas: {', '.join(invalidas)}. "
+                       f"Disponíveis: {', '.join(validas)}"
+            )
+        return [validas[n] for n in nomes]
+
+    @staticmethod
+    def bucket(data, periodo: PeriodoEstatistica):
+        """Expressão SQL com a data inicial do período de cada data"""
+        if periodo == PeriodoEstatistica.DIA:
+            return data
+        if periodo == PeriodoEstatistica.SEMANA:
+            # Segunda-feira da semana: recua (dia da semana + 6) % 7 dias
+            dias = (cast(func.strftime("%w", data), Integer) + 6) % 7
+            return func.date(data, func.printf("-%d days", dias), type_=Date)
+        return func.date(data, "start of month", type_=Date)
+
+    @staticmethod
+    def _desvio_padrao(quantidade: int, soma: float, soma_quadrados: float) -> Optional[float]:
+        """Desvio padrão amostral a partir da soma e da soma dos quadrados"""
+        if quantidade < 2:
+            return None
+        variancia = (soma_quadrados - soma * soma / quantidade) / (quantidade - 1)
+        # Erro de arredondamento pode deixar a variância levemente negativa
+        return sqrt(max(variancia, 0.0))
+
+    @staticmethod
+    def _query_coletas(db: Session, agrupar_por, periodo, estado):
+        """
+        GROUP BY sobre coletas_preco, juntando revendas e produtos só se
+        alguma dimensão ou filtro precisar deles
+
+        Returns:
+            (consulta, colunas de agrupamento)
+        """
+        colunas = [EstatisticaService.DIMENSOES[d].label(d.value) for d in agrupar_por]
+        if periodo:
+            colunas.append(EstatisticaService.bucket(ColetaPreco.data_coleta, periodo).label("periodo"))
+
+        valor = ColetaPreco.valor_venda
+        query = db.query(
+            *colunas,
+            func.count(ColetaPreco.id).label("quantidade"),
+            func.avg(valor).label("media"),
+            func.min(valor).label("minimo"),
+            func.max(valor).label("maximo"),
+            func.sum(valor).label("soma"),
+            func.sum(valor * valor).label("soma_quadrados"),
+        ).select_from(ColetaPreco)
+
+        if DimensaoEstatistica.PRODUTO in agrupar_por:
+            query = query.join(Produto)
+        if estado or any(d != DimensaoEstatistica.PRODUTO for d in agrupar_por):
+            query = query.join(Revenda)
+        if estado:
+            query = query.filter(Revenda.estado == estado.upper())
+        return query, colunas
+
+    @staticmethod
+    def _query_agregado(db: Session, agrupar_por, periodo, estado):
+        """
+        GROUP BY sobre o agregado diário precos_diarios, somando as
+        quantidades, somas e somas dos quadrados de cada dia
+
+        Returns:
+            (consulta, colunas de agrupamento)
+        """
+        colunas = [EstatisticaService.DIMENSOES_AGREGADO[d].label(d.value) for d in agrupar_por]
+        if periodo:
+            colunas.append(EstatisticaService.bucket(PrecoDiario.data, periodo).label("periodo"))
+
+        quantidade = func.sum(PrecoDiario.quantidade)
+        soma = func.sum(PrecoDiario.soma)
+        query = db.query(
+            *colunas,
+            quantidade.label("quantidade"),
+            (soma / quantidade).label("media"),
+            func.min(PrecoDiario.minimo).label("minimo"),
+            func.max(PrecoDiario.maximo).label("maximo"),
+            soma.label("soma"),
+            func.sum(PrecoDiario.soma_quadrados).label("soma_quadrados"),
+        ).select_from(PrecoDiario)
+
+        if DimensaoEstatistica.PRODUTO in agrupar_por:
+            query = query.join(Produto)
+        if estado:
+            query = query.filter(PrecoDiario.estado == estado.upper())
+        return query, colunas
+
+    @staticmethod
+    def get_estatisticas(
+        db: Session,
+        agrupar_por: list[DimensaoEstatistica],
+        periodo: Optional[PeriodoEstatistica] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        produto: Optional[str] = None,
+        estado: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Estatísticas de valor_venda por grupo
+
+        Calcula quantidade, média, mínimo, máximo, soma e soma dos quadrados
+        em um único GROUP BY no banco; o desvio padrão é derivado das somas
+        em Python. Sem agrupamento por bandeira, a consulta lê o agregado
+        diário precos_diarios; com bandeira, lê coletas_preco.
+
+        Returns:
+            Um dict por grupo, ordenado pelas dimensões e pelo período
+
+        Raises:
+            HTTPException 400 se o resultado passar de MAX_GRUPOS grupos
+        """
+        if all(d in EstatisticaService.DIMENSOES_AGREGADO for d in agrupar_por):
+            query, colunas = EstatisticaService._query_agregado(db, agrupar_por, periodo, estado)
+            data = PrecoDiario.data
+            produto_col = PrecoDiario.produto_id
+        else:
+            query, colunas = EstatisticaService._query_coletas(db, agrupar_por, periodo, estado)
+            data = ColetaPreco.data_coleta
+            produto_col = ColetaPreco.produto_id
+        
+        if produto:
+            produto_id = ProdutoService.resolve_id(db, produto)
+            if produto_id is None:
+                return []
+            query = query.filter(produto_col == produto_id)
+        if data_inicio:
+            query = query.filter(data >= data_inicio)
+        if data_fim:
+            query = query.filter(data <= data_fim)
+
+        if colunas:
+            query = query.group_by(*colunas).order_by(*colunas)
+        rows = query.limit(EstatisticaService.MAX_GRUPOS + 1).all()
+
+        if len(rows) > EstatisticaService.MAX_GRUPOS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A consulta gera mais de {EstatisticaService.MAX_GRUPOS} grupos; "
+                       "restrinja o período ou as dimensões"
+            )
+
+        grupos = []
+        for row in rows:
+            if not row.quantidade:
+                continue
+            grupo = {d.value: getattr(row, d.value) for d in agrupar_por}
+            if periodo:
+                grupo["periodo"] = row.periodo
+            grupo.update(
+                quantidade=row.quantidade,
+                media=row.media,
+                minimo=row.minimo,
+                maximo=row.maximo,
+                desvio_padrao=EstatisticaService._desvio_padrao(
+                    row.quantidade, row.soma, row.soma_quadrados
+                ),
+            )
+            grupos.append(grupo)
+        return grupos
+
+    @staticmethod
+    def get_margens(
+        db: Session,
+        agrupar_por: list[DimensaoEstatistica],
+        periodo: Optional[PeriodoEstatistica] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        produto: Optional[str] = None,
+        estado: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Estatísticas e percentis da margem de revenda (valor_venda - valor_compra)
+
+        Coletas sem valor_compra ficam de fora. O resultado fica em cache no
+        namespace "coletas", invalidado pelas escritas de coletas da API e
+        do loader no mesmo processo; cargas feitas por outro processo só
+        aparecem depois de QUERY_CACHE_TTL_SECONDS.
+
+        Returns:
+            Um dict por grupo, ordenado pelas dimensões e pelo período
+
+        Raises:
+            HTTPException 400 se a consulta passar de MAX_COLETAS_MARGEM
+            coletas ou de MAX_GRUPOS grupos
+        """
+        chave = (
+            "margens", tuple(d.value for d in agrupar_por), periodo, data_inicio, data_fim,
+            produto.upper() if produto else None, estado.upper() if estado else None
+        )
+        return query_cache.get_or_set("coletas", chave, lambda: EstatisticaService._margens(
+            db, agrupar_por, periodo, data_inicio, data_fim, produto, estado
+        ))
+
+    @staticmethod
+    def _margens(db: Session, agrupar_por, periodo, data_inicio, data_fim, produto, estado) -> list[dict]:
+        """
+        Calcula get_margens sem cache
+
+        Quantidade, média, mínimo, máximo e somas de cada grupo saem de um
+        GROUP BY no banco. Os percentis precisam das margens individuais,
+        e os sketches guardam só valor_venda: com o total de coletas do
+        GROUP BY conferido contra MAX_COLETAS_MARGEM, uma segunda consulta
+        lê (dimensões, período, margem) pelo Core e o groupby do pandas
+        calcula os percentis de todos os grupos de forma vetorizada.
+        """
+        colunas = [EstatisticaService.DIMENSOES[d].label(d.value) for d in agrupar_por]
+        if periodo:
+            colunas.append(type_coerce(
+                EstatisticaService.bucket(ColetaPreco.data_coleta, periodo), String
+            ).label("periodo"))
+
+        margem = ColetaPreco.valor_venda - ColetaPreco.valor_compra
+        query = db.query().select_from(ColetaPreco).filter(ColetaPreco.valor_compra.isnot(None))
+        if DimensaoEstatistica.PRODUTO in agrupar_por:
+            query = query.join(Produto)
+        if estado or any(d != DimensaoEstatistica.PRODUTO for d in agrupar_por):
+            query = query.join(Revenda)
+        if estado:
+            query = query.filter(Revenda.estado == estado.upper())
+        if produto:
+            produto_id = ProdutoService.resolve_id(db, produto)
+            if produto_id is None:
+                return []
+            query = query.filter(ColetaPreco.produto_id == produto_id)
+        if data_inicio:
+            query = query.filter(ColetaPreco.data_coleta >= data_inicio)
+        if data_fim:
+            query = query.filter(ColetaPreco.data_coleta <= data_fim)
+
+        agregado = query.with_entities(
+            *colunas,
+            func.count().label("quantidade"),
+            func.avg(margem).label("media"),
+            func.min(margem).label("minimo"),
+            func.max(margem).label("maximo"),
+            func.sum(margem).label("soma"),
+            func.sum(margem * margem).label("soma_quadrados"),
+        )
+        if colunas:
+            agregado = agregado.group_by(*colunas).order_by(*colunas)
+        rows = [row for row in agregado.limit(EstatisticaService.MAX_GRUPOS + 1).all() if row.quantidade]
+        if len(rows) > EstatisticaService.MAX_GRUPOS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A consulta gera mais de {EstatisticaService.MAX_GRUPOS} grupos; "
+                       "restrinja o período ou as dimensões"
+            )
+        limite = EstatisticaService.MAX_COLETAS_MARGEM
+        if sum(row.quantidade for row in rows) > limite:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A consulta lê mais de {limite} coletas; restrinja o período ou os filtros"
+            )
+        if not rows:
+            return []
+
+        nomes = [c.name for c in colunas]
+        margens = db.connection().execute(query.with_entities(*colunas, margem.label("margem")).statement).all()
+        frame = pd.DataFrame.from_records(margens, columns=[*nomes, "margem"])
+        frame["margem"] = frame["margem"].astype("float64")
+        # Sem dimensões, todas as coletas formam um único grupo
+        chaves = nomes or [pd.Series(0, index=frame.index)]
+        percentis = EstatisticaService.PERCENTIS_MARGEM
+        quantis = frame.groupby(chaves, dropna=False)["margem"].quantile(list(percentis.values())).unstack()
+        quantis.columns = list(percentis)
+        # Chaves do pandas como tuplas, com NaN (dimensão nula) de volta a None
+        quantis = {
+            tuple(None if pd.isna(v) else v for v in (chave if isinstance(chave, tuple) else (chave,))): valores
+            for chave, valores in quantis.to_dict("index").items()
+        }
+
+        grupos = []
+        for row in rows:
+            grupo = {nome: getattr(row, nome) for nome in nomes}
+            chave = tuple(grupo.values()) if nomes else (0,)
+            if chave not in quantis:
+                # Grupo removido entre as duas consultas por uma escrita concorrente
+                continue
+            if periodo:
+                grupo["periodo"] = date.fromisoformat(row.periodo)
+            grupo.update(
+                quantidade=row.quantidade,
+                media=row.media,
+                minimo=row.minimo,
+                maximo=row.maximo,
+                desvio_padrao=EstatisticaService._desvio_padrao(
+                    row.quantidade, row.soma, row.soma_quadrados
+                ),
+                **quantis[chave],
+            )
+            grupos.append(grupo)
+        return grupos
+
+    @staticmethod
+    def parse_percentis(percentis: str) -> list[float]:
+        """
+        Valida o parâmetro percentis ("50,90,99.5")
+
+        Raises:
+            HTTPException 400 se algum valor não for um número entre 0 e 100
+            (exclusive) ou se passar de MAX_PERCENTIS valores
+        """
+        valores = []
+        for texto in dict.fromkeys(p.strip() for p in percentis.split(",") if p.strip()):
+            try:
+                valor = float(texto)
+            except ValueError:
+                valor = None
+            if valor is None or not 0 < valor < 100:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Percentil inválido: {texto!r}. Use números entre 0 e 100 (ex: 50,90)"
+                )
+            valores.append(valor)
+        if not valores or len(valores) > EstatisticaService.MAX_PERCENTIS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Informe de 1 a {EstatisticaService.MAX_PERCENTIS} percentis"
+            )
+        return valores
+
+    @staticmethod
+    def get_percentis(
+        db: Session,
+        produto: str,
+        percentis: list[float],
+        agrupar_por: Optional[DimensaoPercentil] = None,
+        periodo: Optional[PeriodoPercentil] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        estado: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Percentis de valor_venda estimados pelos sketches de quantis
+
+        Lê só os sketches (mês, UF) do recorte em sketches_preco, pelo
+        índice ix_sketches_preco_produto_mes, e funde os de cada grupo em um
+        t-digest, sem ler coletas. Os meses entram inteiros: data_inicio e
+        data_fim selecionam os meses que as contêm. O limite de erro está
+        documentado em app.utils.tdigest.
+
+        Args:
+            percentis: Percentis entre 0 e 100 (já validados por parse_percentis)
+
+        Returns:
+            Um dict por grupo, ordenado pela dimensão e pelo período
+        """
+        produto_id = ProdutoService.resolve_id(db, produto)
+        if produto_id is None:
+            return []
+
+        query = db.query(
+            SketchPreco.mes, SketchPreco.estado, SketchPreco.regiao_sigla,
+            SketchPreco.minimo, SketchPreco.maximo, SketchPreco.centroides
+        ).filter(SketchPreco.produto_id == produto_id)
+        if data_inicio:
+            query = query.filter(SketchPreco.mes >= SketchPrecoService.mes(data_inicio))
+        if data_fim:
+            query = query.filter(SketchPreco.mes <= data_fim)
+        if estado:
+            query = query.filter(SketchPreco.estado == estado.upper())
+
+        grupos = {}
+        for row in query.all():
+            inicio = None
+            if periodo == PeriodoPercentil.MES:
+                inicio = row.mes
+            elif periodo == PeriodoPercentil.ANO:
+                inicio = row.mes.replace(month=1)
+            chave = (getattr(row, agrupar_por.value) if agrupar_por else None, inicio)
+            grupos.setdefault(chave, []).append(TDigest.from_bytes(row.centroides, row.minimo, row.maximo))
+
+        nomes = [f"p{p:g}" for p in percentis]
+        quantis = [p / 100 for p in percentis]
+        itens = []
+        for (dimensao, inicio), digests in sorted(grupos.items(), key=lambda item: item[0]):
+            digest = TDigest.merge(digests)
+            item = {agrupar_por.value: dimensao} if agrupar_por else {}
+            item.update(
+                periodo=inicio,
+                quantidade=digest.quantidade,
+                minimo=digest.minimo,
+                maximo=digest.maximo,
+                percentis=dict(zip(nomes, digest.quantis(quantis).tolist())),
+            )
+            itens.append(item)
+        return itens
+
+    @staticmethod
+    def _serie_diaria(db: Session, produto_id: int, estado, municipios, data_inicio, data_fim) -> pd.DataFrame:
+        """
+        Quantidade e soma de valor_venda por dia, do agregado precos_diarios
+
+        Args:
+            municipios: Nomes de município aceitos (None para todos)
+
+        Returns:
+            Frame (quantidade, soma) indexado pela data
+        """
+        query = db.query(
+            type_coerce(PrecoDiario.data, String).label("data"),
+            func.sum(PrecoDiario.quantidade).label("quantidade"),
+            func.sum(PrecoDiario.soma).label("soma"),
+        ).filter(PrecoDiario.produto_id == produto_id)
+        if estado:
+            query = query.filter(PrecoDiario.estado == estado.upper())
+        if municipios is not None:
+            query = query.filter(PrecoDiario.municipio.in_(municipios))
+        if data_inicio:
+            query = query.filter(PrecoDiario.data >= data_inicio)
+        if data_fim:
+            query = query.filter(PrecoDiario.data <= data_fim)
+        rows = db.connection().execute(
+            query.group_by(PrecoDiario.data).order_by(PrecoDiario.data).statement
+        ).all()
+
+        frame = pd.DataFrame.from_records(rows, columns=["data", "quantidade", "soma"])
+        return frame[["quantidade", "soma"]].astype({"quantidade": "int64", "soma": "float64"}).set_axis(
+            pd.DatetimeIndex(pd.to_datetime(frame["data"], format="%Y-%m-%d"))
+        )
+
+    @staticmethod
+    def _medianas_coletas(db: Session, produto_id: int, regra: str, estado, municipio,
+                          data_inicio, data_fim) -> pd.Series:
+        """
+        Mediana exata por período, a partir das coletas individuais
+
+        Lê (data_coleta, valor_venda) em uma única varredura ordenada do
+        índice de cobertura ix_coletas_preco_produto_data_valor, limitada a
+        MAX_COLETAS_SERIE linhas, e agrupa com o resample do pandas.
+
+        Raises:
+            HTTPException 400 se o recorte passar de MAX_COLETAS_SERIE coletas
+        """
+        # Datas como texto ISO, convertidas de uma vez pelo pandas; a consulta
+        # roda no Core, sem o custo por linha do carregamento ORM
+        query = db.query(
+            type_coerce(ColetaPreco.data_coleta, String).label("data"), ColetaPreco.valor_venda
+        ).select_from(ColetaPreco).filter(ColetaPreco.produto_id == produto_id)
+        query = ColetaService._filter(db, query, estado, municipio, None, data_inicio, data_fim)
+        limite = EstatisticaService.MAX_COLETAS_SERIE
+        rows = db.connection().execute(
+            query.order_by(ColetaPreco.data_coleta).limit(limite + 1).statement
+        ).all()
+        if len(rows) > limite:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A mediana lê mais de {limite} coletas; restrinja o período ou a localidade, "
+                       "ou use a frequência mensal ou anual sem município"
+            )
+
+        frame = pd.DataFrame.from_records(rows, columns=["data", "valor"])
+        valores = frame["valor"].astype("float64").set_axis(
+            pd.DatetimeIndex(pd.to_datetime(frame["data"], format="%Y-%m-%d"))
+        )
+        return valores.resample(regra, label="left", closed="left").median()
+
+    @staticmethod
+    def _medianas_sketches(db: Session, produto_id: int, frequencia: FrequenciaSerie, estado,
+                           data_inicio, data_fim) -> pd.Series:
+        """
+        Mediana mensal ou anual estimada pela fusão dos sketches de quantis
+
+        Os meses inteiros do intervalo vêm de sketches_preco, pelo índice
+        ix_sketches_preco_produto_mes. Os meses cortados por data_inicio ou
+        data_fim (no máximo dois), que os sketches não separam, são
+        resumidos a partir das coletas do trecho pedido.
+        """
+        cortados = {}
+        for data in (data_inicio, data_fim):
+            if data:
+                mes = SketchPrecoService.mes(data)
+                fim_do_mes = (mes + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+                trecho = (max(mes, data_inicio or mes), min(fim_do_mes, data_fim or fim_do_mes))
+                if trecho != (mes, fim_do_mes):
+                    cortados[mes] = trecho
+
+        digests = {}
+        query = db.query(
+            SketchPreco.mes, SketchPreco.minimo, SketchPreco.maximo, SketchPreco.centroides
+        ).filter(SketchPreco.produto_id == produto_id)
+        if estado:
+            query = query.filter(SketchPreco.estado == estado.upper())
+        if data_inicio:
+            query = query.filter(SketchPreco.mes >= SketchPrecoService.mes(data_inicio))
+        if data_fim:
+            query = query.filter(SketchPreco.mes <= data_fim)
+        if cortados:
+            query = query.filter(SketchPreco.mes.notin_(list(cortados)))
+        for row in query.all():
+            digests.setdefault(row.mes, []).append(TDigest.from_bytes(row.centroides, row.minimo, row.maximo))
+
+        for mes, (inicio, fim) in cortados.items():
+            query = db.query(ColetaPreco.valor_venda).filter(ColetaPreco.produto_id == produto_id)
+            query = ColetaService._filter(db, query, estado, None, None, inicio, fim)
+            valores = [valor for (valor,) in db.connection().execute(query.statement)]
+            if valores:
+                digests[mes] = [TDigest.from_values(valores)]
+
+        periodos = {}
+        for mes, lista in digests.items():
+            inicio = mes if frequencia == FrequenciaSerie.MES else mes.replace(month=1)
+            periodos.setdefault(pd.Timestamp(inicio), []).extend(lista)
+        return pd.Series(
+            {inicio: TDigest.merge(lista).quantis([0.5])[0] for inicio, lista in periodos.items()},
+            dtype="float64",
+        ).sort_index()
+
+    @staticmethod
+    def get_serie(
+        db: Session,
+        produto_id: int,
+        frequencia: FrequenciaSerie = FrequenciaSerie.MES,
+        estado: Optional[str] = None,
+        municipio: Optional[str] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        preencher: bool = False
+    ) -> tuple[Produto, list[dict]]:
+        """
+        Série temporal reamostrada de valor_venda de um produto
+
+        Média e quantidade vêm do agregado diário precos_diarios (como em
+        get_estatisticas), agrupado por período com o resample do pandas.
+        A mediana mensal ou anual é estimada pelos sketches de quantis; a
+        semanal e a filtrada por município, que os sketches não separam,
+        são exatas e leem as coletas individuais. Os períodos sem coletas
+        entram na série com quantidade 0; com data_inicio e data_fim, a
+        série cobre todo o intervalo pedido.
+
+        Args:
+            preencher: Repete média e mediana do último período com coletas
+                nos períodos vazios (a quantidade continua 0)
+
+        Returns:
+            (produto, pontos da série em ordem cronológica)
+
+        Raises:
+            HTTPException 404 se o produto não existir
+            HTTPException 400 se a mediana exata passar de MAX_COLETAS_SERIE coletas
+        """
+        produto = ProdutoService.get_by_id(db, produto_id)
+        regra, periodo = EstatisticaService.FREQUENCIAS[frequencia]
+
+        municipios = None
+        if municipio:
+            # precos_diarios guarda o nome do município: a busca parcial e sem
+            # acentos é resolvida antes para os nomes das revendas que casam
+            municipios = [nome for (nome,) in db.query(Revenda.municipio).filter(
+                search_filter(Revenda.id, Revenda.municipio_busca, municipio)
+            ).distinct()]
+
+        diaria = EstatisticaService._serie_diaria(db, produto_id, estado, municipios, data_inicio, data_fim)
+        serie = diaria.resample(regra, label="left", closed="left").sum()
+        serie["media"] = serie["soma"] / serie["quantidade"].where(serie["quantidade"] > 0)
+        if frequencia == FrequenciaSerie.SEMANA or municipio:
+            medianas = EstatisticaService._medianas_coletas(
+                db, produto_id, regra, estado, municipio, data_inicio, data_fim
+            )
+        else:
+            medianas = EstatisticaService._medianas_sketches(
+                db, produto_id, frequencia, estado, data_inicio, data_fim
+            )
+        serie["mediana"] = medianas.reindex(serie.index)
+
+        if data_inicio and data_fim:
+            inicio = pd.Timestamp(data_inicio).to_period(periodo).start_time
+            serie = serie.reindex(pd.date_range(inicio, pd.Timestamp(data_fim), freq=regra))
+            serie["quantidade"] = serie["quantidade"].fillna(0)
+        if preencher:
+            serie[["media", "mediana"]] = serie[["media", "mediana"]].ffill()
+
+        pontos = pd.DataFrame({
+            "periodo": serie.index.date,
+            "media": serie["media"].to_numpy(),
+            "mediana": serie["mediana"].to_numpy(),
+            "quantidade": serie["quantidade"].astype("int64").to_numpy(),
+        })
+        return produto, pontos.astype(object).where(pontos.notna(), None).to_dict("records")
+
+    @staticmethod
+    def get_variacao(
+        db: Session,
+        produto: str,
+        agrupar_por: DimensaoVariacao,
+        base_inicio: date,
+        base_fim: date,
+        atual_inicio: date,
+        atual_fim: date,
+        estado: Optional[str] = None,
+        crescente: bool = False,
+        limit: int = 50
+    ) -> list:
+        """
+        Ranking da variação da média de valor_venda entre dois períodos
+
+        Uma única consulta: agregação condicional (SUM(CASE ...)) calcula
+        quantidade e soma de cada período por grupo em uma só passada e
+        RANK() ordena os grupos pela variação percentual. Por estado ou
+        município a passada é sobre o agregado diário precos_diarios; por
+        bandeira ou revenda, sobre coletas_preco. Só entram grupos com
+        coletas nos dois períodos.
+
+        Args:
+            crescente: Ordena das maiores quedas para as maiores altas
+
+        Returns:
+            Dicionários com os campos de VariacaoPreco, na ordem do ranking
+
+        Raises:
+            HTTPException 400 se algum período terminar antes de começar
+        """
+        if base_inicio > base_fim or atual_inicio > atual_fim:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Período inválido: a data inicial deve ser anterior à final"
+            )
+        produto_id = ProdutoService.resolve_id(db, produto)
+        if produto_id is None:
+            return []
+
+        if agrupar_por in (DimensaoVariacao.ESTADO, DimensaoVariacao.MUNICIPIO):
+            data, quantidade, valor = PrecoDiario.data, PrecoDiario.quantidade, PrecoDiario.soma
+            grupos = [PrecoDiario.estado.label("estado")]
+            if agrupar_por == DimensaoVariacao.MUNICIPIO:
+                grupos.append(PrecoDiario.municipio.label("municipio"))
+            query = db.query().select_from(PrecoDiario).filter(PrecoDiario.produto_id == produto_id)
+            if estado:
+                query = query.filter(PrecoDiario.estado == estado.upper())
+        else:
+            data, quantidade, valor = ColetaPreco.data_coleta, literal(1), ColetaPreco.valor_venda
+            if agrupar_por == DimensaoVariacao.BANDEIRA:
+                grupos = [Revenda.bandeira.label("bandeira")]
+            else:
+                grupos = [
+                    Revenda.id.label("revenda_id"),
+                    Revenda.nome.label("revenda_nome"),
+                    Revenda.municipio.label("municipio"),
+                    Revenda.estado.label("estado"),
+                ]
+            query = db.query().select_from(ColetaPreco).join(Revenda).filter(
+                ColetaPreco.produto_id == produto_id
+            )
+            if estado:
+                query = query.filter(Revenda.estado == estado.upper())
+
+        na_base = data.between(base_inicio, base_fim)
+        no_atual = data.between(atual_inicio, atual_fim)
+        quantidade_base = func.sum(case((na_base, quantidade), else_=0))
+        quantidade_atual = func.sum(case((no_atual, quantidade), else_=0))
+        periodos = query.with_entities(
+            *grupos,
+            quantidade_base.label("quantidade_base"),
+            quantidade_atual.label("quantidade_atual"),
+            (func.sum(case((na_base, valor), else_=0.0)) / quantidade_base).label("media_base"),
+            (func.sum(case((no_atual, valor), else_=0.0)) / quantidade_atual).label("media_atual"),
+        ).filter(or_(na_base, no_atual)).group_by(*grupos).having(
+            quantidade_base > 0, quantidade_atual > 0
+        ).subquery()
+
+        variacao_absoluta = periodos.c.media_atual - periodos.c.media_base
+        variacao_percentual = 100.0 * variacao_absoluta / periodos.c.media_base
+        ordem = variacao_percentual.asc() if crescente else variacao_percentual.desc()
+        posicao = func.rank().over(order_by=ordem).label("posicao")
+        rows = db.query(
+            posicao,
+            *[periodos.c[g.name] for g in grupos],
+            periodos.c.quantidade_base,
+            periodos.c.quantidade_atual,
+            periodos.c.media_base,
+            periodos.c.media_atual,
+            variacao_absoluta.label("variacao_absoluta"),
+            variacao_percentual.label("variacao_percentual"),
+        ).order_by(posicao, *[periodos.c[g.name] for g in grupos]).limit(limit).all()
+        return [row._asdict() for row in rows]
@@ -0,0 +1,94 @@
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from typing import Iterable
+from app.models import ColetaPreco, PrecoAtual
+
+
+class PrecoAtualService:
+    """
+    Manutenção do instantâneo preco_atual
+
+    Inserções de coletas fazem upsert da linha (revenda, produto) apenas se
+    a coleta for tão ou mais recente que o preço atual; alterações e
+    exclusões, que podem tornar outra coleta a mais recente, recalculam a
+    chave a partir do histórico. Como em PrecoDiarioService, os métodos
+    (exceto rebuild) não fazem commit.
+    """
+
+    COLUNAS = ("revenda_id", "produto_id", "data_coleta", "valor_venda", "valor_compra", "unidade_medida")
+
+    @staticmethod
+    def upsert(db: Session, registros: Iterable[dict]) -> None:
+        """
+        Registra coletas novas no instantâneo, com um único executemany
+
+        Args:
+            registros: Coletas com as chaves de COLUNAS; várias coletas da
+                mesma revenda e produto são reduzidas à mais recente
+        """
+        ultimas = {}
+        for registro in registros:
+            chave = (registro["revenda_id"], registro["produto_id"])
+            if chave not in ultimas or registro["data_coleta"] >= ultimas[chave]["data_coleta"]:
+                ultimas[chave] = {coluna: registro[coluna] for coluna in PrecoAtualService.COLUNAS}
+        if not ultimas:
+            return
+
+        stmt = sqlite_insert(PrecoAtual.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["revenda_id", "produto_id"],
+            set_={coluna: stmt.excluded[coluna] for coluna in PrecoAtualService.COLUNAS[2:]},
+            where=stmt.excluded.data_coleta >= PrecoAtual.data_coleta,
+        )
+        db.execute(stmt, list(ultimas.values()))
+
+    @staticmethod
+    def _ultima(*where):
+        """SELECT da coleta mais recente de cada (revenda, produto) no formato de preco_atual"""
+        ordem = func.row_number().over(
+            partition_by=(ColetaPreco.revenda_id, ColetaPreco.produto_id),
+            order_by=(ColetaPreco.data_coleta.desc(), ColetaPreco.id.desc())
+        ).label("ordem")
+        colunas = [getattr(ColetaPreco, coluna) for coluna in PrecoAtualService.COLUNAS]
+        recentes = select(*colunas, ordem).where(*where).subquery()
+        return select(*[recentes.c[coluna] for coluna in PrecoAtualService.COLUNAS]).where(recentes.c.ordem == 1)
+
+    @staticmethod
+    def refresh(db: Session, chaves: Iterable[tuple[int, int]]) -> None:
+        """
+        Recalcula o preço atual das chaves (revenda_id, produto_id) informadas
+
+        Cada chave lê só as coletas da revenda e produto pela chave natural
+        (revenda, produto, data); chaves sem coletas são removidas.
+        """
+        for revenda_id, produto_id in set(chaves):
+            db.execute(delete(PrecoAtual).where(
+                PrecoAtual.revenda_id == revenda_id, PrecoAtual.produto_id == produto_id
+            ))
+            db.execute(insert(PrecoAtual).from_select(PrecoAtualService.COLUNAS, PrecoAtualService._ultima(
+                ColetaPreco.revenda_id == revenda_id, ColetaPreco.produto_id == produto_id
+            )))
+
+    @staticmethod
+    def delete_revenda(db: Session, revenda_id: int) -> None:
+        """Remove os preços atuais de uma revenda (as coletas são removidas em cascata)"""
+        db.execute(delete(PrecoAtual).where(PrecoAtual.revenda_id == revenda_id))
+
+    @staticmethod
+    def delete_produto(db: Session, produto_id: int) -> None:
+        """Remove os preços atuais de um produto (as coletas são removidas em cascata)"""
+        db.execute(delete(PrecoAtual).where(PrecoAtual.produto_id == produto_id))
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Reconstrói todo o instantâneo a partir de coletas_preco e confirma
+
+        Returns:
+            Número de linhas do instantâneo
+        """
+        db.execute(delete(PrecoAtual))
+        db.execute(insert(PrecoAtual).from_select(PrecoAtualService.COLUNAS, PrecoAtualService._ultima()))
+        db.commit()
+        return db.query(func.count()).select_from(PrecoAtual).scalar()
@@ -0,0 +1,144 @@
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Iterable
+import pandas as pd
+from app.models import ColetaPreco, Revenda, PrecoDiario
+from app.utils.batch import IN_BATCH
+
+
+class PrecoDiarioService:
+    """
+    Manutenção do agregado diário precos_diarios
+
+    Inserções de coletas somam seus deltas (quantidade, somas, mínimo e
+    máximo) às linhas do agregado, sem reler o dia. Alterações e exclusões
+    recalculam as chaves (data_coleta, produto_id) afetadas, lendo apenas
+    as coletas daquele dia e produto pelo índice
+    ix_coletas_preco_produto_data_valor: um delta não desfaz mínimo e
+    máximo. Os métodos não fazem commit: a manutenção entra na mesma
+    transação da escrita que a originou.
+    """
+
+    COLUNAS = (
+        "data", "produto_id", "estado", "municipio", "regiao_sigla",
+        "quantidade", "soma", "soma_quadrados", "minimo", "maximo",
+    )
+
+    @staticmethod
+    def _agregado(*where):
+        """SELECT que agrega coletas_preco no formato de precos_diarios"""
+        valor = ColetaPreco.valor_venda
+        return (
+            select(
+                ColetaPreco.data_coleta, ColetaPreco.produto_id, Revenda.estado, Revenda.municipio,
+                func.max(Revenda.regiao_sigla), func.count(), func.sum(valor),
+                func.sum(valor * valor), func.min(valor), func.max(valor),
+            )
+            .join(Revenda, Revenda.id == ColetaPreco.revenda_id)
+            .where(*where)
+            .group_by(ColetaPreco.data_coleta, ColetaPreco.produto_id, Revenda.estado, Revenda.municipio)
+        )
+
+    @staticmethod
+    def add(db: Session, registros: Iterable[dict]) -> None:
+        """
+        Soma coletas novas ao agregado dos seus dias
+
+        As coletas são agrupadas por (data, produto, UF, município), com a
+        localidade vinda da revenda, e cada grupo é somado à linha gravada
+        por um upsert; linhas ainda inexistentes são criadas.
+
+        Args:
+            registros: Coletas com revenda_id, produto_id, data_coleta e
+                valor_venda que ainda não constam do agregado
+        """
+        frame = pd.DataFrame.from_records(
+            list(registros), columns=["revenda_id", "produto_id", "data_coleta", "valor_venda"]
+        )
+        if frame.empty:
+            return
+
+        revenda_ids = frame["revenda_id"].unique().tolist()
+        locais = []
+        for i in range(0, len(revenda_ids), IN_BATCH):
+            locais += db.execute(
+                select(Revenda.id, Revenda.estado, Revenda.municipio, Revenda.regiao_sigla)
+                .where(Revenda.id.in_(revenda_ids[i:i + IN_BATCH]))
+            ).all()
+        frame = frame.merge(
+            pd.DataFrame.from_records(locais, columns=["revenda_id", "estado", "municipio", "regiao_sigla"]),
+            on="revenda_id",
+        ).assign(
+            valor=lambda f: f["valor_venda"].astype("float64"),
+            valor_quadrado=lambda f: f["valor"] * f["valor"],
+        )
+        deltas = frame.groupby(["data_coleta", "produto_id", "estado", "municipio"], sort=False).agg(
+            regiao_sigla=("regiao_sigla", "max"),
+            quantidade=("valor", "size"),
+            soma=("valor", "sum"),
+            soma_quadrados=("valor_quadrado", "sum"),
+            minimo=("valor", "min"),
+            maximo=("valor", "max"),
+        ).reset_index().rename(columns={"data_coleta": "data"})
+
+        tabela = PrecoDiario.__table__
+        stmt = sqlite_insert(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["data", "produto_id", "estado", "municipio"],
+            set_={
+                "regiao_sigla": func.max(tabela.c.regiao_sigla, stmt.excluded.regiao_sigla),
+                "quantidade": tabela.c.quantidade + stmt.excluded.quantidade,
+                "soma": tabela.c.soma + stmt.excluded.soma,
+                "soma_quadrados": tabela.c.soma_quadrados + stmt.excluded.soma_quadrados,
+                "minimo": func.min(tabela.c.minimo, stmt.excluded.minimo),
+                "maximo": func.max(tabela.c.maximo, stmt.excluded.maximo),
+            },
+        )
+        db.execute(stmt, deltas.astype(object).to_dict("records"))
+
+    @staticmethod
+    def refresh(db: Session, chaves: Iterable[tuple[date, int]]) -> None:
+        """
+        Recalcula o agregado das chaves (data_coleta, produto_id) informadas
+
+        Chaves sem coletas restantes têm suas linhas removidas.
+        """
+        colunas = PrecoDiarioService.COLUNAS
+        for data, produto_id in set(chaves):
+            db.execute(delete(PrecoDiario).where(
+                PrecoDiario.data == data, PrecoDiario.produto_id == produto_id
+            ))
+            db.execute(insert(PrecoDiario).from_select(colunas, PrecoDiarioService._agregado(
+                ColetaPreco.data_coleta == data, ColetaPreco.produto_id == produto_id
+            )))
+
+    @staticmethod
+    def chaves_revenda(db: Session, revenda_id: int) -> list[tuple[date, int]]:
+        """Chaves (data_coleta, produto_id) com coletas da revenda"""
+        return db.execute(
+            select(ColetaPreco.data_coleta, ColetaPreco.produto_id)
+            .where(ColetaPreco.revenda_id == revenda_id)
+            .distinct()
+        ).tuples().all()
+
+    @staticmethod
+    def delete_produto(db: Session, produto_id: int) -> None:
+        """Remove o agregado de um produto (as coletas são removidas em cascata)"""
+        db.execute(delete(PrecoDiario).where(PrecoDiario.produto_id == produto_id))
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Reconstrói todo o agregado a partir de coletas_preco e confirma
+
+        Returns:
+            Número de linhas do agregado
+        """
+        db.execute(delete(PrecoDiario))
+        db.execute(insert(PrecoDiario).from_select(
+            PrecoDiarioService.COLUNAS, PrecoDiarioService._agregado()
+        ))
+        db.commit()
+        return db.query(func.count()).select_from(PrecoDiario).scalar()
@@ -1,7 +1,13 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from typing import Optional
 from app.models import Produto
 from app.schemas import ProdutoCreate, ProdutoUpdate
+from app.services.preco_diario_service import PrecoDiarioService
+from app.services.preco_atual_service import PrecoAtualService
+from app.services.sketch_preco_service import SketchPrecoService
+from app.utils.cache import query_cache
+from app.utils.batch import fetch_by_ids
 
 
 class ProdutoService:
@@ -12,6 +18,30 @@ class ProdutoService:
         """Lista todos os produtos"""
         return db.query(Produto).all()
     
+    @staticmethod
+    def get_id_map(db: Session) -> dict[str, int]:
+        """
+        Mapa nome -> id de todos os produtos, mantido em cache
+        
+        A tabela é pequena e muda pouco; o cache é invalidado pelas
+        escritas deste serviço (e expira pelo TTL para cargas externas).
+        """
+        return query_cache.get_or_set(
+            "produtos", "id_map", lambda: dict(db.query(Produto.nome, Produto.id).all())
+        )
+    
+    @staticmethod
+    def resolve_id(db: Session, nome: str) -> Optional[int]:
+        """Resolve o nome de um produto para o id, ou None se não existir"""
+        nome = nome.upper()
+        produto_id = ProdutoService.get_id_map(db).get(nome)
+        if produto_id is None:
+            # Produto criado fora da API (ex.: pelo loader) depois do cache
+            produto_id = db.query(Produto.id).filter(Produto.nome == nome).scalar()
+            if produto_id is not None:
+                query_cache.invalidate("produtos")
+        return produto_id
+    
     @staticmethod
     def get_by_id(db: Session, produto_id: int) -> Produto:
         """Busca produto por ID"""
@@ -23,6 +53,17 @@ class ProdutoService:
             )
         return produto
     
+    @staticmethod
+    def get_many(db: Session, ids: list[int]) -> tuple[list[Optional[Produto]], list[int]]:
+        """
+        Busca produtos por uma lista de ids com uma única consulta IN
+        
+        Returns:
+            (itens na ordem dos ids, com None para os não encontrados;
+            ids não encontrados)
+        """
+        return fetch_by_ids(db, Produto, ids)
+    
     @staticmethod
     def get_by_name(db: Session, nome: str) -> Produto:
         """Busca produto por nome"""
@@ -53,6 +94,7 @@ class ProdutoService:
         )
         db.add(db_produto)
         db.commit()
+        query_cache.invalidate("produtos")
         db.refresh(db_produto)
         
         return db_produto
@@ -70,6 +112,7 @@ class ProdutoService:
             setattr(produto, field, value)
         
         db.commit()
+        query_cache.invalidate("produtos", "coletas")
         db.refresh(produto)
         
         return produto
@@ -78,5 +121,9 @@ class ProdutoService:
     def delete(db: Session, produto_id: int) -> None:
         """Deleta um produto"""
         produto = ProdutoService.get_by_id(db, produto_id)
+        PrecoDiarioService.delete_produto(db, produto_id)
+        PrecoAtualService.delete_produto(db, produto_id)
+        SketchPrecoService.delete_produto(db, produto_id)
         db.delete(produto)
-        db.commit()
\ No newline at end of file
+        db.commit()
+        query_cache.invalidate("produtos", "coletas")
\ No newline at end of file
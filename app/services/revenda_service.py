@@ -1,8 +1,16 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from typing import Optional
-from app.models import Revenda
+from app.models import Revenda, Produto, PrecoAtual
 from app.schemas import RevendaCreate, RevendaUpdate
+from app.services.preco_diario_service import PrecoDiarioService
+from app.services.preco_atual_service import PrecoAtualService
+from app.services.sketch_preco_service import SketchPrecoService
+from app.utils.cache import query_cache
+from app.database.search import search_filter
+from app.utils.fields import project_columns
+from app.utils.pagination import IncludeTotal, encode_cursor, decode_cursor, count_total
+from app.utils.batch import fetch_by_ids
 
 
 class RevendaService:
@@ -15,22 +23,48 @@ class RevendaService:
         limit: int = 100,
         estado: Optional[str] = None,
         municipio: Optional[str] = None,
-        bandeira: Optional[str] = None
-    ) -> tuple[list[Revenda], int]:
-        """Lista revendas com filtros opcionais"""
-        query = db.query(Revenda)
+        bandeira: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: IncludeTotal = IncludeTotal.EXACT,
+        fields: Optional[list[str]] = None
+    ) -> tuple[list[Revenda], Optional[int], Optional[str]]:
+        """
+        Lista revendas com filtros opcionais
+        
+        Município e bandeira são buscados por substring, sem acentos, pelo
+        índice FTS5 (ver app.database.search). Ordena por id. Com cursor
+        (string vazia para a primeira página) a página começa após o último
+        id da página anterior, em vez de usar skip. O total segue
+        include_total (ver count_total). Com fields, a consulta projeta só
+        essas colunas (mais o id) e retorna linhas em vez de objetos ORM.
+        
+        Returns:
+            (revendas, total, cursor da próxima página ou None)
+        """
+        entities = project_columns(Revenda, fields, ("id",)) if fields else [Revenda]
+        query = db.query(*entities)
         
         if estado:
             query = query.filter(Revenda.estado == estado.upper())
         if municipio:
-            query = query.filter(Revenda.municipio.ilike(f"%{municipio}%"))
+            query = query.filter(search_filter(Revenda.id, Revenda.municipio_busca, municipio))
         if bandeira:
-            query = query.filter(Revenda.bandeira.ilike(f"%{bandeira}%"))
+            query = query.filter(search_filter(Revenda.id, Revenda.bandeira_busca, bandeira))
+        
+        total = count_total(query, include_total, "revendas", (estado, municipio, bandeira))
+        query = query.order_by(Revenda.id)
+        
+        if cursor is None:
+            return query.offset(skip).limit(limit).all(), total, None
         
-        total = query.count()
-        items = query.offset(skip).limit(limit).all()
+        if cursor:
+            ultimo_id, = decode_cursor(cursor, int)
+            query = query.filter(Revenda.id > ultimo_id)
+        items = query.limit(limit).all()
         
-        return items, total
+        next_cursor = encode_cursor(items[-1].id) if len(items) == limit else None
+        
+        return items, total, next_cursor
     
     @staticmethod
     def get_by_id(db: Session, revenda_id: int) -> Revenda:
@@ -43,6 +77,17 @@ class RevendaService:
             )
         return revenda
     
+    @staticmethod
+    def get_many(db: Session, ids: list[int]) -> tuple[list[Optional[Revenda]], list[int]]:
+        """
+        Busca revendas por uma lista de ids com uma única consulta IN
+        
+        Returns:
+            (itens na ordem dos ids, com None para os não encontrados;
+            ids não encontrados)
+        """
+        return fetch_by_ids(db, Revenda, ids)
+    
     @staticmethod
     def create(db: Session, revenda_data: RevendaCreate) -> Revenda:
         """Cria uma nova revenda"""
@@ -57,20 +102,58 @@ class RevendaService:
         db_revenda = Revenda(**revenda_data.model_dump())
         db.add(db_revenda)
         db.commit()
+        query_cache.invalidate("revendas")
         db.refresh(db_revenda)
         
         return db_revenda
     
+    @staticmethod
+    def get_precos(db: Session, revenda_id: int) -> list:
+        """
+        Preços atuais de todos os produtos de uma revenda
+        
+        Lê o instantâneo preco_atual pelo prefixo da chave primária
+        (revenda_id), sem percorrer o histórico de coletas.
+        
+        Returns:
+            Linhas com os campos de RevendaPreco, ordenadas pelo nome do produto
+        
+        Raises:
+            HTTPException 404 se a revenda não existir
+        """
+        RevendaService.get_by_id(db, revenda_id)
+        return db.query(
+            PrecoAtual.produto_id,
+            Produto.nome.label("produto_nome"),
+            PrecoAtual.data_coleta,
+            PrecoAtual.valor_venda,
+            PrecoAtual.valor_compra,
+            PrecoAtual.unidade_medida,
+        ).join(Produto, Produto.id == PrecoAtual.produto_id).filter(
+            PrecoAtual.revenda_id == revenda_id
+        ).order_by(Produto.nome).all()
+    
     @staticmethod
     def update(db: Session, revenda_id: int, revenda_data: RevendaUpdate) -> Revenda:
         """Atualiza uma revenda"""
         revenda = RevendaService.get_by_id(db, revenda_id)
         
         update_data = revenda_data.model_dump(exclude_unset=True)
+        localizacao = (revenda.estado, revenda.municipio, revenda.regiao_sigla)
         for field, value in update_data.items():
             setattr(revenda, field, value)
         
+        # O agregado diário é por UF e município e os sketches por UF:
+        # recalcula as chaves da revenda (nos sketches, na UF antiga e na nova)
+        if (revenda.estado, revenda.municipio, revenda.regiao_sigla) != localizacao:
+            db.flush()
+            PrecoDiarioService.refresh(db, PrecoDiarioService.chaves_revenda(db, revenda_id))
+            SketchPrecoService.refresh(db, SketchPrecoService.chaves_revenda(
+                db, revenda_id, [localizacao[0], revenda.estado]
+            ))
+        
         db.commit()
+        query_cache.invalidate("revendas", "coletas")
         db.refresh(revenda)
         
         return revenda
@@ -79,5 +162,12 @@ class RevendaService:
     def delete(db: Session, revenda_id: int) -> None:
         """Deleta uma revenda"""
         revenda = RevendaService.get_by_id(db, revenda_id)
+        chaves = PrecoDiarioService.chaves_revenda(db, revenda_id)
+        sketches = SketchPrecoService.chaves_revenda(db, revenda_id, [revenda.estado])
+        PrecoAtualService.delete_revenda(db, revenda_id)
         db.delete(revenda)
-        db.commit()
\ No newline at end of file
+        db.flush()
+        PrecoDiarioService.refresh(db, chaves)
+        SketchPrecoService.refresh(db, sketches)
+        db.commit()
+        query_cache.invalidate("revendas", "coletas")
\ No newline at end of file
@@ -0,0 +1,179 @@
+from sqlalchemy import select, delete, func, tuple_, type_coerce, Date, String
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Iterable
+import pandas as pd
+from app.models import ColetaPreco, Revenda, Produto, SketchPreco
+from app.utils.batch import IN_BATCH
+from app.utils.tdigest import TDigest
+
+
+class SketchPrecoService:
+    """
+    Manutenção dos sketches de quantis sketches_preco
+
+    Um t-digest de valor_venda por (mês, produto, estado). Inserções de
+    coletas fundem os valores novos ao sketch do mês; como um t-digest não
+    admite remoção, alterações e exclusões recalculam a chave a partir das
+    coletas do mês. Como em PrecoDiarioService, os métodos (exceto
+    rebuild) não fazem commit.
+    """
+
+    @staticmethod
+    def mes(data: date) -> date:
+        """Primeiro dia do mês da data (chave mes dos sketches)"""
+        return data.replace(day=1)
+
+    @staticmethod
+    def _valores(db: Session, *where) -> pd.DataFrame:
+        """Frame (mes, produto_id, estado, regiao_sigla, valor) das coletas filtradas"""
+        mes = type_coerce(func.date(ColetaPreco.data_coleta, "start of month"), String)
+        rows = db.connection().execute(
+            select(mes, ColetaPreco.produto_id, Revenda.estado, Revenda.regiao_sigla, ColetaPreco.valor_venda)
+            .join(Revenda, Revenda.id == ColetaPreco.revenda_id)
+            .where(*where)
+        ).all()
+        return pd.DataFrame.from_records(rows, columns=["mes", "produto_id", "estado", "regiao_sigla", "valor"])
+
+    @staticmethod
+    def _digests(frame: pd.DataFrame) -> dict:
+        """
+        Um digest por (mes, produto_id, estado) do frame
+
+        Args:
+            frame: Colunas mes (texto ISO), produto_id, estado, regiao_sigla e valor
+
+        Returns:
+            {(mes, produto_id, estado): (regiao_sigla, TDigest)}
+        """
+        digests = {}
+        for (mes, produto_id, estado), grupo in frame.groupby(["mes", "produto_id", "estado"], sort=False):
+            digests[(date.fromisoformat(mes), int(produto_id), estado)] = (
+                grupo["regiao_sigla"].max(), TDigest.from_values(grupo["valor"].to_numpy())
+            )
+        return digests
+
+    @staticmethod
+    def _gravar(db: Session, digests: dict) -> None:
+        """Insere ou substitui os sketches informados com um único executemany"""
+        if not digests:
+            return
+        stmt = sqlite_insert(SketchPreco.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["mes", "produto_id", "estado"],
+            set_={coluna: stmt.excluded[coluna]
+                  for coluna in ("regiao_sigla", "quantidade", "minimo", "maximo", "centroides")},
+        )
+        db.execute(stmt, [
+            {
+                "mes": mes, "produto_id": produto_id, "estado": estado, "regiao_sigla": regiao_sigla,
+                "quantidade": digest.quantidade, "minimo": digest.minimo, "maximo": digest.maximo,
+                "centroides": digest.to_bytes(),
+            }
+            for (mes, produto_id, estado), (regiao_sigla, digest) in digests.items()
+        ])
+
+    @staticmethod
+    def add(db: Session, registros: Iterable[dict]) -> None:
+        """
+        Funde coletas novas aos sketches dos seus meses
+
+        Os valores de cada (mês, produto, estado) viram um digest, fundido
+        ao sketch gravado; a UF vem da revenda de cada coleta.
+
+        Args:
+            registros: Coletas com revenda_id, produto_id, data_coleta e
+                valor_venda que ainda não constam dos sketches
+        """
+        frame = pd.DataFrame.from_records(
+            list(registros), columns=["revenda_id", "produto_id", "data_coleta", "valor_venda"]
+        )
+        if frame.empty:
+            return
+
+        revenda_ids = frame["revenda_id"].unique().tolist()
+        locais = []
+        for i in range(0, len(revenda_ids), IN_BATCH):
+            locais += db.execute(
+                select(Revenda.id, Revenda.estado, Revenda.regiao_sigla)
+                .where(Revenda.id.in_(revenda_ids[i:i + IN_BATCH]))
+            ).all()
+        frame = frame.merge(
+            pd.DataFrame.from_records(locais, columns=["revenda_id", "estado", "regiao_sigla"]), on="revenda_id"
+        ).assign(
+            mes=lambda f: pd.to_datetime(f["data_coleta"]).dt.strftime("%Y-%m-01"),
+            valor=lambda f: f["valor_venda"].astype("float64"),
+        )
+        digests = SketchPrecoService._digests(frame)
+
+        chaves = list(digests)
+        for i in range(0, len(chaves), IN_BATCH):
+            gravados = db.execute(
+                select(SketchPreco.mes, SketchPreco.produto_id, SketchPreco.estado,
+                       SketchPreco.minimo, SketchPreco.maximo, SketchPreco.centroides)
+                .where(tuple_(SketchPreco.mes, SketchPreco.produto_id, SketchPreco.estado)
+                       .in_(chaves[i:i + IN_BATCH]))
+            ).all()
+            for mes, produto_id, estado, minimo, maximo, centroides in gravados:
+                regiao_sigla, novo = digests[(mes, produto_id, estado)]
+                digests[(mes, produto_id, estado)] = (regiao_sigla, TDigest.merge(
+                    [TDigest.from_bytes(centroides, minimo, maximo), novo]
+                ))
+        SketchPrecoService._gravar(db, digests)
+
+    @staticmethod
+    def refresh(db: Session, chaves: Iterable[tuple[date, int, str]]) -> None:
+        """
+        Recalcula os sketches das chaves (mes, produto_id, estado) informadas
+
+        Cada chave lê as coletas do produto no mês pelo índice
+        ix_coletas_preco_produto_data_valor, filtrando a UF na revenda;
+        chaves sem coletas restantes são removidas.
+        """
+        for mes, produto_id, estado in set(chaves):
+            db.execute(delete(SketchPreco).where(
+                SketchPreco.mes == mes, SketchPreco.produto_id == produto_id, SketchPreco.estado == estado
+            ))
+            proximo = SketchPrecoService.mes(mes + timedelta(days=31))
+            SketchPrecoService._gravar(db, SketchPrecoService._digests(SketchPrecoService._valores(
+                db,
+                ColetaPreco.produto_id == produto_id,
+                ColetaPreco.data_coleta >= mes,
+                ColetaPreco.data_coleta < proximo,
+                Revenda.estado == estado,
+            )))
+
+    @staticmethod
+    def chaves_revenda(db: Session, revenda_id: int, estados: Iterable[str]) -> list[tuple[date, int, str]]:
+        """Chaves (mes, produto_id, estado) dos meses com coletas da revenda, para cada UF informada"""
+        meses = db.execute(
+            select(func.date(ColetaPreco.data_coleta, "start of month", type_=Date), ColetaPreco.produto_id)
+            .where(ColetaPreco.revenda_id == revenda_id)
+            .distinct()
+        ).tuples().all()
+        return [(mes, produto_id, estado) for mes, produto_id in meses for estado in set(estados)]
+
+    @staticmethod
+    def delete_produto(db: Session, produto_id: int) -> None:
+        """Remove os sketches de um produto (as coletas são removidas em cascata)"""
+        db.execute(delete(SketchPreco).where(SketchPreco.produto_id == produto_id))
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Reconstrói todos os sketches a partir de coletas_preco e confirma
+
+        As coletas são lidas um produto por vez, limitando a memória ao
+        histórico de um produto.
+
+        Returns:
+            Número de sketches
+        """
+        db.execute(delete(SketchPreco))
+        for produto_id in db.execute(select(Produto.id)).scalars().all():
+            SketchPrecoService._gravar(db, SketchPrecoService._digests(
+                SketchPrecoService._valores(db, ColetaPreco.produto_id == produto_id)
+            ))
+        db.commit()
+        return db.query(func.count()).select_from(SketchPreco).scalar()
@@ -9,6 +9,10 @@ from app.utils.dependencies import (
     get_current_active_user,
     require_admin
 )
+from app.utils.normalization import (
+    CSV_COLUMNS,
+    normalize_coletas
+)
 
 __all__ = [
     "verify_password",
@@ -17,5 +21,7 @@ __all__ = [
     "decode_access_token",
     "get_current_user",
     "get_current_active_user",
-    "require_admin"
+    "require_admin",
+    "CSV_COLUMNS",
+    "normalize_coletas"
 ]
\ No newline at end of file
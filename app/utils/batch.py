@@ -0,0 +1,29 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+
+# Valores por consulta IN: abaixo do limite de parâmetros do SQLite
+IN_BATCH = 500
+
+
+def fetch_by_ids(db: Session, model, ids: list[int]) -> tuple[list[Optional[object]], list[int]]:
+    """
+    Busca registros por id com consultas IN, preservando a ordem pedida
+
+    Args:
+        db: Sessão do banco
+        model: Modelo SQLAlchemy com coluna id
+        ids: Ids pedidos (podem se repetir)
+
+    Returns:
+        (registros na ordem de ids, com None onde o id não existe;
+        ids não encontrados, sem repetição)
+    """
+    unicos = list(dict.fromkeys(ids))
+    encontrados = {}
+    for i in range(0, len(unicos), IN_BATCH):
+        lote = unicos[i:i + IN_BATCH]
+        encontrados.update((obj.id, obj) for obj in db.query(model).filter(model.id.in_(lote)))
+
+    items = [encontrados.get(id_) for id_ in ids]
+    not_found = [id_ for id_ in unicos if id_ not in encontrados]
+    return items, not_found
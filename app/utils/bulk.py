@@ -0,0 +1,77 @@
+import csv
+import json
+from typing import AsyncIterator, Union
+
+# Tipos de conteúdo aceitos nas cargas em lote
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Converte um corpo recebido em pedaços em linhas de texto, sem bufferizar tudo
+
+    Args:
+        stream: Iterador assíncrono de bytes (ex.: request.stream())
+
+    Yields:
+        Linhas decodificadas em UTF-8, sem o terminador
+    """
+    pending = b""
+    async for chunk in stream:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8")
+    if pending:
+        yield pending.rstrip(b"\r").decode("utf-8")
+
+
+async def iter_records(
+    stream: AsyncIterator[bytes],
+    content_type: str
+) -> AsyncIterator[tuple[int, Union[dict, str]]]:
+    """
+    Lê registros de um corpo NDJSON ou CSV enviado em streaming
+
+    No CSV, a primeira linha é o cabeçalho com os nomes dos campos e o
+    separador (vírgula ou ponto e vírgula) é detectado a partir dele.
+    Campos vazios viram None.
+
+    Yields:
+        (número da linha, registro) ou (número da linha, mensagem de erro)
+        quando a linha não pode ser interpretada
+    """
+    is_csv = content_type in CSV_TYPES
+    header = None
+    delimiter = ","
+
+    numero = 0
+    async for line in iter_lines(stream):
+        numero += 1
+        if not line.strip():
+            continue
+
+        if not is_csv:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield numero, f"JSON inválido: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield numero, "Cada linha deve ser um objeto JSON"
+                continue
+            yield numero, record
+            continue
+
+        if header is None:
+            if ";" in line and "," not in line:
+                delimiter = ";"
+            header = [field.strip() for field in next(csv.reader([line], delimiter=delimiter))]
+            continue
+
+        values = next(csv.reader([line], delimiter=delimiter))
+        if len(values) != len(header):
+            yield numero, f"Esperados {len(header)} campos, recebidos {len(values)}"
+            continue
+        yield numero, {key: (value if value.strip() else None) for key, value in zip(header, values)}
@@ -0,0 +1,75 @@
+"""
+Cache em memória de resultados de consultas, invalidado por escrita
+
+Cada entrada pertence a um namespace (ex.: "coletas"). Os serviços chamam
+invalidate(namespace) após gravar, o que incrementa a versão do namespace
+e torna obsoletas todas as entradas anteriores. Como escritas feitas por
+outros processos (ex.: o loader) não passam por aqui, as entradas também
+expiram após um TTL.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+from app.config import settings
+
+
+class QueryCache:
+    """Cache LRU com versão por namespace e expiração por tempo"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._lock = Lock()
+
+    def version(self, namespace: str) -> int:
+        """Versão atual do namespace (muda a cada invalidação)"""
+        return self._versions.get(namespace, 0)
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Descarta as entradas dos namespaces informados"""
+        with self._lock:
+            for namespace in namespaces:
+                self._versions[namespace] = self.version(namespace) + 1
+
+    def get(self, namespace: str, key: Hashable) -> Any:
+        """Retorna o valor em cache ou None se ausente, expirado ou invalidado"""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            version, stored_at, value = entry
+            if version != self.version(namespace) or time.monotonic() - stored_at > self.ttl:
+                del self._entries[(namespace, key)]
+                return None
+            self._entries.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, version: int = None) -> None:
+        """
+        Grava um valor na versão do namespace
+
+        Passe a versão lida antes de calcular o valor: se houver uma escrita
+        no meio do cálculo, o valor já nasce invalidado.
+        """
+        with self._lock:
+            if version is None:
+                version = self.version(namespace)
+            self._entries[(namespace, key)] = (version, time.monotonic(), value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, namespace: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Retorna o valor em cache ou calcula, grava e retorna"""
+        value = self.get(namespace, key)
+        if value is None:
+            version = self.version(namespace)
+            value = compute()
+            self.set(namespace, key, value, version)
+        return value
+
+
+query_cache = QueryCache(ttl=settings.QUERY_CACHE_TTL_SECONDS)
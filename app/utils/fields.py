@@ -0,0 +1,63 @@
+"""
+Sparse fieldsets: listagens com apenas os campos pedidos em ?fields=
+
+O serviço consulta só as colunas pedidas (sem carregar objetos ORM) e a
+resposta serializa só esses campos, reduzindo consulta, CPU de
+serialização e tamanho do payload.
+"""
+from typing import Iterable, Optional
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def parse_fields(fields: Optional[str], schema: type[BaseModel]) -> Optional[list[str]]:
+    """
+    Valida o parâmetro fields ("a,b,c") contra os campos do schema de resposta
+
+    Returns:
+        Campos pedidos, sem repetição e na ordem informada, ou None se
+        fields não foi enviado
+
+    Raises:
+        HTTPException 400 se algum campo não existir
+    """
+    if fields is None:
+        return None
+    campos = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    invalidos = [f for f in campos if f not in schema.model_fields]
+    if not campos or invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos: {', '.join(invalidos) or fields!r}. "
+                   f"Disponíveis: {', '.join(schema.model_fields)}"
+        )
+    return campos
+
+
+def project_columns(model, fields: list[str], keys: Iterable[str] = ()) -> list:
+    """
+    Colunas do modelo para os campos pedidos mais as chaves de paginação
+
+    Args:
+        model: Modelo SQLAlchemy
+        fields: Campos pedidos (já validados por parse_fields)
+        keys: Colunas sempre necessárias (ex.: chave do cursor)
+    """
+    return [getattr(model, name) for name in dict.fromkeys([*fields, *keys])]
+
+
+def sparse_response(items: list, fields: list[str], **meta) -> JSONResponse:
+    """
+    Resposta de listagem com apenas os campos pedidos em cada item
+
+    Args:
+        items: Linhas retornadas pela consulta projetada
+        fields: Campos a incluir em cada item
+        meta: Demais chaves da listagem (total, skip, limit, next_cursor)
+    """
+    return JSONResponse(jsonable_encoder({
+        "items": [{name: getattr(row, name) for name in fields} for row in items],
+        **meta
+    }))
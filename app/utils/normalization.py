@@ -0,0 +1,136 @@
+"""
+Normalização vetorizada dos dados de coletas da ANP
+
+Todas as funções operam sobre colunas inteiras (pandas/NumPy) em vez de
+linha a linha, para que a carga de arquivos com milhões de registros
+gaste seu tempo em operações vetoriais.
+"""
+import pandas as pd
+
+# Colunas do CSV da ANP -> nomes internos
+CSV_COLUMNS = {
+    'Data da Coleta': 'data_coleta',
+    'Produto': 'produto',
+    'CNPJ da Revenda': 'cnpj',
+    'Revenda': 'nome',
+    'Nome da Revenda': 'nome',
+    'Município': 'municipio',
+    'Municipio': 'municipio',
+    'Estado': 'estado',
+    'Estado - Sigla': 'estado',
+    'Região Sigla': 'regiao_sigla',
+    'Regiao - Sigla': 'regiao_sigla',
+    'Bandeira': 'bandeira',
+    'Valor de Venda': 'valor_venda',
+    'Valor de Compra': 'valor_compra',
+    'Unidade de Medida': 'unidade_medida',
+}
+
+# Colunas do DataFrame normalizado, na ordem em que são produzidas
+NORMALIZED_COLUMNS = [
+    'cnpj', 'nome', 'municipio', 'estado', 'regiao_sigla', 'bandeira',
+    'produto', 'data_coleta', 'valor_venda', 'valor_compra', 'unidade_medida'
+]
+
+_CNPJ_PATTERN = r'^(\d{2})(\d{3})(\d{3})(\d{4})(\d{2})$'
+
+
+def normalize_cnpj(values: pd.Series) -> pd.Series:
+    """
+    Normaliza CNPJs para o formato XX.XXX.XXX/XXXX-XX
+
+    Mantém apenas os dígitos; valores que não têm 14 dígitos viram nulos.
+    """
+    digits = values.astype('string').str.replace(r'\D', '', regex=True)
+    digits = digits.where(digits.str.len() == 14)
+    return digits.str.replace(_CNPJ_PATTERN, r'\1.\2.\3/\4-\5', regex=True)
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Converte datas no formato dd/mm/aaaa (padrão da ANP) para datetime64
+
+    Valores em ISO (aaaa-mm-dd) também são aceitos; o restante vira NaT.
+    """
+    values = values.astype('string').str.strip()
+    parsed = pd.to_datetime(values, format='%d/%m/%Y', errors='coerce')
+    missing = parsed.isna() & values.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(values[missing], format='%Y-%m-%d', errors='coerce')
+    return parsed
+
+
+def parse_decimal(values: pd.Series) -> pd.Series:
+    """
+    Converte valores monetários com vírgula decimal ("1.234,56") para float
+
+    Valores sem vírgula são lidos com ponto decimal; inválidos viram NaN.
+    """
+    values = values.astype('string').str.strip()
+    comma = values.str.contains(',', regex=False, na=False)
+    values = values.where(
+        ~comma,
+        values.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    )
+    return pd.to_numeric(values, errors='coerce').astype('float64')
+
+
+def clean_text(values: pd.Series, size: int, upper: bool = False) -> pd.Series:
+    """Remove espaços, trunca em size caracteres e opcionalmente converte para maiúsculas"""
+    values = values.astype('string').str.strip().str[:size]
+    if upper:
+        values = values.str.upper()
+    return values.mask(values == '')
+
+
+def normalize_coletas(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Normaliza um bloco de coletas com nomes de coluna internos (ver CSV_COLUMNS)
+
+    Args:
+        df: DataFrame com as colunas do CSV já renomeadas
+
+    Returns:
+        (normalizadas, rejeitadas). As rejeitadas mantêm as colunas
+        originais, o índice da linha e o motivo da rejeição na coluna
+        'motivo'.
+    """
+    def column(name: str) -> pd.Series:
+        if name in df:
+            return df[name]
+        return pd.Series(pd.NA, index=df.index, dtype='string')
+
+    out = pd.DataFrame({
+        'cnpj': normalize_cnpj(column('cnpj')),
+        'nome': clean_text(column('nome'), 200).fillna('N/A'),
+        'municipio': clean_text(column('municipio'), 100, upper=True),
+        'estado': clean_text(column('estado'), 2, upper=True),
+        'regiao_sigla': clean_text(column('regiao_sigla'), 2, upper=True),
+        'bandeira': clean_text(column('bandeira'), 100, upper=True),
+        'produto': clean_text(column('produto'), 50, upper=True),
+        'data_coleta': parse_dates(column('data_coleta')),
+        'valor_venda': parse_decimal(column('valor_venda')),
+        'valor_compra': parse_decimal(column('valor_compra')),
+        'unidade_medida': clean_text(column('unidade_medida'), 10).fillna('R$/litro'),
+    }, index=df.index)
+
+    # Valor de compra não positivo é tratado como ausente, não como erro
+    out['valor_compra'] = out['valor_compra'].where(out['valor_compra'] > 0)
+
+    # Motivos na ordem de prioridade: vale o primeiro que falhar
+    checks = [
+        ('cnpj_invalido', out['cnpj'].isna()),
+        ('produto_ausente', out['produto'].isna()),
+        ('data_invalida', out['data_coleta'].isna()),
+        ('valor_venda_invalido', ~(out['valor_venda'] > 0)),
+        ('estado_invalido', ~out['estado'].str.fullmatch(r'[A-Z]{2}').fillna(False).astype(bool)),
+        ('municipio_ausente', out['municipio'].isna()),
+        ('regiao_invalida', ~out['regiao_sigla'].str.fullmatch(r'[A-Z]{1,2}').fillna(False).astype(bool)),
+    ]
+    motivo = pd.Series(pd.NA, index=df.index, dtype='string')
+    for nome, failed in reversed(checks):
+        motivo = motivo.mask(failed, nome)
+
+    rejected = motivo.notna()
+    rejeitadas = df[rejected].assign(motivo=motivo[rejected])
+    return out[~rejected], rejeitadas
@@ -0,0 +1,99 @@
+"""
+Paginação por cursor (keyset)
+
+Em vez de OFFSET, que obriga o banco a percorrer e descartar todas as
+linhas das páginas anteriores, a próxima página é buscada a partir da
+chave de ordenação do último item retornado. O cliente recebe essa chave
+como um cursor opaco e o devolve no parâmetro `cursor`.
+"""
+import base64
+import enum
+import json
+from datetime import date
+from typing import Any, Hashable, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Query
+from app.utils.cache import query_cache
+
+
+class IncludeTotal(str, enum.Enum):
+    """Como calcular o total de uma listagem"""
+    OFF = "off"
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Codifica a chave de ordenação do último item de uma página
+
+    Args:
+        values: Valores da chave, na ordem da ordenação (datas viram ISO)
+
+    Returns:
+        Cursor opaco, seguro para uso em URLs
+    """
+    payload = [v.isoformat() if isinstance(v, date) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Decodifica um cursor gerado por encode_cursor
+
+    Args:
+        cursor: Cursor recebido do cliente
+        types: Tipo esperado de cada valor da chave (date ou int)
+
+    Returns:
+        Valores da chave convertidos para os tipos pedidos
+
+    Raises:
+        HTTPException 400 se o cursor for inválido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError
+        values = []
+        for value, kind in zip(payload, types):
+            if kind is date:
+                values.append(date.fromisoformat(value))
+            elif isinstance(value, kind) and not isinstance(value, bool):
+                values.append(value)
+            else:
+                raise ValueError
+        return tuple(values)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+
+def count_total(query: Query, include_total: IncludeTotal, namespace: str, key: Hashable) -> Optional[int]:
+    """
+    Conta os registros de uma listagem conforme include_total
+
+    - off: não conta (None)
+    - exact: executa o COUNT(*) e atualiza o cache
+    - estimated: usa a contagem em cache para os mesmos filtros, que é
+      invalidada por escritas no namespace; conta apenas se não houver
+
+    Args:
+        query: Consulta filtrada, sem ordenação nem paginação
+        include_total: Modo de contagem
+        namespace: Namespace do cache invalidado pelas escritas
+        key: Filtros da consulta (identificam a contagem no cache)
+    """
+    if include_total == IncludeTotal.OFF:
+        return None
+    if include_total == IncludeTotal.ESTIMATED:
+        return query_cache.get_or_set(namespace, ("count", key), query.count)
+
+    version = query_cache.version(namespace)
+    total = query.count()
+    query_cache.set(namespace, ("count", key), total, version)
+    return total
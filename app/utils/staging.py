@@ -0,0 +1,127 @@
+"""
+Cache de staging em Parquet para os CSVs da ANP
+
+Cada CSV bruto é convertido uma única vez para Parquet tipado e comprimido,
+já normalizado (ver app.utils.normalization). Cargas, recargas e análises
+offline leem desse arquivo apenas as colunas de que precisam, sem repetir
+o parsing do CSV.
+"""
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.utils.normalization import CSV_COLUMNS, NORMALIZED_COLUMNS, normalize_coletas
+
+_TEXT = pa.string()
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# CNPJ e nome como texto; colunas de baixa cardinalidade dicionarizadas
+PARQUET_SCHEMA = pa.schema([
+    ('cnpj', _TEXT),
+    ('nome', _TEXT),
+    ('municipio', _CATEGORY),
+    ('estado', _CATEGORY),
+    ('regiao_sigla', _CATEGORY),
+    ('bandeira', _CATEGORY),
+    ('produto', _CATEGORY),
+    ('data_coleta', pa.date32()),
+    ('valor_venda', pa.float64()),
+    ('valor_compra', pa.float64()),
+    ('unidade_medida', _CATEGORY),
+])
+
+PARQUET_COMPRESSION = 'zstd'
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """Converte um bloco normalizado para uma tabela Arrow no esquema de staging"""
+    df = df[NORMALIZED_COLUMNS].assign(data_coleta=df['data_coleta'].dt.date)
+    return pa.Table.from_pandas(df, schema=PARQUET_SCHEMA, preserve_index=False)
+
+
+def stage_csv(csv_path: str, parquet_path: str, chunksize: int = 100_000, monitor=None) -> dict:
+    """
+    Converte um CSV da ANP em Parquet normalizado, bloco a bloco
+
+    Linhas rejeitadas na normalização não vão para o staging: com monitor,
+    cada bloco é registrado em monitor.add_chunk (como no loader) e as
+    rejeitadas seguem para a quarentena com o número da linha no CSV. O
+    arquivo é escrito em um caminho temporário e renomeado ao final, de
+    modo que um Parquet parcial nunca é confundido com um staging completo.
+
+    Args:
+        monitor: LoadMonitor (scripts/load_monitor.py) ou outro objeto com
+            o mesmo add_chunk
+
+    Returns:
+        Contagens de linhas lidas, gravadas e rejeitadas
+    """
+    target = Path(parquet_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(target.suffix + '.tmp')
+
+    stats = {'linhas_lidas': 0, 'linhas_gravadas': 0, 'linhas_rejeitadas': 0}
+    reader = pd.read_csv(csv_path, sep=';', encoding='utf-8', dtype=str, chunksize=chunksize)
+
+    with pq.ParquetWriter(tmp, PARQUET_SCHEMA, compression=PARQUET_COMPRESSION) as writer:
+        while True:
+            inicio = time.perf_counter()
+            chunk = next(reader, None)
+            if chunk is None:
+                break
+            lido = time.perf_counter()
+            df, rejeitadas = normalize_coletas(chunk.rename(columns=CSV_COLUMNS))
+            normalizado = time.perf_counter()
+            writer.write_table(to_arrow_table(df), row_group_size=chunksize)
+            stats['linhas_lidas'] += len(chunk)
+            stats['linhas_gravadas'] += len(df)
+            stats['linhas_rejeitadas'] += len(rejeitadas)
+
+            if monitor is not None:
+                # Linha 1 é o cabeçalho; o índice do pandas segue entre os blocos
+                rejeitadas.insert(0, 'linha', rejeitadas.index + 2)
+                monitor.add_chunk(csv_path, len(chunk), len(df), rejeitadas, {
+                    'leitura': lido - inicio,
+                    'normalizacao': normalizado - lido,
+                    'gravacao': time.perf_counter() - normalizado,
+                })
+
+    tmp.replace(target)
+    return stats
+
+
+def read_parquet_chunks(parquet_path: str, chunksize: int, columns: Optional[list[str]] = None,
+                        skip_chunks: int = 0, limit: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lê um Parquet de staging em blocos, apenas com as colunas pedidas
+
+    Os blocos têm o mesmo formato de normalize_coletas: data_coleta como
+    datetime64 e colunas dicionarizadas como categóricas.
+    """
+    parquet = pq.ParquetFile(parquet_path)
+    lidas = 0
+    for i, batch in enumerate(parquet.iter_batches(batch_size=chunksize, columns=columns)):
+        if i < skip_chunks:
+            continue
+        df = batch.to_pandas(date_as_object=False)
+        if limit is not None:
+            df = df.head(limit - lidas)
+        lidas += len(df)
+        yield df
+        if limit is not None and lidas >= limit:
+            break
+
+
+def read_staged(path: str, columns: list[str], filters: Optional[list] = None) -> pd.DataFrame:
+    """
+    Lê um ou mais Parquets de staging para análise offline
+
+    Args:
+        path: Arquivo ou diretório de staging
+        columns: Colunas a ler (as demais não saem do disco)
+        filters: Filtros do pyarrow aplicados na leitura,
+            ex.: [('estado', '==', 'SP'), ('produto', '==', 'GASOLINA')]
+    """
+    return pd.read_parquet(path, columns=columns, filters=filters)
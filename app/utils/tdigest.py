@@ -0,0 +1,98 @@
+"""
+t-digest: resumo mergeável de uma distribuição para estimar quantis
+
+Guarda a distribuição como centróides (média, peso) ordenados. A função
+de escala k(q) = δ/(2π)·asin(2q − 1) limita cada centróide a uma unidade
+de k, de modo que os centróides são pequenos nas caudas e maiores no
+meio: com δ = COMPRESSAO = 200 são no máximo ~100 centróides (1,6 KB),
+independentemente do número de valores resumidos.
+
+Limite de erro: a largura de um centróide em posto (rank) é de até
+2π·√(q(1 − q))/δ, e o quantil estimado por interpolação entre centróides
+vizinhos erra em posto no máximo isso, ou seja ≈1,6% na mediana, ≈0,9% em
+p10/p90 e ≈0,3% em p99 com δ = 200. Fundir digests (merge) recomprime o
+resultado com a mesma função de escala, mas não há garantia formal de que
+fusões repetidas preservem o limite: tests/test_tdigest.py confere que,
+fundindo centenas de blocos um a um (como fazem o loader e a API), o erro
+em posto fica dentro dele.
+"""
+import numpy as np
+
+COMPRESSAO = 200
+
+
+class TDigest:
+    """Centróides ordenados por média, com mínimo e máximo exatos"""
+
+    __slots__ = ("medias", "pesos", "minimo", "maximo")
+
+    def __init__(self, medias: np.ndarray, pesos: np.ndarray, minimo: float, maximo: float):
+        self.medias = medias
+        self.pesos = pesos
+        self.minimo = minimo
+        self.maximo = maximo
+
+    @property
+    def quantidade(self) -> int:
+        """Número de valores resumidos"""
+        return int(round(self.pesos.sum()))
+
+    @classmethod
+    def from_values(cls, valores, compressao: int = COMPRESSAO) -> "TDigest":
+        """Digest de um conjunto (não vazio) de valores"""
+        valores = np.sort(np.asarray(valores, dtype="float64"))
+        return cls._comprimir(valores, np.ones_like(valores), valores[0], valores[-1], compressao)
+
+    @classmethod
+    def merge(cls, digests, compressao: int = COMPRESSAO) -> "TDigest":
+        """Funde digests (não vazios) em um só, como se resumisse todos os valores"""
+        digests = list(digests)
+        medias = np.concatenate([d.medias for d in digests])
+        pesos = np.concatenate([d.pesos for d in digests])
+        ordem = np.argsort(medias, kind="stable")
+        return cls._comprimir(
+            medias[ordem], pesos[ordem],
+            min(d.minimo for d in digests), max(d.maximo for d in digests), compressao
+        )
+
+    @classmethod
+    def _comprimir(cls, medias, pesos, minimo, maximo, compressao) -> "TDigest":
+        """
+        Agrupa centróides ordenados pela unidade de k do seu posto central
+
+        Centróides consecutivos com o mesmo floor(k(q)) viram um só, com a
+        média ponderada; tudo vetorizado, sem laço por valor.
+        """
+        acumulado = np.cumsum(pesos)
+        q = (acumulado - pesos / 2) / acumulado[-1]
+        k = np.floor(compressao / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1.0, 1.0)))
+        inicios = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        pesos_grupo = np.add.reduceat(pesos, inicios)
+        medias_grupo = np.add.reduceat(medias * pesos, inicios) / pesos_grupo
+        return cls(medias_grupo, pesos_grupo, float(minimo), float(maximo))
+
+    def quantis(self, qs) -> np.ndarray:
+        """
+        Estima os quantis qs (entre 0 e 1)
+
+        Interpola linearmente entre os postos centrais dos centróides,
+        ancorando as pontas no mínimo e no máximo.
+        """
+        acumulado = np.cumsum(self.pesos)
+        total = acumulado[-1]
+        centros = acumulado - self.pesos / 2
+        return np.interp(
+            np.asarray(qs, dtype="float64") * total,
+            np.r_[0.0, centros, total],
+            np.r_[self.minimo, self.medias, self.maximo],
+        )
+
+    def to_bytes(self) -> bytes:
+        """Centróides como pares (média, peso) float64 little-endian"""
+        return np.column_stack([self.medias, self.pesos]).astype("<f8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, dados: bytes, minimo: float, maximo: float) -> "TDigest":
+        """Reconstrói um digest gravado com to_bytes"""
+        centroides = np.frombuffer(dados, dtype="<f8").reshape(-1, 2)
+        return cls(centroides[:, 0], centroides[:, 1], minimo, maximo)
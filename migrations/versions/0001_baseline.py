@@ -0,0 +1,90 @@
+"""Schema inicial (tabelas criadas até então por Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('produtos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.Column('descricao', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_produtos_id', 'produtos', ['id'], unique=False)
+    op.create_index('ix_produtos_nome', 'produtos', ['nome'], unique=True)
+
+    op.create_table('revendas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cnpj', sa.String(length=18), nullable=False),
+    sa.Column('nome', sa.String(length=200), nullable=False),
+    sa.Column('municipio', sa.String(length=100), nullable=False),
+    sa.Column('estado', sa.String(length=2), nullable=False),
+    sa.Column('regiao_sigla', sa.String(length=2), nullable=False),
+    sa.Column('bandeira', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_revendas_cnpj', 'revendas', ['cnpj'], unique=True)
+    op.create_index('ix_revendas_estado', 'revendas', ['estado'], unique=False)
+    op.create_index('ix_revendas_id', 'revendas', ['id'], unique=False)
+    op.create_index('ix_revendas_municipio', 'revendas', ['municipio'], unique=False)
+    op.create_index('ix_revendas_regiao_sigla', 'revendas', ['regiao_sigla'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'LEITOR', name='userrole'), nullable=False),
+    sa.Column('is_active', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table('coletas_preco',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('data_coleta', sa.Date(), nullable=False),
+    sa.Column('valor_venda', sa.Float(), nullable=False),
+    sa.Column('valor_compra', sa.Float(), nullable=True),
+    sa.Column('unidade_medida', sa.String(length=10), nullable=False),
+    sa.Column('revenda_id', sa.Integer(), nullable=False),
+    sa.Column('produto_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['produto_id'], ['produtos.id'], ),
+    sa.ForeignKeyConstraint(['revenda_id'], ['revendas.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_coletas_preco_data_coleta', 'coletas_preco', ['data_coleta'], unique=False)
+    op.create_index('ix_coletas_preco_id', 'coletas_preco', ['id'], unique=False)
+    op.create_index('ix_coletas_preco_produto_id', 'coletas_preco', ['produto_id'], unique=False)
+    op.create_index('ix_coletas_preco_revenda_id', 'coletas_preco', ['revenda_id'], unique=False)
+
+
+def downgrade() -> None:
+    # Os índices são removidos junto com as tabelas
+    op.drop_table('coletas_preco')
+    op.drop_table('users')
+    op.drop_table('revendas')
+    op.drop_table('produtos')
@@ -0,0 +1,65 @@
+"""Manifesto de ingestão e chave natural das coletas
+
+Cria a tabela ingestao_arquivos e a restrição única
+uq_coleta_revenda_produto_data em coletas_preco (revenda, produto, data),
+usada pelo upsert do loader. Coletas duplicadas pela chave natural são
+removidas antes, mantendo a de menor id. Bancos criados por create_all
+depois do manifesto já têm os dois e são mantidos como estão.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHAVE_NATURAL = 'uq_coleta_revenda_produto_data'
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('ingestao_arquivos'):
+        op.create_table('ingestao_arquivos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('arquivo', sa.String(length=500), nullable=False),
+        sa.Column('hash_sha256', sa.String(length=64), nullable=False),
+        sa.Column('tamanho_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('status', sa.Enum('EM_ANDAMENTO', 'CONCLUIDO', 'FALHOU', name='statusingestao'), nullable=False),
+        sa.Column('chunksize', sa.Integer(), nullable=False),
+        sa.Column('blocos_gravados', sa.Integer(), nullable=False),
+        sa.Column('linhas_lidas', sa.BigInteger(), nullable=False),
+        sa.Column('linhas_carregadas', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_ingestao_arquivos_hash_sha256', 'ingestao_arquivos', ['hash_sha256'], unique=True)
+        op.create_index('ix_ingestao_arquivos_id', 'ingestao_arquivos', ['id'], unique=False)
+
+    if CHAVE_NATURAL not in {uq['name'] for uq in inspector.get_unique_constraints('coletas_preco')}:
+        op.execute("""
+            DELETE FROM coletas_preco WHERE id NOT IN (
+                SELECT MIN(id) FROM coletas_preco GROUP BY revenda_id, produto_id, data_coleta
+            )
+        """)
+        # SQLite não adiciona restrições a tabelas existentes: o batch recria a tabela
+        with op.batch_alter_table('coletas_preco', recreate='always') as batch_op:
+            batch_op.create_unique_constraint(CHAVE_NATURAL, ['revenda_id', 'produto_id', 'data_coleta'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('coletas_preco', recreate='always') as batch_op:
+        batch_op.drop_constraint(CHAVE_NATURAL, type_='unique')
+    op.drop_index('ix_ingestao_arquivos_id', table_name='ingestao_arquivos')
+    op.drop_index('ix_ingestao_arquivos_hash_sha256', table_name='ingestao_arquivos')
+    op.drop_table('ingestao_arquivos')
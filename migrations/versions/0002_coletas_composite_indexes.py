@@ -0,0 +1,39 @@
+"""Índices compostos em coletas_preco alinhados às consultas
+
+As listagens filtram por produto e período e ordenam por data_coleta
+decrescente (com id como desempate no cursor); o histórico de uma revenda
+filtra por revenda e período. Os índices simples em produto_id e revenda_id
+viram prefixo dos compostos e são removidos.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # if_not_exists: o loader (ensure_indexes) pode ter criado os índices antes
+    op.create_index('ix_coletas_preco_produto_data_id', 'coletas_preco',
+                    ['produto_id', 'data_coleta', 'id'], unique=False, if_not_exists=True)
+    op.create_index('ix_coletas_preco_revenda_data', 'coletas_preco',
+                    ['revenda_id', 'data_coleta'], unique=False, if_not_exists=True)
+    op.drop_index('ix_coletas_preco_produto_id', table_name='coletas_preco', if_exists=True)
+    op.drop_index('ix_coletas_preco_revenda_id', table_name='coletas_preco', if_exists=True)
+    op.execute('ANALYZE coletas_preco')
+
+
+def downgrade() -> None:
+    op.create_index('ix_coletas_preco_revenda_id', 'coletas_preco', ['revenda_id'], unique=False)
+    op.create_index('ix_coletas_preco_produto_id', 'coletas_preco', ['produto_id'], unique=False)
+    op.drop_index('ix_coletas_preco_revenda_data', table_name='coletas_preco')
+    op.drop_index('ix_coletas_preco_produto_data_id', table_name='coletas_preco')
@@ -0,0 +1,99 @@
+"""Busca sem acentos em município e bandeira das revendas
+
+Adiciona as colunas normalizadas municipio_busca e bandeira_busca e a
+tabela FTS5 revendas_busca (tokenizador trigram, external content sobre
+revendas), mantida por triggers de insert, update e delete.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 10_000
+
+# Cópias congeladas de app.database.search: a migração não deve mudar se o app mudar
+FTS_TABLE = "revendas_busca"
+_SPACES = re.compile(r"\s+")
+
+
+def fold_text(value):
+    """Sem acentos, maiúsculo e com espaços colapsados (regra da versão 0003)"""
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value)
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _SPACES.sub(" ", folded).strip().upper()
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('revendas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('municipio_busca', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('bandeira_busca', sa.String(length=100), nullable=True))
+
+    # Preenche as colunas normalizadas das revendas existentes
+    conn = op.get_bind()
+    rows = conn.execute(sa.text('SELECT id, municipio, bandeira FROM revendas')).all()
+    update = sa.text('UPDATE revendas SET municipio_busca = :m, bandeira_busca = :b WHERE id = :id')
+    for i in range(0, len(rows), _BATCH):
+        conn.execute(update, [
+            {'id': id_, 'm': fold_text(municipio), 'b': fold_text(bandeira)}
+            for id_, municipio, bandeira in rows[i:i + _BATCH]
+        ])
+
+    with op.batch_alter_table('revendas', schema=None) as batch_op:
+        batch_op.alter_column('municipio_busca', existing_type=sa.String(length=100), nullable=False)
+        batch_op.create_index('ix_revendas_municipio_busca', ['municipio_busca'], unique=False)
+
+    op.execute(f"""
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            municipio_busca, bandeira_busca,
+            content='revendas', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    op.execute(f"""
+        CREATE TRIGGER revendas_busca_ai AFTER INSERT ON revendas BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, municipio_busca, bandeira_busca)
+            VALUES (new.id, new.municipio_busca, new.bandeira_busca);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER revendas_busca_ad AFTER DELETE ON revendas BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, municipio_busca, bandeira_busca)
+            VALUES ('delete', old.id, old.municipio_busca, old.bandeira_busca);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER revendas_busca_au AFTER UPDATE OF municipio_busca, bandeira_busca ON revendas BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, municipio_busca, bandeira_busca)
+            VALUES ('delete', old.id, old.municipio_busca, old.bandeira_busca);
+            INSERT INTO {FTS_TABLE}(rowid, municipio_busca, bandeira_busca)
+            VALUES (new.id, new.municipio_busca, new.bandeira_busca);
+        END
+    """)
+    op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS revendas_busca_au')
+    op.execute('DROP TRIGGER IF EXISTS revendas_busca_ad')
+    op.execute('DROP TRIGGER IF EXISTS revendas_busca_ai')
+    op.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    with op.batch_alter_table('revendas', schema=None) as batch_op:
+        batch_op.drop_index('ix_revendas_municipio_busca')
+        batch_op.drop_column('bandeira_busca')
+        batch_op.drop_column('municipio_busca')
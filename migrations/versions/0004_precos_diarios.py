@@ -0,0 +1,55 @@
+"""Agregado diário de preços por produto, UF e município
+
+Cria a tabela precos_diarios com quantidade, soma, soma dos quadrados,
+mínimo e máximo de valor_venda por (data, produto, estado, município) e a
+preenche a partir das coletas existentes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('precos_diarios',
+    sa.Column('data', sa.Date(), nullable=False),
+    sa.Column('produto_id', sa.Integer(), nullable=False),
+    sa.Column('estado', sa.String(length=2), nullable=False),
+    sa.Column('municipio', sa.String(length=100), nullable=False),
+    sa.Column('regiao_sigla', sa.String(length=2), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('soma', sa.Float(), nullable=False),
+    sa.Column('soma_quadrados', sa.Float(), nullable=False),
+    sa.Column('minimo', sa.Float(), nullable=False),
+    sa.Column('maximo', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['produto_id'], ['produtos.id'], ),
+    sa.PrimaryKeyConstraint('data', 'produto_id', 'estado', 'municipio')
+    )
+    op.create_index('ix_precos_diarios_produto_data', 'precos_diarios', ['produto_id', 'data'], unique=False)
+
+    op.execute("""
+        INSERT INTO precos_diarios (data, produto_id, estado, municipio, regiao_sigla,
+                                    quantidade, soma, soma_quadrados, minimo, maximo)
+        SELECT c.data_coleta, c.produto_id, r.estado, r.municipio, MAX(r.regiao_sigla),
+               COUNT(*), SUM(c.valor_venda), SUM(c.valor_venda * c.valor_venda),
+               MIN(c.valor_venda), MAX(c.valor_venda)
+        FROM coletas_preco c JOIN revendas r ON r.id = c.revenda_id
+        GROUP BY c.data_coleta, c.produto_id, r.estado, r.municipio
+    """)
+    op.execute('ANALYZE precos_diarios')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_precos_diarios_produto_data', table_name='precos_diarios')
+    op.drop_table('precos_diarios')
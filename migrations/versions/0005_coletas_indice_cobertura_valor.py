@@ -0,0 +1,35 @@
+"""Índice de produto e data em coletas_preco cobrindo valor_venda
+
+A série de preços de um produto lê apenas (data_coleta, valor_venda) em
+ordem de data; com valor_venda no índice a varredura não consulta a
+tabela. O índice substitui ix_coletas_preco_produto_data_id, de mesmo
+prefixo, e continua atendendo às listagens e ao cursor.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # if_not_exists: o loader (ensure_indexes) pode ter criado o índice antes
+    op.create_index('ix_coletas_preco_produto_data_valor', 'coletas_preco',
+                    ['produto_id', 'data_coleta', 'id', 'valor_venda'], unique=False, if_not_exists=True)
+    op.drop_index('ix_coletas_preco_produto_data_id', table_name='coletas_preco', if_exists=True)
+    op.execute('ANALYZE coletas_preco')
+
+
+def downgrade() -> None:
+    op.create_index('ix_coletas_preco_produto_data_id', 'coletas_preco',
+                    ['produto_id', 'data_coleta', 'id'], unique=False)
+    op.drop_index('ix_coletas_preco_produto_data_valor', table_name='coletas_preco')
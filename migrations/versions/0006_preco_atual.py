@@ -0,0 +1,54 @@
+"""Preço atual por revenda e produto
+
+Cria a tabela preco_atual com a coleta mais recente de cada (revenda,
+produto) e a preenche a partir das coletas existentes.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('preco_atual',
+    sa.Column('revenda_id', sa.Integer(), nullable=False),
+    sa.Column('produto_id', sa.Integer(), nullable=False),
+    sa.Column('data_coleta', sa.Date(), nullable=False),
+    sa.Column('valor_venda', sa.Float(), nullable=False),
+    sa.Column('valor_compra', sa.Float(), nullable=True),
+    sa.Column('unidade_medida', sa.String(length=10), nullable=False),
+    sa.ForeignKeyConstraint(['produto_id'], ['produtos.id'], ),
+    sa.ForeignKeyConstraint(['revenda_id'], ['revendas.id'], ),
+    sa.PrimaryKeyConstraint('revenda_id', 'produto_id')
+    )
+    op.create_index('ix_preco_atual_produto_valor', 'preco_atual', ['produto_id', 'valor_venda'], unique=False)
+
+    op.execute("""
+        INSERT INTO preco_atual (revenda_id, produto_id, data_coleta, valor_venda,
+                                 valor_compra, unidade_medida)
+        SELECT revenda_id, produto_id, data_coleta, valor_venda, valor_compra, unidade_medida
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY revenda_id, produto_id ORDER BY data_coleta DESC, id DESC
+            ) AS ordem
+            FROM coletas_preco
+        )
+        WHERE ordem = 1
+    """)
+    op.execute('ANALYZE preco_atual')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_preco_atual_produto_valor', table_name='preco_atual')
+    op.drop_table('preco_atual')
@@ -0,0 +1,86 @@
+"""Sketches de quantis de preço por mês, produto e UF
+
+Cria a tabela sketches_preco com um t-digest de valor_venda por (mês,
+produto, estado) e a preenche a partir das coletas existentes. Os
+centroides são calculados em Python, por isso a carga inicial lê as
+coletas de um produto por vez e grava os digests, em vez de um
+INSERT ... SELECT.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cópia congelada de app.utils.tdigest: a migração não deve mudar se o app mudar
+COMPRESSAO = 200
+
+
+def _centroides(valores):
+    """Centróides (média, peso) de um t-digest dos valores (regra da versão 0007)"""
+    medias = np.sort(np.asarray(valores, dtype="float64"))
+    pesos = np.ones_like(medias)
+    acumulado = np.cumsum(pesos)
+    q = (acumulado - pesos / 2) / acumulado[-1]
+    k = np.floor(COMPRESSAO / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1.0, 1.0)))
+    inicios = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+    pesos_grupo = np.add.reduceat(pesos, inicios)
+    medias_grupo = np.add.reduceat(medias * pesos, inicios) / pesos_grupo
+    return np.column_stack([medias_grupo, pesos_grupo]).astype("<f8").tobytes()
+
+
+def upgrade() -> None:
+    op.create_table('sketches_preco',
+    sa.Column('mes', sa.Date(), nullable=False),
+    sa.Column('produto_id', sa.Integer(), nullable=False),
+    sa.Column('estado', sa.String(length=2), nullable=False),
+    sa.Column('regiao_sigla', sa.String(length=2), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('minimo', sa.Float(), nullable=False),
+    sa.Column('maximo', sa.Float(), nullable=False),
+    sa.Column('centroides', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['produto_id'], ['produtos.id'], ),
+    sa.PrimaryKeyConstraint('mes', 'produto_id', 'estado')
+    )
+    op.create_index('ix_sketches_preco_produto_mes', 'sketches_preco', ['produto_id', 'mes'], unique=False)
+
+    conn = op.get_bind()
+    produto_ids = conn.execute(sa.text('SELECT id FROM produtos')).scalars().all()
+    for produto_id in produto_ids:
+        coletas = pd.DataFrame.from_records(conn.execute(sa.text("""
+            SELECT date(c.data_coleta, 'start of month') AS mes, r.estado, r.regiao_sigla, c.valor_venda
+            FROM coletas_preco c JOIN revendas r ON r.id = c.revenda_id
+            WHERE c.produto_id = :produto_id
+        """), {'produto_id': produto_id}).all(), columns=['mes', 'estado', 'regiao_sigla', 'valor'])
+        sketches = [
+            {
+                'mes': mes, 'produto_id': produto_id, 'estado': estado,
+                'regiao_sigla': grupo['regiao_sigla'].max(), 'quantidade': len(grupo),
+                'minimo': float(grupo['valor'].min()), 'maximo': float(grupo['valor'].max()),
+                'centroides': _centroides(grupo['valor']),
+            }
+            for (mes, estado), grupo in coletas.groupby(['mes', 'estado'], sort=False)
+        ]
+        if sketches:
+            conn.execute(sa.text("""
+                INSERT INTO sketches_preco (mes, produto_id, estado, regiao_sigla, quantidade, minimo, maximo, centroides)
+                VALUES (:mes, :produto_id, :estado, :regiao_sigla, :quantidade, :minimo, :maximo, :centroides)
+            """), sketches)
+    op.execute('ANALYZE sketches_preco')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sketches_preco_produto_mes', table_name='sketches_preco')
+    op.drop_table('sketches_preco')
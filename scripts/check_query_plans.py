@@ -0,0 +1,205 @@
+"""
+Verificação dos planos de consulta das listagens
+
+Executa as consultas reais dos serviços, captura o SQL emitido e confere,
+com EXPLAIN QUERY PLAN, se cada uma usa o índice esperado e se a ordenação
+vem do índice (sem "USE TEMP B-TREE FOR ORDER BY"). Sai com código 1 se
+algum plano regredir, para uso em CI.
+"""
+import sys
+import argparse
+import tempfile
+from datetime import date
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from alembic import command
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from app.database.search import fold_text
+from app.schemas import (
+    PeriodoEstatistica, DimensaoVariacao, DimensaoPercentil, PeriodoPercentil, FrequenciaSerie
+)
+from app.services import ColetaService, RevendaService, EstatisticaService
+from app.utils.pagination import IncludeTotal, encode_cursor
+from init_db import alembic_config
+
+OFF = IncludeTotal.OFF
+
+# (descrição, consulta, índice esperado, ordenação deve vir do índice)
+CASES = [
+    ("coletas por produto",
+     lambda db: ColetaService.get_all(db, produto="GASOLINA", include_total=OFF),
+     "ix_coletas_preco_produto_data_valor", True),
+    ("coletas por produto e período",
+     lambda db: ColetaService.get_all(db, produto="GASOLINA", data_inicio=date(2024, 1, 1),
+                                      data_fim=date(2024, 6, 30), include_total=OFF),
+     "ix_coletas_preco_produto_data_valor", True),
+    ("coletas por produto com cursor",
+     lambda db: ColetaService.get_all(db, produto="GASOLINA", cursor=encode_cursor(date(2024, 6, 1), 1000),
+                                      include_total=OFF),
+     "ix_coletas_preco_produto_data_valor", True),
+    ("coletas sem filtro",
+     lambda db: ColetaService.get_all(db, include_total=OFF),
+     "ix_coletas_preco_data_coleta", True),
+    ("coletas por período com cursor",
+     lambda db: ColetaService.get_all(db, data_inicio=date(2024, 1, 1),
+                                      cursor=encode_cursor(date(2024, 6, 1), 1000), include_total=OFF),
+     "ix_coletas_preco_data_coleta", True),
+    ("coletas detalhadas por produto",
+     lambda db: ColetaService.get_all_detailed(db, produto="GASOLINA", include_total=OFF),
+     "ix_coletas_preco_produto_data_valor", True),
+    ("coletas por estado",
+     lambda db: ColetaService.get_all(db, estado="SP", include_total=OFF),
+     "ix_coletas_preco_revenda_data", False),
+    ("revendas por município",
+     lambda db: RevendaService.get_all(db, municipio="São Paulo", include_total=OFF),
+     "VIRTUAL TABLE INDEX", True),
+    ("coletas por município",
+     lambda db: ColetaService.get_all(db, municipio="São Paulo", include_total=OFF),
+     "VIRTUAL TABLE INDEX", False),
+    ("revendas com cursor",
+     lambda db: RevendaService.get_all(db, cursor=encode_cursor(1000), include_total=OFF),
+     "INTEGER PRIMARY KEY", True),
+    ("estatísticas mensais por produto",
+     lambda db: EstatisticaService.get_estatisticas(db, [], PeriodoEstatistica.MES, date(2024, 1, 1),
+                                                    date(2024, 6, 30), "GASOLINA"),
+     "ix_precos_diarios_produto_data", False),
+    ("série mensal de preços de um produto",
+     lambda db: EstatisticaService.get_serie(db, 1),
+     "ix_sketches_preco_produto_mes", False),
+    ("série semanal de preços de um produto",
+     lambda db: EstatisticaService.get_serie(db, 1, FrequenciaSerie.SEMANA, data_inicio=date(2024, 1, 1)),
+     "COVERING INDEX ix_coletas_preco_produto_data_valor", True),
+    ("percentis de preço por região e ano",
+     lambda db: EstatisticaService.get_percentis(db, "GASOLINA", [50, 90], DimensaoPercentil.REGIAO_SIGLA,
+                                                 PeriodoPercentil.ANO, date(2024, 1, 1)),
+     "ix_sketches_preco_produto_mes", False),
+    ("variação de preço por estado",
+     lambda db: EstatisticaService.get_variacao(db, "GASOLINA", DimensaoVariacao.ESTADO, date(2024, 1, 1),
+                                                date(2024, 1, 7), date(2024, 1, 8), date(2024, 1, 14)),
+     "ix_precos_diarios_produto_data", False),
+    ("revendas mais baratas por produto",
+     lambda db: ColetaService.get_mais_baratas(db, "GASOLINA"),
+     "ix_preco_atual_produto_valor", True),
+    ("revendas mais baratas por município",
+     lambda db: ColetaService.get_mais_baratas(db, "GASOLINA", municipio="São Paulo"),
+     "VIRTUAL TABLE INDEX", False),
+    ("preços atuais de uma revenda",
+     lambda db: RevendaService.get_precos(db, 1),
+     "sqlite_autoindex_preco_atual_1", False),
+]
+
+# Casos que devem ler apenas coletas_preco, sem juntar revendas ou produtos
+COLETAS_ONLY = {
+    "coletas por produto", "coletas por produto e período", "coletas por produto com cursor",
+    "coletas sem filtro", "coletas por período com cursor",
+}
+
+
+def capture_plans(engine, run) -> list[str]:
+    """Executa a consulta e retorna o plano de cada SELECT emitido"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    Session = sessionmaker(bind=engine)
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        with Session() as db:
+            run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            plans.append("\n".join(row[-1] for row in rows))
+    return plans
+
+
+def case_failures(engine, descricao: str, run, index: str, ordered: bool) -> tuple[list[str], str]:
+    """
+    Confere um caso de CASES
+
+    Returns:
+        (regressões encontradas, plano capturado)
+    """
+    plans = capture_plans(engine, run)
+    plan = "\n".join(plans)
+    falhas = []
+    if index not in plan:
+        falhas.append(f"não usa {index}")
+    if ordered and "TEMP B-TREE FOR ORDER BY" in plan:
+        falhas.append("ordena fora do índice")
+    if descricao in COLETAS_ONLY and any(
+        "coletas_preco" in p and ("revendas" in p or "produtos" in p) for p in plans
+    ):
+        falhas.append("junta tabelas desnecessárias")
+    return falhas, plan
+
+
+def seed(engine) -> None:
+    """
+    Dados mínimos de um banco recém-migrado
+
+    Os filtros por produto resolvem o nome para id antes da consulta;
+    preços atuais e ranking exigem uma revenda com alguma coleta.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO produtos (nome) VALUES ('GASOLINA')"))
+        conn.execute(text(
+            "INSERT INTO revendas (cnpj, nome, municipio, estado, regiao_sigla, municipio_busca) "
+            "VALUES ('00.000.000/0001-00', 'POSTO', :municipio, 'SP', 'SE', :municipio_busca)"
+        ), {"municipio": "SÃO PAULO", "municipio_busca": fold_text("SÃO PAULO")})
+        conn.execute(text(
+            "INSERT INTO coletas_preco (data_coleta, valor_venda, unidade_medida, revenda_id, produto_id) "
+            "VALUES ('2024-06-01', 5.99, 'R$ / litro', 1, 1)"
+        ))
+
+
+def check(engine) -> bool:
+    """Confere todos os casos; retorna True se nenhum plano regrediu"""
+    ok = True
+    for descricao, run, index, ordered in CASES:
+        falhas, plan = case_failures(engine, descricao, run, index, ordered)
+        ok = ok and not falhas
+        print(f"{'✓' if not falhas else '❌'} {descricao}" + (f": {', '.join(falhas)}" if falhas else ""))
+        if falhas:
+            print("    " + plan.replace("\n", "\n    "))
+    return ok
+
+
+def main():
+    """Executa a verificação em um banco migrado do zero ou no banco informado"""
+    parser = argparse.ArgumentParser(description="Verifica os planos de consulta das listagens")
+    parser.add_argument("--database-url", default=None,
+                        help="Banco a verificar (padrão: banco temporário migrado até a última versão)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url
+        if url is None:
+            url = f"sqlite:///{Path(tmp) / 'plans.db'}"
+            config = alembic_config()
+            config.set_main_option("sqlalchemy.url", url)
+            command.upgrade(config, "head")
+
+        engine = create_engine(url)
+        if args.database_url is None:
+            seed(engine)
+        try:
+            ok = check(engine)
+        finally:
+            engine.dispose()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
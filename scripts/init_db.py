@@ -1,24 +1,49 @@
 """
 Script para inicializar o banco de dados
-Cria as tabelas e usuário admin padrão
+Aplica as migrações (Alembic) e cria usuário admin padrão
 """
 import sys
 from pathlib import Path
 
 # Adicionar diretório raiz ao path
-sys.path.append(str(Path(__file__).parent.parent))
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
 
-from app.database.connection import Base, engine, SessionLocal
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from app.database.connection import engine, SessionLocal
 from app.models import User, UserRole, Produto
 from app.utils.security import get_password_hash
 from app.config import settings
 
 
+# Revisão equivalente ao schema criado por create_all antes das migrações;
+# bancos de create_all que já tinham o manifesto e a chave natural das
+# coletas também são marcados aqui (0001a os mantém como estão)
+BASELINE_REVISION = "0001"
+
+
+def alembic_config() -> Config:
+    """Configuração do Alembic independente do diretório atual"""
+    config = Config(str(ROOT_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT_DIR / "migrations"))
+    return config
+
+
 def create_tables():
-    """Cria todas as tabelas no banco de dados"""
-    print("Criando tabelas...")
-    Base.metadata.create_all(bind=engine)
-    print("✓ Tabelas criadas com sucesso!")
+    """Cria ou atualiza as tabelas aplicando as migrações pendentes"""
+    print("Aplicando migrações...")
+    config = alembic_config()
+    
+    # Bancos criados antes das migrações já têm o schema inicial
+    tables = inspect(engine).get_table_names()
+    if "coletas_preco" in tables and "alembic_version" not in tables:
+        print(f"  Banco existente sem versão: marcando como {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    
+    command.upgrade(config, "head")
+    print("✓ Tabelas atualizadas com sucesso!")
 
 
 def create_admin_user():
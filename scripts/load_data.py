@@ -2,137 +2,625 @@
 Script para carregar dados do CSV do portal dados.gov.br
 """
 import sys
+import glob
+import time
+import signal
+import hashlib
+import argparse
+import multiprocessing as mp
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
 from pathlib import Path
+from queue import Empty
+from typing import Optional
 import pandas as pd
-from datetime import datetime
+from sqlalchemy import event, func, select, and_, Table, MetaData, Column, Integer, Date
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 # Adicionar diretório raiz ao path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from app.database.connection import SessionLocal
-from app.models import Revenda, Produto, ColetaPreco
+from app.database.connection import SessionLocal, engine
+from app.models import Revenda, Produto, ColetaPreco, IngestaoArquivo, StatusIngestao
+from app.utils.normalization import CSV_COLUMNS, NORMALIZED_COLUMNS, normalize_coletas
+from app.database.search import fold_series
+from app.services.preco_diario_service import PrecoDiarioService
+from app.services.preco_atual_service import PrecoAtualService
+from app.services.sketch_preco_service import SketchPrecoService
+from app.utils.staging import read_parquet_chunks
+from app.utils.batch import IN_BATCH
+from app.utils.cache import query_cache
+from load_monitor import LoadMonitor
 
 
-def normalize_cnpj(cnpj):
-    """Normaliza CNPJ para formato padrão"""
-    if pd.isna(cnpj):
-        return None
-    cnpj_str = str(cnpj).strip()
-    # Remove caracteres não numéricos
-    cnpj_nums = ''.join(filter(str.isdigit, cnpj_str))
-    if len(cnpj_nums) != 14:
+DEFAULT_CHUNKSIZE = 50_000
+
+# Segundos de espera por um bloco antes de conferir se os leitores terminaram
+QUEUE_TIMEOUT = 5.0
+
+
+def read_csv_chunks(csv_path: str, chunksize: int = DEFAULT_CHUNKSIZE, limit: int = None,
+                    skip_chunks: int = 0):
+    """
+    Lê o CSV em blocos de tamanho fixo, mantendo o uso de memória constante
+    
+    Todas as colunas são lidas como texto; a conversão de tipos é feita
+    por coluna em normalize_coletas. skip_chunks pula os primeiros blocos
+    (já gravados em uma execução anterior) sem interpretá-los.
+    """
+    skiprows = range(1, skip_chunks * chunksize + 1) if skip_chunks else None
+    reader = pd.read_csv(
+        csv_path, sep=';', encoding='utf-8', dtype=str,
+        chunksize=chunksize, nrows=limit, skiprows=skiprows
+    )
+    for chunk in reader:
+        yield chunk.rename(columns=CSV_COLUMNS)
+
+
+def read_normalized_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE, limit: int = None,
+                           skip_chunks: int = 0):
+    """
+    Lê um CSV bruto ou um Parquet de staging em blocos já normalizados
+    
+    Yields:
+        (linhas lidas, DataFrame normalizado, DataFrame de rejeitadas,
+        tempos em segundos das fases de leitura e normalização). As
+        rejeitadas trazem o número da linha no arquivo na coluna 'linha'.
+    """
+    if path.endswith('.parquet'):
+        chunks = read_parquet_chunks(path, chunksize, NORMALIZED_COLUMNS, skip_chunks, limit)
+    else:
+        chunks = read_csv_chunks(path, chunksize, limit, skip_chunks)
+    # Linha 1 é o cabeçalho; o índice do pandas recomeça após linhas puladas
+    offset = skip_chunks * chunksize + 2
+    
+    while True:
+        inicio = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        lido = time.perf_counter()
+        
+        if path.endswith('.parquet'):
+            # Staging já está normalizado: nada a rejeitar
+            df, rejeitadas = chunk, chunk.iloc[0:0].assign(motivo=None)
+        else:
+            df, rejeitadas = normalize_coletas(chunk)
+        rejeitadas.insert(0, 'linha', rejeitadas.index + offset)
+        
+        tempos = {'leitura': lido - inicio, 'normalizacao': time.perf_counter() - lido}
+        yield len(chunk), df, rejeitadas, tempos
+
+
+def _records(frame: pd.DataFrame) -> list[dict]:
+    """Converte um DataFrame em parâmetros de executemany (nulos como None)"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def load_dimension_maps(db) -> tuple[dict, dict]:
+    """
+    Carrega os mapas nome -> id de produtos e cnpj -> id de revendas
+    
+    Uma consulta por tabela no início da carga; depois disso só as chaves
+    ainda não vistas chegam ao banco.
+    """
+    produtos = dict(db.query(Produto.nome, Produto.id).all())
+    revendas = dict(db.query(Revenda.cnpj, Revenda.id).all())
+    return produtos, revendas
+
+
+def _insert_missing(db, model, key: str, rows: list[dict], cache: dict) -> None:
+    """
+    Insere em lote as linhas cuja chave ainda não está no cache e lê os ids de volta
+    
+    Chaves já existentes no banco (inseridas por outro processo, por
+    exemplo) são ignoradas pelo ON CONFLICT e apenas entram no cache.
+    """
+    if not rows:
+        return
+    column = getattr(model, key)
+    db.execute(sqlite_insert(model.__table__).on_conflict_do_nothing(index_elements=[key]), rows)
+    keys = [row[key] for row in rows]
+    for i in range(0, len(keys), IN_BATCH):
+        batch = keys[i:i + IN_BATCH]
+        cache.update(db.query(column, model.id).filter(column.in_(batch)).all())
+
+
+def _resolve_produtos(db, nomes, cache: dict) -> None:
+    """Insere em lote os produtos do bloco que ainda não estão no cache nome -> id"""
+    novos = set(nomes) - cache.keys()
+    _insert_missing(db, Produto, 'nome', [{'nome': nome} for nome in sorted(novos)], cache)
+
+
+def _resolve_revendas(db, revendas: pd.DataFrame, cache: dict) -> None:
+    """Insere em lote as revendas do bloco que ainda não estão no cache cnpj -> id"""
+    novas = revendas[~revendas['cnpj'].isin(cache.keys())]
+    colunas = ['cnpj', 'nome', 'municipio', 'estado', 'regiao_sigla', 'bandeira']
+    # Insert de Core não passa pelos validadores do modelo: preenche as colunas de busca
+    novas = novas[colunas].assign(
+        municipio_busca=fold_series(novas['municipio']),
+        bandeira_busca=fold_series(novas['bandeira'])
+    )
+    _insert_missing(db, Revenda, 'cnpj', _records(novas), cache)
+
+
+# Chaves naturais de um bloco, juntadas ao índice único de coletas_preco
+_chaves_bloco = Table(
+    'chaves_bloco', MetaData(),
+    Column('revenda_id', Integer), Column('produto_id', Integer), Column('data_coleta', Date),
+    prefixes=['TEMPORARY'],
+)
+
+
+def _stored_coletas(db, chaves: list[tuple]) -> dict:
+    """
+    Coletas do bloco já gravadas, pela chave natural (revenda, produto, data)
+    
+    As chaves do bloco vão para a tabela temporária chaves_bloco, e cada
+    uma é procurada no índice único (revenda_id, produto_id, data_coleta):
+    o custo é proporcional ao bloco, não ao histórico.
+    
+    Returns:
+        Mapa chave -> UF da revenda, para recalcular os agregados que o
+        upsert vai alterar
+    """
+    if not chaves:
+        return {}
+    conn = db.connection()
+    _chaves_bloco.create(conn, checkfirst=True)
+    conn.execute(_chaves_bloco.delete())
+    conn.execute(_chaves_bloco.insert(), [
+        {'revenda_id': revenda_id, 'produto_id': produto_id, 'data_coleta': data_coleta}
+        for revenda_id, produto_id, data_coleta in chaves
+    ])
+    k = _chaves_bloco.c
+    rows = conn.execute(
+        select(ColetaPreco.revenda_id, ColetaPreco.produto_id, ColetaPreco.data_coleta, Revenda.estado)
+        .select_from(_chaves_bloco)
+        .join(ColetaPreco, and_(
+            ColetaPreco.revenda_id == k.revenda_id,
+            ColetaPreco.produto_id == k.produto_id,
+            ColetaPreco.data_coleta == k.data_coleta,
+        ))
+        .join(Revenda, Revenda.id == ColetaPreco.revenda_id)
+    )
+    return {(revenda_id, produto_id, data_coleta): estado for revenda_id, produto_id, data_coleta, estado in rows}
+
+
+def _write_chunk(db, df: pd.DataFrame, produtos_cache: dict, revendas_cache: dict,
+                 manifesto: Optional[IngestaoArquivo] = None, linhas_lidas: int = 0,
+                 refresh_aggregates: bool = True) -> int:
+    """
+    Grava um bloco já normalizado com um único INSERT executemany
+    
+    As coletas são gravadas como upsert pela chave natural (revenda,
+    produto, data), de modo que recarregar um bloco não duplica linhas.
+    O preço atual das revendas do bloco, o progresso do manifesto e, com
+    refresh_aggregates, o agregado diário e os sketches de quantis são
+    confirmados na mesma transação. Coletas novas entram nos agregados como
+    deltas; as que substituem uma coleta já gravada (recarga de arquivo)
+    recalculam o dia e o mês a partir do histórico.
+    
+    Returns:
+        Número de coletas gravadas
+    """
+    gravadas = 0
+    if not df.empty:
+        _resolve_produtos(db, df['produto'].unique(), produtos_cache)
+        _resolve_revendas(db, df.drop_duplicates('cnpj'), revendas_cache)
+        
+        coletas = pd.DataFrame({
+            'data_coleta': df['data_coleta'].dt.date,
+            'valor_venda': df['valor_venda'],
+            'valor_compra': df['valor_compra'],
+            'unidade_medida': df['unidade_medida'],
+            'revenda_id': df['cnpj'].map(revendas_cache),
+            'produto_id': df['produto'].map(produtos_cache),
+        })
+        if refresh_aggregates:
+            # Em chaves repetidas no bloco vale a última linha, como no upsert
+            novas = coletas.drop_duplicates(['revenda_id', 'produto_id', 'data_coleta'], keep='last')
+            naturais = list(novas[['revenda_id', 'produto_id', 'data_coleta']].astype(object)
+                            .itertuples(index=False, name=None))
+            existentes = _stored_coletas(db, naturais)
+        
+        # Insert de Core (Table, não a classe ORM) para um executemany de verdade
+        stmt = sqlite_insert(ColetaPreco.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['revenda_id', 'produto_id', 'data_coleta'],
+            set_={
+                'valor_venda': stmt.excluded.valor_venda,
+                'valor_compra': stmt.excluded.valor_compra,
+                'unidade_medida': stmt.excluded.unidade_medida,
+                'updated_at': func.now(),
+            }
+        )
+        db.execute(stmt, _records(coletas))
+        # Ordenação estável: em datas repetidas vale a última linha, como no upsert
+        ultimas = coletas.sort_values('data_coleta', kind='stable').drop_duplicates(
+            ['revenda_id', 'produto_id'], keep='last'
+        )
+        PrecoAtualService.upsert(db, _records(ultimas))
+        gravadas = len(coletas)
+        
+        if refresh_aggregates:
+            recarregadas = [chave in existentes for chave in naturais]
+            inseridas = _records(novas[[not r for r in recarregadas]])
+            PrecoDiarioService.add(db, inseridas)
+            PrecoDiarioService.refresh(db, {
+                (data_coleta, produto_id)
+                for (_, produto_id, data_coleta), recarregada in zip(naturais, recarregadas) if recarregada
+            })
+            SketchPrecoService.add(db, inseridas)
+            SketchPrecoService.refresh(db, {
+                (SketchPrecoService.mes(data_coleta), produto_id, existentes[(revenda_id, produto_id, data_coleta)])
+                for (revenda_id, produto_id, data_coleta), recarregada in zip(naturais, recarregadas) if recarregada
+            })
+    
+    if manifesto is not None:
+        manifesto.blocos_gravados += 1
+        manifesto.linhas_lidas += linhas_lidas
+        manifesto.linhas_carregadas += gravadas
+    
+    db.commit()
+    # Só alcança o cache deste processo; a API em outro processo depende do TTL
+    query_cache.invalidate("coletas", "revendas", "produtos")
+    return gravadas
+
+
+def file_sha256(path: str) -> str:
+    """Calcula o SHA-256 do arquivo lendo-o em blocos de 1 MB"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _open_manifest(db, csv_path: str, digest: str, chunksize: int,
+                   force: bool = False) -> Optional[IngestaoArquivo]:
+    """
+    Abre (ou cria) o registro do arquivo no manifesto de ingestão
+    
+    Returns:
+        Registro em andamento, ou None se o arquivo já foi carregado por
+        completo. Cargas parciais são retomadas do último bloco confirmado,
+        desde que o tamanho de bloco seja o mesmo; caso contrário a carga
+        recomeça do início (o upsert mantém o resultado idempotente).
+    """
+    manifesto = db.query(IngestaoArquivo).filter(IngestaoArquivo.hash_sha256 == digest).first()
+    
+    if manifesto is None:
+        manifesto = IngestaoArquivo(
+            arquivo=csv_path,
+            hash_sha256=digest,
+            tamanho_bytes=Path(csv_path).stat().st_size,
+            chunksize=chunksize,
+            blocos_gravados=0,
+            linhas_lidas=0,
+            linhas_carregadas=0
+        )
+        db.add(manifesto)
+    elif manifesto.status == StatusIngestao.CONCLUIDO and not force:
         return None
-    # Formata: XX.XXX.XXX/XXXX-XX
-    return f"{cnpj_nums[:2]}.{cnpj_nums[2:5]}.{cnpj_nums[5:8]}/{cnpj_nums[8:12]}-{cnpj_nums[12:]}"
+    elif force or manifesto.chunksize != chunksize:
+        manifesto.chunksize = chunksize
+        manifesto.blocos_gravados = 0
+        manifesto.linhas_lidas = 0
+        manifesto.linhas_carregadas = 0
+    
+    manifesto.arquivo = csv_path
+    manifesto.status = StatusIngestao.EM_ANDAMENTO
+    db.commit()
+    return manifesto
 
 
-def load_csv_data(csv_path: str, limit: int = None):
+def _close_manifest(db, manifesto: IngestaoArquivo, status: StatusIngestao) -> None:
+    """Registra a situação final do arquivo no manifesto"""
+    db.rollback()
+    manifesto.status = status
+    db.commit()
+
+
+def load_csv_data(csv_path: str, limit: int = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                  force: bool = False, monitor: Optional[LoadMonitor] = None,
+                  refresh_aggregates: bool = True) -> dict:
     """
-    Carrega dados do CSV para o banco
+    Carrega o CSV em blocos, com normalização vetorizada e inserção em lote
+    
+    Cada bloco é normalizado por coluna e gravado com um único INSERT
+    executemany (SQLAlchemy Core), em vez de um objeto ORM por linha.
+    A carga é registrada no manifesto de ingestão: arquivos já concluídos
+    são ignorados e cargas interrompidas continuam do último bloco gravado.
     
     Args:
         csv_path: Caminho para o arquivo CSV
-        limit: Limitar número de registros (para testes)
+        limit: Limitar número de registros (para testes; não usa o manifesto)
+        chunksize: Número de linhas lidas por bloco
+        force: Recarrega o arquivo mesmo se já concluído
+        monitor: Destino da quarentena, do progresso e do resumo
+        refresh_aggregates: Atualiza precos_diarios a cada bloco (desligado
+            no modo rápido, que reconstrói o agregado ao final)
+    
+    Returns:
+        Resumo da carga (ver LoadMonitor.finish)
     """
+    monitor = monitor or LoadMonitor()
     db = SessionLocal()
     
+    produtos_cache, revendas_cache = load_dimension_maps(db)
+    manifesto = None
+    
     try:
-        print(f"Carregando CSV: {csv_path}")
+        if limit is None:
+            manifesto = _open_manifest(db, csv_path, file_sha256(csv_path), chunksize, force)
+            if manifesto is None:
+                print(f"✓ Arquivo já carregado, ignorando: {csv_path}")
+                monitor.file_done(csv_path, 'ignorado')
+                return monitor.finish('concluido')
+            if manifesto.blocos_gravados:
+                print(f"  Retomando a partir do bloco {manifesto.blocos_gravados}")
         
-        # Lê CSV (ajuste os nomes das colunas conforme o dataset real)
-        df = pd.read_csv(csv_path, sep=';', encoding='utf-8', nrows=limit)
-        print(f"✓ {len(df)} registros encontrados no CSV")
+        print(f"Carregando CSV em blocos de {chunksize}: {csv_path}")
         
-        # Mapear colunas do CSV (ajuste conforme estrutura real)
-        # Exemplo de colunas esperadas:
-        # Data da Coleta, Produto, CNPJ da Revenda, Nome da Revenda,
-        # Município, Estado, Região, Bandeira, Valor de Venda, Unidade de Medida
+        skip_chunks = manifesto.blocos_gravados if manifesto else 0
+        for lidas, df, rejeitadas, tempos in read_normalized_chunks(csv_path, chunksize, limit, skip_chunks):
+            inicio = time.perf_counter()
+            gravadas = _write_chunk(db, df, produtos_cache, revendas_cache, manifesto, lidas,
+                                    refresh_aggregates)
+            tempos['gravacao'] = time.perf_counter() - inicio
+            monitor.add_chunk(csv_path, lidas, gravadas, rejeitadas, tempos)
         
-        produtos_cache = {}
-        revendas_cache = {}
+        if manifesto is not None:
+            _close_manifest(db, manifesto, StatusIngestao.CONCLUIDO)
+        monitor.file_done(csv_path, 'concluido')
         
-        coletas_inseridas = 0
-        erros = 0
+        return monitor.finish('concluido', revendas_no_banco=len(revendas_cache),
+                              produtos_no_banco=len(produtos_cache))
+    
+    except BaseException as e:
+        db.rollback()
+        if manifesto is not None:
+            _close_manifest(db, manifesto, StatusIngestao.FALHOU)
+        monitor.file_done(csv_path, 'falhou', f"{type(e).__name__}: {e}")
+        monitor.finish('falhou')
+        print(f"❌ Erro ao carregar dados: {str(e)}")
+        raise
+    
+    finally:
+        db.close()
+
+
+# PRAGMAs para carga em massa: WAL mantém o banco íntegro se o processo
+# for interrompido; synchronous=OFF só arrisca dados em queda do sistema
+FAST_PRAGMAS = {
+    'synchronous': 'OFF',
+    'cache_size': '-262144',  # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+
+def _secondary_indexes():
+    """Índices de coletas_preco que podem ser removidos durante a carga"""
+    # Índices únicos ficam: a chave natural é usada pelo upsert
+    return [idx for idx in ColetaPreco.__table__.indexes if not idx.unique]
+
+
+def ensure_indexes() -> None:
+    """Recria os índices secundários ausentes (ex.: após um --fast interrompido)"""
+    with engine.begin() as conn:
+        for idx in _secondary_indexes():
+            idx.create(conn, checkfirst=True)
+
+
+def _set_fast_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in FAST_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def _raise_on_sigterm(signum, frame):
+    raise SystemExit(f"Interrompido pelo sinal {signum}")
+
+
+@contextmanager
+def fast_load_mode():
+    """
+    Prepara o SQLite para uma carga completa e restaura o estado ao sair
+    
+    Ativa PRAGMAs de carga em massa nas conexões, muda o journal para WAL,
+    remove os índices secundários de coletas_preco e, ao final (inclusive
+    em erro, Ctrl+C ou SIGTERM), recria os índices, reconstrói o agregado
+    precos_diarios e os sketches (não atualizados bloco a bloco sem os índices), executa
+    ANALYZE e volta às configurações originais. Se o processo for morto sem chance
+    de limpeza, ensure_indexes() na próxima carga recria os índices.
+    """
+    indexes = _secondary_indexes()
+    previous_sigterm = signal.signal(signal.SIGTERM, _raise_on_sigterm)
+    
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    
+    # Conexões já abertas não passariam pelo listener
+    engine.dispose()
+    event.listen(engine, 'connect', _set_fast_pragmas)
+    
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            for idx in indexes:
+                idx.drop(conn, checkfirst=True)
+        print(f"⚡ Modo rápido: {len(indexes)} índices secundários removidos")
+        yield
+    
+    finally:
+        print("⚡ Recriando índices e atualizando estatísticas...")
+        inicio = time.perf_counter()
+        try:
+            ensure_indexes()
+            with SessionLocal() as db:
+                PrecoDiarioService.rebuild(db)
+                SketchPrecoService.rebuild(db)
+            with engine.begin() as conn:
+                conn.exec_driver_sql("ANALYZE")
+        finally:
+            event.remove(engine, 'connect', _set_fast_pragmas)
+            engine.dispose()
+            with engine.connect() as conn:
+                conn.exec_driver_sql(f"PRAGMA journal_mode={journal_mode}")
+            signal.signal(signal.SIGTERM, previous_sigterm)
+        print(f"⚡ Índices recriados em {time.perf_counter() - inicio:.1f}s")
+
+
+# Fila compartilhada com os processos de leitura (definida em _init_parser)
+_chunk_queue = None
+
+
+def _init_parser(queue) -> None:
+    """Inicializa um processo de leitura com a fila do gravador"""
+    global _chunk_queue
+    _chunk_queue = queue
+
+
+def _parse_file(csv_path: str, chunksize: int, skip_chunks: int = 0) -> None:
+    """
+    Lê e normaliza um arquivo (CSV ou Parquet) em um processo do pool
+    
+    Cada bloco normalizado é enviado ao gravador pela fila como
+    (arquivo, linhas lidas, (normalizadas, rejeitadas, tempos)). Ao final
+    é enviado (arquivo, None, erro), com erro None em caso de sucesso.
+    """
+    try:
+        for lidas, df, rejeitadas, tempos in read_normalized_chunks(
+            csv_path, chunksize, skip_chunks=skip_chunks
+        ):
+            _chunk_queue.put((csv_path, lidas, (df, rejeitadas, tempos)))
+    except Exception as e:
+        _chunk_queue.put((csv_path, None, f"{type(e).__name__}: {e}"))
+    else:
+        _chunk_queue.put((csv_path, None, None))
+
+
+def resolve_input_files(path: str) -> list[str]:
+    """Expande um arquivo, diretório ou padrão glob na lista de CSVs/Parquets a carregar"""
+    p = Path(path)
+    if p.is_dir():
+        return sorted(str(f) for f in p.iterdir() if f.suffix in (".csv", ".parquet"))
+    if p.exists():
+        return [str(p)]
+    return sorted(glob.glob(path))
+
+
+def load_files_parallel(csv_paths: list[str], workers: int = None,
+                        chunksize: int = DEFAULT_CHUNKSIZE, force: bool = False,
+                        monitor: Optional[LoadMonitor] = None,
+                        refresh_aggregates: bool = True) -> dict:
+    """
+    Carrega vários CSVs em paralelo
+    
+    A leitura e a normalização rodam em um pool de processos (um arquivo
+    por tarefa); os blocos prontos seguem por uma fila limitada até este
+    processo, o único que mantém conexão com o banco e grava os dados.
+    Assim como em load_csv_data, cada arquivo é registrado no manifesto
+    de ingestão e pode ser ignorado ou retomado em uma nova execução.
+    Sem blocos na fila por QUEUE_TIMEOUT segundos, o gravador confere se
+    as tarefas de leitura terminaram: a exceção de um leitor que falhou
+    fora de _parse_file é repassada, em vez de a carga esperar para sempre.
+    
+    Args:
+        csv_paths: Arquivos CSV a carregar
+        workers: Número de processos de leitura (padrão: número de CPUs)
+        chunksize: Número de linhas lidas por bloco
+        force: Recarrega arquivos mesmo se já concluídos
+        monitor: Destino da quarentena, do progresso e do resumo
+        refresh_aggregates: Atualiza precos_diarios a cada bloco
+    
+    Returns:
+        Resumo da carga (ver LoadMonitor.finish)
+    """
+    workers = min(workers or mp.cpu_count(), len(csv_paths))
+    monitor = monitor or LoadMonitor()
+    
+    db = SessionLocal()
+    produtos_cache, revendas_cache = load_dimension_maps(db)
+    manifestos = {}
+    falhas = 0
+    
+    ctx = mp.get_context()
+    # Fila limitada: os leitores esperam quando o gravador fica para trás
+    queue = ctx.Queue(maxsize=workers * 2)
+    
+    try:
+        print(f"Carregando {len(csv_paths)} arquivos com {workers} processos de leitura")
         
-        for idx, row in df.iterrows():
-            try:
-                # 1. Processar Produto
-                produto_nome = str(row.get('Produto', '')).strip().upper()
-                if produto_nome not in produtos_cache:
-                    produto = db.query(Produto).filter(Produto.nome == produto_nome).first()
-                    if not produto:
-                        produto = Produto(nome=produto_nome)
-                        db.add(produto)
-                        db.flush()
-                    produtos_cache[produto_nome] = produto.id
-                
-                # 2. Processar Revenda
-                cnpj = normalize_cnpj(row.get('CNPJ da Revenda'))
-                if not cnpj:
-                    continue
-                
-                if cnpj not in revendas_cache:
-                    revenda = db.query(Revenda).filter(Revenda.cnpj == cnpj).first()
-                    if not revenda:
-                        revenda = Revenda(
-                            cnpj=cnpj,
-                            nome=str(row.get('Nome da Revenda', 'N/A'))[:200],
-                            municipio=str(row.get('Município', 'N/A'))[:100],
-                            estado=str(row.get('Estado', 'N/A'))[:2].upper(),
-                            regiao_sigla=str(row.get('Região Sigla', 'N/A'))[:2].upper(),
-                            bandeira=str(row.get('Bandeira', None))[:100] if pd.notna(row.get('Bandeira')) else None
-                        )
-                        db.add(revenda)
-                        db.flush()
-                    revendas_cache[cnpj] = revenda.id
-                
-                # 3. Processar Coleta
-                data_coleta_str = row.get('Data da Coleta')
-                if pd.notna(data_coleta_str):
-                    # Ajuste o formato da data conforme o CSV
-                    data_coleta = pd.to_datetime(data_coleta_str).date()
+        with ctx.Pool(workers, initializer=_init_parser, initargs=(queue,)) as pool:
+            digests = pool.map(file_sha256, csv_paths)
+            for csv_path, digest in zip(csv_paths, digests):
+                manifesto = _open_manifest(db, csv_path, digest, chunksize, force)
+                if manifesto is None:
+                    print(f"  ✓ Já carregado, ignorando: {csv_path}")
+                    monitor.file_done(csv_path, 'ignorado')
                 else:
+                    manifestos[csv_path] = manifesto
+            
+            tarefas = [(p, chunksize, m.blocos_gravados) for p, m in manifestos.items()]
+            result = pool.starmap_async(_parse_file, tarefas)
+            pendentes = set(manifestos)
+            
+            leitores_encerrados = False
+            while pendentes:
+                try:
+                    csv_path, lidas, payload = queue.get(timeout=QUEUE_TIMEOUT)
+                except Empty:
+                    if not result.ready():
+                        continue
+                    # Repassa a exceção de uma tarefa de leitura que falhou
+                    result.get()
+                    # Tarefas concluídas: dá mais uma espera para os últimos
+                    # blocos ainda em trânsito na fila antes de desistir
+                    if leitores_encerrados:
+                        raise RuntimeError(
+                            f"Leitores encerrados sem concluir: {', '.join(sorted(pendentes))}"
+                        )
+                    leitores_encerrados = True
+                    continue
+                if lidas is None:
+                    pendentes.discard(csv_path)
+                    if payload:
+                        falhas += 1
+                        _close_manifest(db, manifestos[csv_path], StatusIngestao.FALHOU)
+                        monitor.file_done(csv_path, 'falhou', payload)
+                        print(f"  ⚠️ Falha em {csv_path}: {payload}")
+                    else:
+                        _close_manifest(db, manifestos[csv_path], StatusIngestao.CONCLUIDO)
+                        monitor.file_done(csv_path, 'concluido')
+                        print(f"  ✓ {csv_path}")
                     continue
                 
-                valor_venda = float(row.get('Valor de Venda', 0))
-                valor_compra = float(row.get('Valor de Compra', 0)) if pd.notna(row.get('Valor de Compra')) else None
-                
-                coleta = ColetaPreco(
-                    data_coleta=data_coleta,
-                    valor_venda=valor_venda,
-                    valor_compra=valor_compra,
-                    unidade_medida=str(row.get('Unidade de Medida', 'R$/litro'))[:10],
-                    revenda_id=revendas_cache[cnpj],
-                    produto_id=produtos_cache[produto_nome]
+                df, rejeitadas, tempos = payload
+                inicio = time.perf_counter()
+                gravadas = _write_chunk(
+                    db, df, produtos_cache, revendas_cache, manifestos[csv_path], lidas,
+                    refresh_aggregates
                 )
-                db.add(coleta)
-                coletas_inseridas += 1
-                
-                # Commit a cada 1000 registros
-                if coletas_inseridas % 1000 == 0:
-                    db.commit()
-                    print(f"  {coletas_inseridas} coletas inseridas...")
+                tempos['gravacao'] = time.perf_counter() - inicio
+                monitor.add_chunk(csv_path, lidas, gravadas, rejeitadas, tempos)
             
-            except Exception as e:
-                erros += 1
-                if erros < 10:  # Mostra apenas os primeiros 10 erros
-                    print(f"  ⚠️ Erro na linha {idx}: {str(e)}")
-                continue
+            result.get()
         
-        # Commit final
-        db.commit()
-        
-        print("=" * 50)
-        print(f"✓ Importação concluída!")
-        print(f"  Coletas inseridas: {coletas_inseridas}")
-        print(f"  Revendas únicas: {len(revendas_cache)}")
-        print(f"  Produtos únicos: {len(produtos_cache)}")
-        if erros > 0:
-            print(f"  ⚠️ Erros: {erros}")
-        print("=" * 50)
+        return monitor.finish('concluido' if not falhas else 'falhou',
+                              revendas_no_banco=len(revendas_cache),
+                              produtos_no_banco=len(produtos_cache),
+                              arquivos_com_falha=falhas)
     
-    except Exception as e:
+    except BaseException as e:
         db.rollback()
+        for csv_path, manifesto in manifestos.items():
+            if manifesto.status == StatusIngestao.EM_ANDAMENTO:
+                _close_manifest(db, manifesto, StatusIngestao.FALHOU)
+                monitor.file_done(csv_path, 'falhou', f"{type(e).__name__}: {e}")
+        monitor.finish('falhou')
         print(f"❌ Erro ao carregar dados: {str(e)}")
         raise
     
@@ -140,11 +628,40 @@ def load_csv_data(csv_path: str, limit: int = None):
         db.close()
 
 
+def parse_args():
+    """Lê os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Carrega o CSV de preços da ANP no banco")
+    parser.add_argument("csv_path", nargs="?", default="data/combustiveis.csv",
+                        help="CSV ou Parquet de staging, diretório ou padrão glob (padrão: data/combustiveis.csv)")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Limita o número de linhas lidas (apenas com um único arquivo)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"Linhas por bloco (padrão: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument("--fast", action="store_true",
+                        help="Carga completa no SQLite: PRAGMAs de carga em massa e índices recriados ao final")
+    parser.add_argument("--force", action="store_true",
+                        help="Recarrega arquivos já concluídos no manifesto de ingestão")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processos de leitura para vários arquivos (padrão: número de CPUs)")
+    parser.add_argument("--quarantine", default=None,
+                        help="Arquivo NDJSON das linhas rejeitadas (padrão: data/quarentena/carga_<data>.ndjson)")
+    parser.add_argument("--report", default=None,
+                        help="Arquivo JSON do resumo final (padrão: data/relatorios/carga_<data>.json)")
+    parser.add_argument("--progress-interval", type=float, default=10.0,
+                        help="Segundos entre registros de progresso (padrão: 10)")
+    args = parser.parse_args()
+    if args.limit is not None and len(resolve_input_files(args.csv_path)) > 1:
+        parser.error("--limit só vale para um único arquivo; a carga de vários arquivos é sempre completa")
+    return args
+
+
 def main():
     """Executa carga de dados"""
-    csv_path = "data/combustiveis.csv"  # Ajuste o caminho
+    args = parse_args()
+    csv_path = args.csv_path
+    csv_paths = resolve_input_files(csv_path)
     
-    if not Path(csv_path).exists():
+    if not csv_paths:
         print(f"❌ Arquivo não encontrado: {csv_path}")
         print("\nBaixe o dataset de: https://dados.gov.br/dados/conjuntos-dados/serie-historica-de-precos-de-combustiveis-e-de-glp")
         print("E salve em: data/combustiveis.csv")
@@ -154,9 +671,25 @@ def main():
     print("Carregando dados do CSV...")
     print("=" * 50)
     
-    # Para testes, limite a 10000 registros
-    # Para produção, remova o limit
-    load_csv_data(csv_path, limit=10000)
+    # Recupera índices removidos por um --fast que não terminou
+    ensure_indexes()
+    
+    carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+    monitor = LoadMonitor(
+        quarantine_path=args.quarantine or f"data/quarentena/carga_{carimbo}.ndjson",
+        report_path=args.report or f"data/relatorios/carga_{carimbo}.json",
+        interval=args.progress_interval
+    )
+    
+    with fast_load_mode() if args.fast else nullcontext():
+        if len(csv_paths) > 1:
+            load_files_parallel(csv_paths, workers=args.workers, chunksize=args.chunksize,
+                                force=args.force, monitor=monitor,
+                                refresh_aggregates=not args.fast)
+        else:
+            load_csv_data(csv_paths[0], limit=args.limit, chunksize=args.chunksize,
+                          force=args.force, monitor=monitor,
+                          refresh_aggregates=not args.fast)
 
 
 if __name__ == "__main__":
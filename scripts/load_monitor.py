@@ -0,0 +1,154 @@
+"""
+Acompanhamento das cargas de dados: quarentena, progresso e resumo final
+"""
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+
+# Fases cronometradas de cada bloco
+PHASES = ('leitura', 'normalizacao', 'gravacao')
+
+
+class LoadMonitor:
+    """
+    Coleta as métricas de uma carga e as publica de forma estruturada
+
+    - Linhas rejeitadas vão para um arquivo de quarentena (NDJSON), com
+      arquivo de origem, número da linha, motivo e os campos originais.
+    - A cada interval segundos é impresso um registro JSON de progresso.
+    - Ao final, um resumo JSON é impresso e gravado em report_path, para
+      comparação entre execuções.
+    """
+
+    def __init__(self, quarantine_path: Optional[str] = None, report_path: Optional[str] = None,
+                 interval: float = 10.0):
+        self.quarantine_path = quarantine_path
+        self.report_path = report_path
+        self.interval = interval
+
+        self.inicio = datetime.now()
+        self._t0 = time.perf_counter()
+        self._last_progress = self._t0
+        self._quarantine = None
+
+        self.linhas_lidas = 0
+        self.linhas_normalizadas = 0
+        self.linhas_gravadas = 0
+        self.linhas_rejeitadas = 0
+        self.tempos = dict.fromkeys(PHASES, 0.0)
+        self.motivos = Counter()
+        self.arquivos = {}
+
+    def _arquivo(self, arquivo: str) -> dict:
+        return self.arquivos.setdefault(arquivo, {
+            'status': 'em_andamento', 'linhas_lidas': 0,
+            'linhas_gravadas': 0, 'linhas_rejeitadas': 0
+        })
+
+    def add_chunk(self, arquivo: str, lidas: int, gravadas: int,
+                  rejeitadas: pd.DataFrame, tempos: dict) -> None:
+        """Registra um bloco gravado e envia suas linhas rejeitadas à quarentena"""
+        self.linhas_lidas += lidas
+        self.linhas_normalizadas += lidas - len(rejeitadas)
+        self.linhas_gravadas += gravadas
+        self.linhas_rejeitadas += len(rejeitadas)
+        for fase, segundos in tempos.items():
+            self.tempos[fase] += segundos
+
+        stats = self._arquivo(arquivo)
+        stats['linhas_lidas'] += lidas
+        stats['linhas_gravadas'] += gravadas
+        stats['linhas_rejeitadas'] += len(rejeitadas)
+
+        if not rejeitadas.empty:
+            self.motivos.update(rejeitadas['motivo'].value_counts().to_dict())
+            self._write_quarantine(arquivo, rejeitadas)
+
+        if time.perf_counter() - self._last_progress >= self.interval:
+            self.progress()
+
+    def _write_quarantine(self, arquivo: str, rejeitadas: pd.DataFrame) -> None:
+        if not self.quarantine_path:
+            return
+        if self._quarantine is None:
+            Path(self.quarantine_path).parent.mkdir(parents=True, exist_ok=True)
+            self._quarantine = open(self.quarantine_path, 'a', encoding='utf-8')
+        registros = rejeitadas.assign(arquivo=arquivo)
+        colunas = ['arquivo', 'linha', 'motivo']
+        registros = registros[colunas + [c for c in registros.columns if c not in colunas]]
+        self._quarantine.write(registros.to_json(orient='records', lines=True, force_ascii=False))
+        self._quarantine.flush()
+
+    def file_done(self, arquivo: str, status: str, erro: Optional[str] = None) -> None:
+        """Registra a situação final de um arquivo"""
+        stats = self._arquivo(arquivo)
+        stats['status'] = status
+        if erro:
+            stats['erro'] = erro
+
+    def snapshot(self) -> dict:
+        """Contadores atuais da carga"""
+        decorrido = time.perf_counter() - self._t0
+        return {
+            'linhas_lidas': self.linhas_lidas,
+            'linhas_normalizadas': self.linhas_normalizadas,
+            'linhas_gravadas': self.linhas_gravadas,
+            'linhas_rejeitadas': self.linhas_rejeitadas,
+            'linhas_por_segundo': round(self.linhas_gravadas / decorrido, 1) if decorrido else 0.0,
+            'decorrido_s': round(decorrido, 3),
+            'tempos_s': {fase: round(segundos, 3) for fase, segundos in self.tempos.items()},
+        }
+
+    def progress(self) -> None:
+        """Imprime um registro JSON de progresso"""
+        self._last_progress = time.perf_counter()
+        print(json.dumps({'evento': 'progresso', **self.snapshot()}, ensure_ascii=False), flush=True)
+
+    def finish(self, status: str, **extra) -> dict:
+        """
+        Fecha a quarentena, imprime e grava o resumo final da carga
+
+        Returns:
+            Resumo da carga
+        """
+        if self._quarantine is not None:
+            self._quarantine.close()
+            self._quarantine = None
+
+        resumo = {
+            'evento': 'resumo',
+            'status': status,
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'fim': datetime.now().isoformat(timespec='seconds'),
+            **self.snapshot(),
+            'rejeicoes_por_motivo': dict(self.motivos.most_common()),
+            'arquivos': self.arquivos,
+            'quarentena': self.quarantine_path if self.linhas_rejeitadas else None,
+            **extra,
+        }
+
+        print("=" * 50)
+        print(f"{'✓ Importação concluída' if status == 'concluido' else '❌ Importação interrompida'}"
+              f" em {resumo['decorrido_s']:.1f}s")
+        print(f"  Linhas lidas: {self.linhas_lidas}")
+        print(f"  Coletas gravadas: {self.linhas_gravadas}")
+        print(f"  Rejeitadas: {self.linhas_rejeitadas}")
+        print(f"  Vazão: {resumo['linhas_por_segundo']:,.0f} linhas/s")
+        for chave, valor in extra.items():
+            print(f"  {chave.replace('_', ' ').capitalize()}: {valor}")
+        if resumo['quarentena']:
+            print(f"  Quarentena: {resumo['quarentena']}")
+        print("=" * 50)
+        print(json.dumps(resumo, ensure_ascii=False))
+
+        if self.report_path:
+            Path(self.report_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                json.dump(resumo, f, ensure_ascii=False, indent=2)
+            print(f"  Relatório: {self.report_path}")
+
+        return resumo
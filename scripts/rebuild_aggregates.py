@@ -0,0 +1,50 @@
+"""
+Script para reconstruir as tabelas agregadas a partir de coletas_preco
+
+As tabelas são mantidas de forma incremental pela API e pelo loader; a
+reconstrução completa serve para bancos migrados, cargas com --fast ou
+para corrigir divergências.
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database.connection import SessionLocal
+from app.services import PrecoDiarioService, PrecoAtualService, SketchPrecoService
+
+# Tabela agregada -> função de reconstrução (retorna o número de linhas)
+AGGREGATES = {
+    "precos_diarios": PrecoDiarioService.rebuild,
+    "preco_atual": PrecoAtualService.rebuild,
+    "sketches_preco": SketchPrecoService.rebuild,
+}
+
+
+def rebuild(nomes: list[str]) -> None:
+    """Reconstrói as tabelas agregadas informadas, uma transação por tabela"""
+    with SessionLocal() as db:
+        for nome in nomes:
+            inicio = time.perf_counter()
+            linhas = AGGREGATES[nome](db)
+            print(f"✓ {nome}: {linhas} linhas em {time.perf_counter() - inicio:.1f}s")
+
+
+def main():
+    """Executa a reconstrução"""
+    parser = argparse.ArgumentParser(description="Reconstrói as tabelas agregadas de preços")
+    parser.add_argument("tabelas", nargs="*",
+                        help=f"Tabelas a reconstruir (padrão: todas): {', '.join(AGGREGATES)}")
+    args = parser.parse_args()
+    
+    invalidas = set(args.tabelas) - AGGREGATES.keys()
+    if invalidas:
+        parser.error(f"tabelas desconhecidas: {', '.join(sorted(invalidas))}")
+    rebuild(args.tabelas or list(AGGREGATES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Script para converter os CSVs da ANP em Parquet de staging
+"""
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.utils.staging import stage_csv
+from load_data import resolve_input_files
+from load_monitor import LoadMonitor
+
+DEFAULT_OUTPUT_DIR = "data/staging"
+
+
+class _Blocos:
+    """
+    Guarda os blocos registrados por stage_csv em um processo do pool
+
+    O LoadMonitor (e o arquivo de quarentena) fica no processo principal:
+    os blocos, com as linhas rejeitadas, voltam junto com o resultado.
+    """
+
+    def __init__(self):
+        self.blocos = []
+
+    def add_chunk(self, arquivo: str, lidas: int, gravadas: int, rejeitadas, tempos: dict) -> None:
+        self.blocos.append((arquivo, lidas, gravadas, rejeitadas, tempos))
+
+
+def _stage_one(csv_path: str, parquet_path: str, chunksize: int) -> tuple[str, dict, float, list]:
+    """Converte um arquivo e mede o tempo (executado em um processo do pool)"""
+    inicio = time.perf_counter()
+    blocos = _Blocos()
+    stats = stage_csv(csv_path, parquet_path, chunksize, blocos)
+    return csv_path, stats, time.perf_counter() - inicio, blocos.blocos
+
+
+def stage_files(csv_paths: list[str], output_dir: str, chunksize: int,
+                workers: int = None, force: bool = False, monitor: LoadMonitor = None) -> dict:
+    """
+    Converte cada CSV em um Parquet de mesmo nome em output_dir
+
+    Arquivos cujo Parquet é mais novo que o CSV são ignorados, a menos que
+    force seja verdadeiro. Linhas rejeitadas vão para a quarentena do
+    monitor, com arquivo de origem e número da linha, como no loader.
+
+    Returns:
+        Resumo da conversão (ver LoadMonitor.finish)
+    """
+    monitor = monitor or LoadMonitor()
+    tarefas = []
+    for csv_path in csv_paths:
+        parquet_path = Path(output_dir) / (Path(csv_path).stem + ".parquet")
+        if (not force and parquet_path.exists()
+                and parquet_path.stat().st_mtime >= Path(csv_path).stat().st_mtime):
+            print(f"✓ Staging atualizado, ignorando: {csv_path}")
+            monitor.file_done(csv_path, 'ignorado')
+            continue
+        tarefas.append((csv_path, str(parquet_path)))
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_stage_one, csv, parquet, chunksize) for csv, parquet in tarefas]
+            for future, (csv_path, parquet_path) in zip(futures, tarefas):
+                _, stats, decorrido, blocos = future.result()
+                for bloco in blocos:
+                    monitor.add_chunk(*bloco)
+                monitor.file_done(csv_path, 'concluido')
+                csv_mb = Path(csv_path).stat().st_size / 2**20
+                parquet_mb = Path(parquet_path).stat().st_size / 2**20
+                print(f"✓ {csv_path} -> {parquet_path} em {decorrido:.1f}s")
+                print(f"  {stats['linhas_gravadas']} linhas gravadas, "
+                      f"{stats['linhas_rejeitadas']} rejeitadas, "
+                      f"{csv_mb:.1f} MB -> {parquet_mb:.1f} MB")
+    except BaseException:
+        monitor.finish('falhou')
+        raise
+    return monitor.finish('concluido')
+
+
+def main():
+    """Executa a conversão para staging"""
+    parser = argparse.ArgumentParser(description="Converte CSVs da ANP em Parquet de staging")
+    parser.add_argument("csv_path", help="CSV, diretório ou padrão glob")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"Diretório de saída (padrão: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--chunksize", type=int, default=100_000,
+                        help="Linhas por bloco e por row group (padrão: 100000)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processos de conversão (padrão: número de CPUs)")
+    parser.add_argument("--force", action="store_true",
+                        help="Reconverte mesmo se o Parquet estiver atualizado")
+    parser.add_argument("--quarantine", default=None,
+                        help="Arquivo NDJSON das linhas rejeitadas (padrão: data/quarentena/staging_<data>.ndjson)")
+    parser.add_argument("--report", default=None,
+                        help="Arquivo JSON do resumo final (padrão: data/relatorios/staging_<data>.json)")
+    args = parser.parse_args()
+
+    csv_paths = [p for p in resolve_input_files(args.csv_path) if p.endswith(".csv")]
+    if not csv_paths:
+        print(f"❌ Arquivo não encontrado: {args.csv_path}")
+        sys.exit(1)
+
+    carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+    monitor = LoadMonitor(
+        quarantine_path=args.quarantine or f"data/quarentena/staging_{carimbo}.ndjson",
+        report_path=args.report or f"data/relatorios/staging_{carimbo}.json",
+    )
+    stage_files(csv_paths, args.output_dir, args.chunksize, args.workers, args.force, monitor)
+
+
+if __name__ == "__main__":
+    main()
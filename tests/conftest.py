@@ -0,0 +1,148 @@
+"""
+Fixtures dos testes
+
+Os testes usam um banco SQLite temporário, migrado até a última versão e
+com o admin e os produtos padrão de scripts/init_db.py. A URL do banco é
+definida antes de importar o app, que cria o engine na importação.
+"""
+import os
+import sys
+import tempfile
+from itertools import count
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+# Adicionar diretório raiz e scripts ao path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR / "scripts"))
+
+_TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP.name) / 'testes.db'}"
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.database.connection import engine, SessionLocal
+import init_db
+
+API = settings.API_V1_PREFIX
+
+CSV_CABECALHO = (
+    "Regiao - Sigla;Estado - Sigla;Municipio;Revenda;CNPJ da Revenda;Nome da Rua;Numero Rua;"
+    "Complemento;Bairro;Cep;Produto;Data da Coleta;Valor de Venda;Valor de Compra;"
+    "Unidade de Medida;Bandeira\n"
+)
+
+_cnpjs = count(1)
+_produtos = count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def banco():
+    """Banco de testes migrado, com admin e produtos padrão"""
+    init_db.create_tables()
+    init_db.create_admin_user()
+    init_db.create_default_produtos()
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def auth(client) -> dict:
+    """Cabeçalho de autorização do admin"""
+    resposta = client.post(f"{API}/auth/login", data={
+        "username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD,
+    })
+    return {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+
+@pytest.fixture
+def nova_revenda(client, auth):
+    """Cria revendas com CNPJ único; campos informados substituem os padrões"""
+    def criar(**campos) -> dict:
+        numero = next(_cnpjs)
+        dados = {
+            "cnpj": f"11.{numero // 1000:03d}.{numero % 1000:03d}/0001-00",
+            "nome": f"POSTO {numero}",
+            "municipio": "SÃO PAULO",
+            "estado": "SP",
+            "regiao_sigla": "SE",
+            **campos,
+        }
+        resposta = client.post(f"{API}/revendas", json=dados, headers=auth)
+        assert resposta.status_code == 201, resposta.text
+        return resposta.json()
+    return criar
+
+
+@pytest.fixture
+def nova_coleta(client, auth):
+    """Cria uma coleta pela API"""
+    def criar(revenda_id: int, produto_id: int, data_coleta: str, valor_venda: float) -> dict:
+        resposta = client.post(f"{API}/coletas", headers=auth, json={
+            "revenda_id": revenda_id, "produto_id": produto_id, "data_coleta": data_coleta,
+            "valor_venda": valor_venda, "unidade_medida": "R$ / litro",
+        })
+        assert resposta.status_code == 201, resposta.text
+        return resposta.json()
+    return criar
+
+
+@pytest.fixture
+def novo_produto(client, auth):
+    """
+    Produto exclusivo do teste, para que as agregações não vejam coletas de
+    outros testes; o nome recebe um sufixo único
+    """
+    def criar(nome: str) -> dict:
+        resposta = client.post(f"{API}/produtos", headers=auth, json={"nome": f"{nome} {next(_produtos)}"})
+        assert resposta.status_code == 201, resposta.text
+        return resposta.json()
+    return criar
+
+
+def csv_anp(caminho: Path, linhas: list[tuple[int, str, str]]) -> str:
+    """
+    Grava um CSV no formato da ANP para o loader
+
+    Args:
+        caminho: Arquivo a gravar
+        linhas: (número da revenda, data dd/mm/aaaa, valor com vírgula) de
+            gasolina em revendas de Curitiba
+    """
+    caminho.write_text(CSV_CABECALHO + "".join(
+        f"S;PR;CURITIBA;POSTO {revenda};22.000.{revenda:03d}/0001-00;RUA;1;;B;000;GASOLINA;"
+        f"{data};{valor};;R$ / litro;BRANCA\n"
+        for revenda, data, valor in linhas
+    ), encoding="utf-8")
+    return str(caminho)
+
+
+def linhas_tabela(db, tabela: str) -> list[tuple]:
+    """Linhas ordenadas de uma tabela, com floats arredondados"""
+    return sorted(
+        tuple(round(v, 9) if isinstance(v, float) else v for v in linha)
+        for linha in db.execute(text(f"SELECT * FROM {tabela}")).all()
+    )
+
+
+def assert_igual_ao_rebuild(ler, rebuild) -> None:
+    """
+    Confere uma tabela derivada contra a sua reconstrução a partir das coletas
+
+    Args:
+        ler: Função (db) -> conteúdo comparável da tabela
+        rebuild: Rebuild do serviço que mantém a tabela
+    """
+    with SessionLocal() as db:
+        antes = ler(db)
+        rebuild(db)
+        assert ler(db) == antes
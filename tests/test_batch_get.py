@@ -0,0 +1,46 @@
+"""
+Busca em lote por id (POST /{recurso}/batch-get)
+"""
+import pytest
+
+from app.schemas.batch import BATCH_MAX_IDS
+from conftest import API
+
+
+def _batch_get(client, auth, recurso: str, ids: list[int]) -> dict:
+    resposta = client.post(f"{API}/{recurso}/batch-get", headers=auth, json={"ids": ids})
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def test_ordem_repeticoes_e_nao_encontrados(client, auth, nova_revenda, nova_coleta):
+    a, b = nova_revenda(), nova_revenda()
+    coleta = nova_coleta(a["id"], 1, "2043-01-01", 5.0)
+
+    corpo = _batch_get(client, auth, "revendas", [b["id"], 999999, a["id"], b["id"], 888888, 999999])
+    assert [item and item["id"] for item in corpo["items"]] == [b["id"], None, a["id"], b["id"], None, None]
+    assert corpo["items"][0]["cnpj"] == b["cnpj"]
+    assert corpo["not_found"] == [999999, 888888]
+
+    corpo = _batch_get(client, auth, "coletas", [999999, coleta["id"]])
+    assert [item and item["valor_venda"] for item in corpo["items"]] == [None, 5.0]
+    assert corpo["not_found"] == [999999]
+
+    corpo = _batch_get(client, auth, "produtos", [3, 1])
+    assert [item["nome"] for item in corpo["items"]] == ["ETANOL", "GASOLINA"]
+    assert corpo["not_found"] == []
+
+
+def test_mais_ids_que_uma_consulta_in(client, auth, nova_revenda):
+    revenda = nova_revenda()
+    ids = list(range(2_000_000, 2_000_000 + BATCH_MAX_IDS - 1)) + [revenda["id"]]
+
+    corpo = _batch_get(client, auth, "revendas", ids)
+    assert corpo["items"][-1]["id"] == revenda["id"]
+    assert len(corpo["not_found"]) == BATCH_MAX_IDS - 1
+
+
+@pytest.mark.parametrize("ids", [[], list(range(BATCH_MAX_IDS + 1))])
+def test_limites(client, auth, ids):
+    resposta = client.post(f"{API}/coletas/batch-get", headers=auth, json={"ids": ids})
+    assert resposta.status_code == 422
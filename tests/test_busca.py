@@ -0,0 +1,53 @@
+"""
+Busca sem acentos e por substring em município e bandeira das revendas
+"""
+import pytest
+
+from conftest import API
+
+
+def _ids(client, auth, rota: str = "revendas", **params) -> set[int]:
+    resposta = client.get(f"{API}/{rota}", headers=auth, params=params)
+    assert resposta.status_code == 200, resposta.text
+    return {item["id"] for item in resposta.json()["items"]}
+
+
+@pytest.fixture
+def revendas_busca(nova_revenda):
+    return {
+        "acentuada": nova_revenda(municipio="SÃO JOÃO DO ÇARAÍBA", bandeira="ESTRELÃO ÚNICA"),
+        "sem_acento": nova_revenda(municipio="SAO JOAO DO CARAIBA", bandeira="estrelao   unica"),
+        "outra": nova_revenda(municipio="ÇARAÍBA MIRIM", bandeira="OUTRA"),
+    }
+
+
+@pytest.mark.parametrize("termo, esperadas", [
+    ("são joão do çaraíba", {"acentuada", "sem_acento"}),
+    ("  joao   do  ", {"acentuada", "sem_acento"}),
+    ("caraiba", {"acentuada", "sem_acento", "outra"}),
+    ("MIRIM", {"outra"}),
+    # Termos curtos não usam o índice trigram, mas seguem sem acentos
+    ("çA", {"acentuada", "sem_acento", "outra"}),
+])
+def test_municipio(client, auth, revendas_busca, termo, esperadas):
+    ids = {nome: revenda["id"] for nome, revenda in revendas_busca.items()}
+    assert _ids(client, auth, municipio=termo) & set(ids.values()) == {ids[nome] for nome in esperadas}
+
+
+def test_bandeira(client, auth, revendas_busca):
+    ids = {revenda["id"] for revenda in revendas_busca.values()}
+    assert _ids(client, auth, bandeira="estrelão única") & ids == {
+        revendas_busca["acentuada"]["id"], revendas_busca["sem_acento"]["id"]
+    }
+
+
+def test_busca_acompanha_alteracoes(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda(municipio="ITAPIRIMIRIM DO BUSCADOR")
+    nova_coleta(revenda["id"], 1, "2042-01-01", 5.0)
+    assert _ids(client, auth, "coletas", municipio="buscador") != set()
+
+    resposta = client.put(f"{API}/revendas/{revenda['id']}", headers=auth, json={"municipio": "JURUBEBA"})
+    assert resposta.status_code == 200, resposta.text
+    assert _ids(client, auth, municipio="itapirimirim") == set()
+    assert _ids(client, auth, municipio="jurubeba") == {revenda["id"]}
+    assert _ids(client, auth, "coletas", municipio="buscador") == set()
@@ -0,0 +1,56 @@
+"""
+Carga de vários arquivos em paralelo (load_files_parallel)
+"""
+import sys
+from itertools import count
+
+import pytest
+
+import load_data
+from load_data import load_files_parallel, parse_args
+from conftest import csv_anp
+
+
+def _leitor_quebrado(csv_path: str, chunksize: int, skip_chunks: int = 0) -> None:
+    """Falha fora do tratamento de erros de _parse_file, sem avisar o gravador"""
+    raise RuntimeError("leitor quebrado")
+
+
+_revendas = count(70, 2)
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    # Revendas próprias de cada teste: o manifesto ignora conteúdo já carregado
+    base = next(_revendas)
+    return [
+        csv_anp(tmp_path / f"parte{i}.csv", [(base + i, f"{dia:02d}/01/2040", f"5,{base + i}") for dia in (1, 2)])
+        for i in range(2)
+    ]
+
+
+def test_carga(arquivos):
+    resumo = load_files_parallel(arquivos, workers=2, chunksize=1)
+
+    assert resumo["status"] == "concluido"
+    assert resumo["linhas_gravadas"] == 4
+    assert {arquivo: stats["status"] for arquivo, stats in resumo["arquivos"].items()} == dict.fromkeys(
+        arquivos, "concluido"
+    )
+
+
+def test_falha_do_leitor_nao_trava_o_gravador(arquivos, monkeypatch):
+    monkeypatch.setattr(load_data, "_parse_file", _leitor_quebrado)
+    monkeypatch.setattr(load_data, "QUEUE_TIMEOUT", 0.1)
+
+    with pytest.raises(RuntimeError, match="leitor quebrado"):
+        load_files_parallel(arquivos, workers=2)
+
+
+def test_limit_com_varios_arquivos(arquivos, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["load_data.py", str(arquivos[0]).rsplit("/", 1)[0], "--limit", "10"])
+
+    with pytest.raises(SystemExit) as erro:
+        parse_args()
+    assert erro.value.code == 2
+    assert "--limit" in capsys.readouterr().err
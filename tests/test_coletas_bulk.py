@@ -0,0 +1,86 @@
+"""
+Carga em lote POST /coletas/bulk (NDJSON e CSV)
+"""
+import json
+
+from conftest import API
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def _ndjson(registros: list) -> str:
+    return "".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in registros)
+
+
+def _coleta(revenda_id: int, data_coleta: str, valor_venda: float = 5.0, produto_id: int = 1) -> dict:
+    return {"revenda_id": revenda_id, "produto_id": produto_id, "data_coleta": data_coleta,
+            "valor_venda": valor_venda, "unidade_medida": "R$ / litro"}
+
+
+def test_aceitas_e_rejeitadas(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda()
+    nova_coleta(revenda["id"], 1, "2035-01-01", 5.0)
+    corpo = _ndjson([
+        _coleta(revenda["id"], "2035-01-02"),            # 1: aceita
+        _coleta(revenda["id"], "2035-01-01"),            # 2: já cadastrada
+        _coleta(revenda["id"], "2035-01-02", 6.0),       # 3: repetida no lote
+        _coleta(999999, "2035-01-03"),                   # 4: revenda inexistente
+        _coleta(revenda["id"], "2035-01-03", produto_id=999999),  # 5: produto inexistente
+        {**_coleta(revenda["id"], "2035-01-04"), "valor_venda": -1},  # 6: inválida
+        "{nao e json",                                   # 7: JSON malformado
+        _coleta(revenda["id"], "2035-01-05"),            # 8: aceita
+    ])
+
+    resposta = client.post(f"{API}/coletas/bulk", content=corpo, headers={**auth, **NDJSON})
+
+    assert resposta.status_code == 200, resposta.text
+    corpo = resposta.json()
+    assert (corpo["recebidas"], corpo["aceitas"], corpo["rejeitadas"]) == (8, 2, 6)
+    assert [erro["linha"] for erro in corpo["erros"]] == [2, 3, 4, 5, 6, 7]
+    assert corpo["erros"][0]["motivo"] == "Coleta já cadastrada para esta revenda, produto e data"
+    assert corpo["erros"][1]["motivo"] == "Coleta já cadastrada para esta revenda, produto e data"
+    assert corpo["erros"][2]["motivo"] == "Revenda não encontrada"
+    assert corpo["erros"][3]["motivo"] == "Produto não encontrado"
+
+    # Na chave repetida no lote vale a primeira linha
+    coletas = client.get(f"{API}/coletas", headers=auth, params={
+        "data_inicio": "2035-01-02", "data_fim": "2035-01-02", "estado": revenda["estado"],
+    }).json()["items"]
+    assert [(c["revenda_id"], c["valor_venda"]) for c in coletas if c["revenda_id"] == revenda["id"]] == [
+        (revenda["id"], 5.0)
+    ]
+
+
+def test_csv(client, auth, nova_revenda):
+    revenda = nova_revenda()
+    corpo = (
+        "revenda_id,produto_id,data_coleta,valor_venda,unidade_medida\n"
+        f"{revenda['id']},1,2035-02-01,5.10,R$ / litro\n"
+        f"{revenda['id']},1,2035-02-02,5.20,R$ / litro\n"
+    )
+    resposta = client.post(f"{API}/coletas/bulk", content=corpo, headers={**auth, "Content-Type": "text/csv"})
+
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json()["aceitas"] == 2
+
+
+def test_lote_com_mais_ids_que_uma_consulta_in(client, auth, nova_revenda):
+    # Mais revendas distintas que IN_BATCH em um lote de batch_size linhas
+    revenda = nova_revenda()
+    registros = [_coleta(revenda["id"], f"2036-01-{dia:02d}") for dia in range(1, 29)]
+    registros += [_coleta(1_000_000 + i, "2036-02-01") for i in range(1200)]
+
+    resposta = client.post(f"{API}/coletas/bulk", content=_ndjson(registros),
+                           params={"batch_size": 10000}, headers={**auth, **NDJSON})
+
+    assert resposta.status_code == 200, resposta.text
+    assert (resposta.json()["aceitas"], resposta.json()["rejeitadas"]) == (28, 1200)
+
+
+def test_content_type_invalido(client, auth):
+    resposta = client.post(f"{API}/coletas/bulk", content="{}", headers={**auth, "Content-Type": "text/plain"})
+    assert resposta.status_code == 415
+
+
+def test_apenas_admin(client):
+    assert client.post(f"{API}/coletas/bulk", content="{}", headers=NDJSON).status_code == 401
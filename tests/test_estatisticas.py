@@ -0,0 +1,259 @@
+"""
+Estatísticas de preço por grupo, margens e série temporal
+
+Os resultados da API são conferidos contra numpy sobre os mesmos valores.
+"""
+import numpy as np
+import pytest
+
+from app.services import EstatisticaService
+from conftest import API
+
+
+@pytest.fixture
+def coleta_com_compra(client, auth):
+    """Cria uma coleta com valor de compra pela API"""
+    def criar(revenda_id: int, produto_id: int, data_coleta: str, valor_venda: float, valor_compra: float):
+        resposta = client.post(f"{API}/coletas", headers=auth, json={
+            "revenda_id": revenda_id, "produto_id": produto_id, "data_coleta": data_coleta,
+            "valor_venda": valor_venda, "valor_compra": valor_compra, "unidade_medida": "R$ / litro",
+        })
+        assert resposta.status_code == 201, resposta.text
+    return criar
+
+
+def _margens(client, auth, **params) -> list[dict]:
+    resposta = client.get(f"{API}/coletas/margens", headers=auth, params=params)
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()["items"]
+
+
+def test_margens(client, auth, nova_revenda, nova_coleta, novo_produto, coleta_com_compra):
+    produto = novo_produto("PRODUTO MARGENS")
+    revendas = {"IPIRANGA": nova_revenda(bandeira="IPIRANGA"), "RAIZEN": nova_revenda(bandeira="RAIZEN"),
+                None: nova_revenda(bandeira=None)}
+    margens = {"IPIRANGA": [0.3, 0.5, 0.4, 0.9, 0.1], "RAIZEN": [0.7, 0.2], None: [0.6]}
+    for bandeira, valores in margens.items():
+        for dia, margem in enumerate(valores, start=1):
+            coleta_com_compra(revendas[bandeira]["id"], produto["id"], f"2037-01-{dia:02d}", 6.0, 6.0 - margem)
+    # Sem valor_compra, fica de fora
+    nova_coleta(revendas["RAIZEN"]["id"], produto["id"], "2037-01-20", 6.0)
+
+    itens = _margens(client, auth, produto=produto["nome"], agrupar_por="bandeira")
+
+    assert [item["bandeira"] for item in itens] == [None, "IPIRANGA", "RAIZEN"]
+    for item in itens:
+        valores = np.array(margens[item["bandeira"]])
+        assert item["quantidade"] == len(valores)
+        assert (item["minimo"], item["maximo"]) == pytest.approx((valores.min(), valores.max()))
+        assert item["media"] == pytest.approx(valores.mean())
+        assert item["desvio_padrao"] == (pytest.approx(valores.std(ddof=1)) if len(valores) > 1 else None)
+        quantis = np.quantile(valores, list(EstatisticaService.PERCENTIS_MARGEM.values()))
+        assert [item[p] for p in EstatisticaService.PERCENTIS_MARGEM] == pytest.approx(quantis)
+
+    # Sem dimensões, por mês
+    [total] = _margens(client, auth, produto=produto["nome"], periodo="mes")
+    assert (total["periodo"], total["quantidade"]) == ("2037-01-01", 8)
+    assert total["mediana"] == pytest.approx(np.median(sum(margens.values(), [])))
+
+
+def test_margens_invalidadas_por_escrita(client, auth, nova_revenda, novo_produto, coleta_com_compra):
+    produto = novo_produto("PRODUTO MARGENS CACHE")
+    revenda = nova_revenda()
+    coleta_com_compra(revenda["id"], produto["id"], "2037-02-01", 6.0, 5.0)
+    assert _margens(client, auth, produto=produto["nome"])[0]["quantidade"] == 1
+
+    coleta_com_compra(revenda["id"], produto["id"], "2037-02-02", 6.0, 5.5)
+    assert _margens(client, auth, produto=produto["nome"])[0]["quantidade"] == 2
+
+
+def test_margens_acima_do_limite(client, auth, nova_revenda, novo_produto, coleta_com_compra, monkeypatch):
+    produto = novo_produto("PRODUTO MARGENS LIMITE")
+    revenda = nova_revenda()
+    for dia in (1, 2):
+        coleta_com_compra(revenda["id"], produto["id"], f"2037-03-{dia:02d}", 6.0, 5.0)
+    monkeypatch.setattr(EstatisticaService, "MAX_COLETAS_MARGEM", 1)
+
+    resposta = client.get(f"{API}/coletas/margens", headers=auth, params={"produto": produto["nome"]})
+    assert resposta.status_code == 400
+
+
+def _serie(client, auth, produto_id: int, **params) -> list[tuple]:
+    """(período, média, mediana, quantidade) de cada ponto da série"""
+    resposta = client.get(f"{API}/produtos/{produto_id}/serie", headers=auth, params=params)
+    assert resposta.status_code == 200, resposta.text
+    return [(p["periodo"], p["media"], p["mediana"], p["quantidade"]) for p in resposta.json()["pontos"]]
+
+
+@pytest.fixture
+def produto_serie(request, nova_revenda, nova_coleta, novo_produto):
+    """Produto com coletas em São Paulo e Niterói de janeiro a março de 2038"""
+    produto = novo_produto(f"PRODUTO {request.node.name}")
+    sp, rj = nova_revenda(), nova_revenda(estado="RJ", municipio="NITERÓI", regiao_sigla="SE")
+    outra_sp = nova_revenda()
+    coletas = [
+        (sp, "2038-01-05", 5.0), (rj, "2038-01-05", 6.0), (outra_sp, "2038-01-06", 5.4),
+        (sp, "2038-01-25", 5.2), (rj, "2038-01-26", 6.2),
+        (sp, "2038-03-02", 5.6), (rj, "2038-03-03", 6.4), (outra_sp, "2038-03-31", 5.8),
+    ]
+    for revenda, data, valor in coletas:
+        nova_coleta(revenda["id"], produto["id"], data, valor)
+    return produto
+
+
+def _esperado(valores: list[float]) -> tuple:
+    return pytest.approx(np.mean(valores)), pytest.approx(np.median(valores)), len(valores)
+
+
+def test_serie_mensal(client, auth, produto_serie):
+    pontos = _serie(client, auth, produto_serie["id"])
+
+    assert pontos == [
+        ("2038-01-01", *_esperado([5.0, 6.0, 5.4, 5.2, 6.2])),
+        ("2038-02-01", None, None, 0),
+        ("2038-03-01", *_esperado([5.6, 6.4, 5.8])),
+    ]
+
+
+def test_serie_mensal_com_meses_cortados(client, auth, produto_serie):
+    # Janeiro e março entram só com as coletas dentro do intervalo
+    pontos = _serie(client, auth, produto_serie["id"], estado="SP",
+                    data_inicio="2038-01-06", data_fim="2038-03-30", preencher=True)
+
+    assert pontos == [
+        ("2038-01-01", *_esperado([5.4, 5.2])),
+        ("2038-02-01", *_esperado([5.4, 5.2])[:2], 0),
+        ("2038-03-01", *_esperado([5.6])),
+    ]
+
+
+def test_serie_anual(client, auth, produto_serie):
+    assert _serie(client, auth, produto_serie["id"], frequencia="ano") == [
+        ("2038-01-01", *_esperado([5.0, 6.0, 5.4, 5.2, 6.2, 5.6, 6.4, 5.8])),
+    ]
+
+
+def test_serie_semanal_por_municipio(client, auth, produto_serie):
+    pontos = _serie(client, auth, produto_serie["id"], frequencia="semana", municipio="niteroi",
+                    data_inicio="2038-01-01", data_fim="2038-01-31")
+
+    # Semanas começam na segunda-feira; 2038-01-01 é uma sexta
+    assert [p[0] for p in pontos] == ["2037-12-28", "2038-01-04", "2038-01-11", "2038-01-18", "2038-01-25"]
+    assert pontos[1] == ("2038-01-04", *_esperado([6.0]))
+    assert pontos[4] == ("2038-01-25", *_esperado([6.2]))
+    assert [p[3] for p in pontos] == [0, 1, 0, 0, 1]
+
+
+def test_serie_acima_do_limite(client, auth, produto_serie, monkeypatch):
+    monkeypatch.setattr(EstatisticaService, "MAX_COLETAS_SERIE", 2)
+
+    resposta = client.get(f"{API}/produtos/{produto_serie['id']}/serie", headers=auth,
+                          params={"frequencia": "semana"})
+    assert resposta.status_code == 400
+    # A série mensal não lê as coletas individuais
+    assert client.get(f"{API}/produtos/{produto_serie['id']}/serie", headers=auth).status_code == 200
+
+
+def test_serie_produto_inexistente(client, auth):
+    assert client.get(f"{API}/produtos/999999/serie", headers=auth).status_code == 404
+
+
+@pytest.fixture
+def produto_estatisticas(nova_revenda, nova_coleta, novo_produto):
+    """Produto com coletas em duas UFs e duas bandeiras em janeiro e fevereiro de 2045"""
+    produto = novo_produto("PRODUTO ESTATISTICAS")
+    revendas = {"SP": nova_revenda(bandeira="ALFA"), "RJ": nova_revenda(estado="RJ", municipio="NITEROI",
+                                                                       bandeira="BETA")}
+    coletas = [("SP", "2045-01-02", 5.0), ("SP", "2045-01-20", 5.4), ("RJ", "2045-01-03", 6.0),
+               ("SP", "2045-02-01", 5.8), ("RJ", "2045-02-10", 6.1), ("RJ", "2045-02-11", 6.5)]
+    for uf, data, valor in coletas:
+        nova_coleta(revendas[uf]["id"], produto["id"], data, valor)
+    return produto, coletas
+
+
+def _assert_grupo(item: dict, valores: list[float]) -> None:
+    assert item["quantidade"] == len(valores)
+    assert (item["media"], item["minimo"], item["maximo"]) == pytest.approx(
+        (np.mean(valores), min(valores), max(valores))
+    )
+    assert item["desvio_padrao"] == (pytest.approx(np.std(valores, ddof=1)) if len(valores) > 1 else None)
+
+
+def test_estatisticas(client, auth, produto_estatisticas):
+    produto, coletas = produto_estatisticas
+    resposta = client.get(f"{API}/coletas/estatisticas", headers=auth, params={
+        "produto": produto["nome"], "agrupar_por": "estado", "periodo": "mes",
+    })
+    assert resposta.status_code == 200, resposta.text
+    itens = resposta.json()["items"]
+
+    assert [(item["estado"], item["periodo"]) for item in itens] == [
+        ("RJ", "2045-01-01"), ("RJ", "2045-02-01"), ("SP", "2045-01-01"), ("SP", "2045-02-01"),
+    ]
+    for item in itens:
+        _assert_grupo(item, [valor for uf, data, valor in coletas
+                             if uf == item["estado"] and data[:7] == item["periodo"][:7]])
+
+
+def test_estatisticas_por_bandeira(client, auth, produto_estatisticas):
+    # Bandeira não está no agregado diário: a consulta lê as coletas
+    produto, coletas = produto_estatisticas
+    resposta = client.get(f"{API}/coletas/estatisticas", headers=auth, params={
+        "produto": produto["nome"], "agrupar_por": "bandeira", "data_fim": "2045-01-31",
+    })
+    assert resposta.status_code == 200, resposta.text
+    itens = resposta.json()["items"]
+
+    assert [item["bandeira"] for item in itens] == ["ALFA", "BETA"]
+    _assert_grupo(itens[0], [5.0, 5.4])
+    _assert_grupo(itens[1], [6.0])
+
+
+def test_estatisticas_dimensao_invalida(client, auth):
+    resposta = client.get(f"{API}/coletas/estatisticas", headers=auth, params={"agrupar_por": "estado,cor"})
+    assert resposta.status_code == 400
+
+
+def _variacao(client, auth, produto: dict, **params) -> list[dict]:
+    resposta = client.get(f"{API}/coletas/variacao", headers=auth, params={
+        "produto": produto["nome"], "base_inicio": "2045-01-01", "base_fim": "2045-01-31",
+        "atual_inicio": "2045-02-01", "atual_fim": "2045-02-28", **params,
+    })
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()["items"]
+
+
+@pytest.mark.parametrize("agrupar_por, chave", [
+    ("estado", "estado"), ("municipio", "estado"), ("bandeira", "bandeira"), ("revenda", "estado"),
+])
+def test_variacao(client, auth, nova_revenda, nova_coleta, produto_estatisticas, agrupar_por, chave):
+    produto, _ = produto_estatisticas
+    # Só no período base: fica fora do ranking
+    mg = nova_revenda(estado="MG", municipio="BELO HORIZONTE", bandeira="GAMA")
+    nova_coleta(mg["id"], produto["id"], "2045-01-15", 4.0)
+
+    itens = _variacao(client, auth, produto, agrupar_por=agrupar_por)
+
+    # SP: 5,20 -> 5,80 (+11,5%); RJ: 6,00 -> 6,30 (+5%)
+    esperado = {"estado": ["SP", "RJ"], "bandeira": ["ALFA", "BETA"]}[chave]
+    assert [(item["posicao"], item[chave]) for item in itens] == [(1, esperado[0]), (2, esperado[1])]
+    assert (itens[0]["quantidade_base"], itens[0]["quantidade_atual"]) == (2, 1)
+    assert (itens[0]["media_base"], itens[0]["media_atual"]) == pytest.approx((5.2, 5.8))
+    assert itens[0]["variacao_absoluta"] == pytest.approx(0.6)
+    assert itens[0]["variacao_percentual"] == pytest.approx(100 * 0.6 / 5.2)
+    assert itens[1]["variacao_percentual"] == pytest.approx(5.0)
+
+
+def test_variacao_crescente_e_filtros(client, auth, produto_estatisticas):
+    produto, _ = produto_estatisticas
+    assert [item["estado"] for item in _variacao(client, auth, produto, crescente=True)] == ["RJ", "SP"]
+    assert [item["estado"] for item in _variacao(client, auth, produto, limit=1)] == ["SP"]
+    assert [item["estado"] for item in _variacao(client, auth, produto, estado="rj")] == ["RJ"]
+
+
+def test_variacao_periodo_invalido(client, auth):
+    resposta = client.get(f"{API}/coletas/variacao", headers=auth, params={
+        "produto": "GASOLINA", "base_inicio": "2045-01-31", "base_fim": "2045-01-01",
+        "atual_inicio": "2045-02-01", "atual_fim": "2045-02-28",
+    })
+    assert resposta.status_code == 400
@@ -0,0 +1,151 @@
+"""
+Listagens de coletas e revendas: paginação, total e campos
+"""
+import pytest
+from sqlalchemy import event, text
+
+from app.database.connection import SessionLocal, engine
+from conftest import API
+
+
+def _paginas(client, auth, rota: str, limit: int, **params) -> list[list[dict]]:
+    """Percorre uma listagem pelo cursor, da página inicial até next_cursor nulo"""
+    paginas, cursor = [], ""
+    while cursor is not None:
+        resposta = client.get(f"{API}/{rota}", headers=auth, params={**params, "limit": limit, "cursor": cursor})
+        assert resposta.status_code == 200, resposta.text
+        corpo = resposta.json()
+        paginas.append(corpo["items"])
+        cursor = corpo["next_cursor"]
+    return paginas
+
+
+@pytest.fixture
+def municipio(request) -> str:
+    """Município exclusivo do teste (o nome de um teste não contém o de outro)"""
+    return request.node.name.replace("_", " ").upper()
+
+
+@pytest.fixture
+def coletas_paginadas(municipio, nova_revenda, nova_coleta):
+    """Seis coletas em duas revendas do município do teste, com datas repetidas"""
+    revendas = [nova_revenda(municipio=municipio) for _ in range(2)]
+    for revenda in revendas:
+        for dia in (1, 2, 3):
+            nova_coleta(revenda["id"], 1, f"2041-01-{dia:02d}", 5.0 + dia / 10)
+    return revendas
+
+
+def test_cursor_coletas(client, auth, municipio, coletas_paginadas):
+    paginas = _paginas(client, auth, "coletas", 4, municipio=municipio.lower())
+
+    assert [len(p) for p in paginas] == [4, 2]
+    todas = client.get(f"{API}/coletas", headers=auth, params={"municipio": municipio}).json()["items"]
+    # Mesma ordem (data e id decrescentes) da paginação por offset, sem repetir nem pular
+    assert [c["id"] for pagina in paginas for c in pagina] == [c["id"] for c in todas]
+    assert [(c["data_coleta"], c["id"]) for c in todas] == sorted(
+        ((c["data_coleta"], c["id"]) for c in todas), reverse=True
+    )
+
+
+def test_cursor_revendas(client, auth, municipio, coletas_paginadas):
+    # Página cheia na última: o cursor seguinte devolve uma página vazia
+    paginas = _paginas(client, auth, "revendas", 1, municipio=municipio)
+
+    assert [[r["id"] for r in p] for p in paginas] == [[r["id"]] for r in coletas_paginadas] + [[]]
+
+
+@pytest.mark.parametrize("rota", ["coletas", "revendas"])
+def test_cursor_invalido(client, auth, rota):
+    resposta = client.get(f"{API}/{rota}", headers=auth, params={"cursor": "nao-e-um-cursor"})
+    assert resposta.status_code == 400
+
+
+def _total(client, auth, rota: str, include_total: str, **params):
+    resposta = client.get(f"{API}/{rota}", headers=auth, params={**params, "include_total": include_total})
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()["total"]
+
+
+def test_include_total(client, auth, municipio, coletas_paginadas, nova_coleta):
+    assert _total(client, auth, "coletas", "exact", municipio=municipio) == 6
+    assert _total(client, auth, "coletas", "off", municipio=municipio) is None
+
+    # Escrita fora da API (como a de um loader em outro processo): estimated
+    # continua com a contagem em cache, exact conta de novo. A coleta é
+    # removida do mesmo jeito, para não desalinhar as tabelas derivadas
+    parametros = {"revenda_id": coletas_paginadas[0]["id"]}
+    with SessionLocal() as db:
+        db.execute(text(
+            "INSERT INTO coletas_preco (revenda_id, produto_id, data_coleta, valor_venda, unidade_medida) "
+            "VALUES (:revenda_id, 2, '2041-01-01', 5.0, 'R$ / litro')"
+        ), parametros)
+        db.commit()
+    assert _total(client, auth, "coletas", "estimated", municipio=municipio) == 6
+    assert _total(client, auth, "coletas", "exact", municipio=municipio) == 7
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM coletas_preco WHERE revenda_id = :revenda_id AND produto_id = 2"), parametros)
+        db.commit()
+
+    # Escritas da API invalidam a contagem
+    nova_coleta(coletas_paginadas[0]["id"], 3, "2041-01-01", 4.0)
+    assert _total(client, auth, "coletas", "estimated", municipio=municipio) == 7
+    assert _total(client, auth, "revendas", "estimated", municipio=municipio) == 2
+
+
+@pytest.fixture
+def sqls():
+    """SELECTs emitidos pelo engine durante o teste"""
+    emitidos = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            emitidos.append(statement)
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    yield emitidos
+    event.remove(engine, "before_cursor_execute", registrar)
+
+
+def test_detalhado_em_uma_consulta(client, auth, municipio, coletas_paginadas, sqls):
+    resposta = client.get(f"{API}/coletas/detalhado", headers=auth,
+                          params={"municipio": municipio, "include_total": "off"})
+
+    assert resposta.status_code == 200, resposta.text
+    itens = resposta.json()["items"]
+    assert len(itens) == 6
+    nomes = {revenda["id"]: revenda["nome"] for revenda in coletas_paginadas}
+    for item in itens:
+        assert (item["revenda_nome"], item["revenda_municipio"], item["revenda_estado"], item["produto_nome"]) == (
+            nomes[item["revenda_id"]], municipio, "SP", "GASOLINA"
+        )
+    # Revenda e produto vêm na consulta da página, não em uma consulta por item
+    assert len([sql for sql in sqls if "revendas" in sql or "produtos" in sql]) == 1
+
+
+@pytest.mark.parametrize("rota, campos", [
+    ("coletas", ["valor_venda", "data_coleta"]),
+    ("coletas/detalhado", ["revenda_nome", "produto_nome", "valor_venda"]),
+    ("revendas", ["nome"]),
+])
+def test_fields(client, auth, municipio, coletas_paginadas, sqls, rota, campos):
+    resposta = client.get(f"{API}/{rota}", headers=auth, params={
+        "municipio": municipio, "fields": ",".join(campos), "include_total": "off",
+    })
+
+    assert resposta.status_code == 200, resposta.text
+    itens = resposta.json()["items"]
+    assert itens and all(list(item) == campos for item in itens)
+    # Só as colunas pedidas (e a chave de ordenação) são consultadas
+    assert not any("unidade_medida" in sql or "cnpj" in sql for sql in sqls)
+
+
+def test_fields_com_cursor(client, auth, municipio, coletas_paginadas):
+    paginas = _paginas(client, auth, "coletas", 4, municipio=municipio, fields="valor_venda")
+    assert [len(p) for p in paginas] == [4, 2]
+    assert all(list(item) == ["valor_venda"] for pagina in paginas for item in pagina)
+
+
+def test_fields_invalidos(client, auth):
+    resposta = client.get(f"{API}/coletas", headers=auth, params={"fields": "valor_venda,senha"})
+    assert resposta.status_code == 400
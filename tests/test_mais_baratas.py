@@ -0,0 +1,52 @@
+"""
+Ranking das revendas mais baratas (GET /coletas/mais-baratas)
+"""
+import pytest
+
+from conftest import API
+
+
+@pytest.fixture
+def ranking(nova_revenda, nova_coleta, novo_produto):
+    """Produto exclusivo com coletas até 2044-03-31 (data de referência)"""
+    produto = novo_produto("PRODUTO MAIS BARATAS")
+    revendas = {nome: nova_revenda() for nome in "abce"}
+    revendas["d"] = nova_revenda(estado="RJ", municipio="NITERÓI")
+    for nome, data, valor in [
+        ("a", "2044-03-01", 4.0), ("a", "2044-03-31", 6.0),  # vale a coleta mais recente
+        ("b", "2044-03-20", 5.0),
+        ("c", "2044-02-01", 3.0),                           # fora da janela de 30 dias
+        ("d", "2044-03-30", 5.5),
+        ("e", "2044-03-25", 5.0),                           # empate com b: a mais recente antes
+    ]:
+        nova_coleta(revendas[nome]["id"], produto["id"], data, valor)
+    return produto, revendas
+
+
+def _ranking(client, auth, produto: dict, revendas: dict, **params) -> tuple:
+    resposta = client.get(f"{API}/coletas/mais-baratas", headers=auth,
+                          params={"produto": produto["nome"].lower(), **params})
+    assert resposta.status_code == 200, resposta.text
+    corpo = resposta.json()
+    nomes = {revenda["id"]: nome for nome, revenda in revendas.items()}
+    return corpo["data_referencia"], [(item["posicao"], nomes[item["revenda_id"]], item["valor_venda"])
+                                      for item in corpo["items"]]
+
+
+def test_ranking(client, auth, ranking):
+    assert _ranking(client, auth, *ranking) == ("2044-03-31", [
+        (1, "e", 5.0), (2, "b", 5.0), (3, "d", 5.5), (4, "a", 6.0),
+    ])
+    assert _ranking(client, auth, *ranking, k=2)[1] == [(1, "e", 5.0), (2, "b", 5.0)]
+    assert _ranking(client, auth, *ranking, dias=60)[1][0] == (1, "c", 3.0)
+
+
+def test_filtros(client, auth, ranking):
+    assert _ranking(client, auth, *ranking, estado="rj")[1] == [(1, "d", 5.5)]
+    assert _ranking(client, auth, *ranking, municipio="niteroi")[1] == [(1, "d", 5.5)]
+
+
+def test_produto_inexistente(client, auth):
+    resposta = client.get(f"{API}/coletas/mais-baratas", headers=auth, params={"produto": "NAO EXISTE"})
+    assert resposta.status_code == 200, resposta.text
+    assert (resposta.json()["data_referencia"], resposta.json()["items"]) == (None, [])
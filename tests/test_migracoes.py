@@ -0,0 +1,44 @@
+"""
+Migrações a partir do schema anterior ao Alembic
+
+Bancos criados por create_all antes das migrações são marcados como 0001
+por init_db; as migrações seguintes devem criar o manifesto de ingestão e
+a chave natural das coletas, removendo duplicatas.
+"""
+from alembic import command
+from sqlalchemy import create_engine, inspect, text
+
+from init_db import alembic_config
+
+
+def test_banco_da_versao_inicial(tmp_path):
+    url = f"sqlite:///{tmp_path / 'inicial.db'}"
+    config = alembic_config()
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "0001")
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO produtos (nome) VALUES ('GASOLINA')"))
+        conn.execute(text(
+            "INSERT INTO revendas (cnpj, nome, municipio, estado, regiao_sigla) "
+            "VALUES ('00.000.000/0001-00', 'POSTO', 'SÃO PAULO', 'SP', 'SE')"
+        ))
+        conn.execute(text(
+            "INSERT INTO coletas_preco (data_coleta, valor_venda, unidade_medida, revenda_id, produto_id) "
+            "VALUES ('2024-01-01', 5.0, 'R$ / litro', 1, 1), ('2024-01-01', 6.0, 'R$ / litro', 1, 1), "
+            "('2024-01-02', 7.0, 'R$ / litro', 1, 1)"
+        ))
+
+    command.upgrade(config, "head")
+    inspector = inspect(engine)
+    with engine.connect() as conn:
+        coletas = conn.execute(text("SELECT id, valor_venda FROM coletas_preco ORDER BY id")).all()
+        diario = conn.execute(text("SELECT data, quantidade FROM precos_diarios ORDER BY data")).all()
+    engine.dispose()
+
+    assert inspector.has_table("ingestao_arquivos")
+    assert "uq_coleta_revenda_produto_data" in {uq["name"] for uq in inspector.get_unique_constraints("coletas_preco")}
+    # Das duplicatas fica a de menor id, e os agregados já não as contam
+    assert coletas == [(1, 5.0), (3, 7.0)]
+    assert diario == [("2024-01-01", 1), ("2024-01-02", 1)]
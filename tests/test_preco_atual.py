@@ -0,0 +1,57 @@
+"""
+Instantâneo preco_atual e preços atuais de uma revenda
+
+Depois de cada escrita da API ou do loader, preco_atual deve ser igual ao
+que PrecoAtualService.rebuild calcula a partir de coletas_preco.
+"""
+from app.services import PrecoAtualService
+from load_data import load_csv_data
+from conftest import API, csv_anp, linhas_tabela, assert_igual_ao_rebuild
+
+
+def assert_consistente():
+    assert_igual_ao_rebuild(lambda db: linhas_tabela(db, "preco_atual"), PrecoAtualService.rebuild)
+
+
+def _precos(client, auth, revenda_id: int) -> dict:
+    """{produto_id: (data_coleta, valor_venda)} de GET /revendas/{id}/precos"""
+    resposta = client.get(f"{API}/revendas/{revenda_id}/precos", headers=auth)
+    assert resposta.status_code == 200, resposta.text
+    return {item["produto_id"]: (item["data_coleta"], item["valor_venda"]) for item in resposta.json()["items"]}
+
+
+def test_coleta_mais_recente_prevalece(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda()
+    nova_coleta(revenda["id"], 1, "2032-01-10", 5.0)
+    nova_coleta(revenda["id"], 1, "2032-01-05", 4.0)
+    nova_coleta(revenda["id"], 2, "2032-01-01", 6.0)
+
+    assert _precos(client, auth, revenda["id"]) == {1: ("2032-01-10", 5.0), 2: ("2032-01-01", 6.0)}
+    assert_consistente()
+
+
+def test_update_e_delete_voltam_a_coleta_anterior(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda()
+    nova_coleta(revenda["id"], 1, "2032-02-01", 5.0)
+    recente = nova_coleta(revenda["id"], 1, "2032-02-10", 5.5)
+
+    resposta = client.put(f"{API}/coletas/{recente['id']}", headers=auth, json={"data_coleta": "2032-01-20"})
+    assert resposta.status_code == 200, resposta.text
+    assert _precos(client, auth, revenda["id"]) == {1: ("2032-02-01", 5.0)}
+    assert_consistente()
+
+    assert client.delete(f"{API}/coletas/{recente['id']}", headers=auth).status_code == 204
+    assert _precos(client, auth, revenda["id"]) == {1: ("2032-02-01", 5.0)}
+    assert_consistente()
+
+
+def test_revenda_inexistente(client, auth):
+    assert client.get(f"{API}/revendas/999999/precos", headers=auth).status_code == 404
+
+
+def test_carga_em_blocos(tmp_path):
+    # Datas fora de ordem, espalhadas por blocos de 2 linhas
+    linhas = [(40, "05/03/2032", "5,00"), (40, "09/03/2032", "5,90"), (40, "01/03/2032", "4,00"),
+              (41, "02/03/2032", "6,00"), (40, "07/03/2032", "5,50")]
+    load_csv_data(csv_anp(tmp_path / "carga.csv", linhas), chunksize=2)
+    assert_consistente()
@@ -0,0 +1,128 @@
+"""
+Manutenção do agregado diário precos_diarios
+
+Depois de cada escrita da API ou do loader, o agregado deve ser igual ao
+que PrecoDiarioService.rebuild calcula a partir de coletas_preco.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.database.connection import SessionLocal
+from app.services import PrecoDiarioService
+from load_data import load_csv_data
+from conftest import API, csv_anp, linhas_tabela, assert_igual_ao_rebuild
+
+
+def assert_consistente():
+    assert_igual_ao_rebuild(lambda db: linhas_tabela(db, "precos_diarios"), PrecoDiarioService.rebuild)
+
+
+def _diario(revenda: dict, produto_id: int, data: str):
+    """(quantidade, soma, mínimo, máximo) do agregado no município da revenda"""
+    with SessionLocal() as db:
+        linha = db.execute(text(
+            "SELECT quantidade, soma, minimo, maximo FROM precos_diarios "
+            "WHERE data = :data AND produto_id = :produto_id AND estado = :estado AND municipio = :municipio"
+        ), {"data": data, "produto_id": produto_id,
+            "estado": revenda["estado"], "municipio": revenda["municipio"]}).first()
+    return tuple(linha) if linha else None
+
+
+def test_create_soma_ao_dia(nova_revenda, nova_coleta):
+    a, b = nova_revenda(municipio="CAMPINAS"), nova_revenda(municipio="CAMPINAS")
+    nova_coleta(a["id"], 1, "2031-01-10", 5.0)
+    nova_coleta(b["id"], 1, "2031-01-10", 6.5)
+
+    assert _diario(a, 1, "2031-01-10") == (2, 11.5, 5.0, 6.5)
+    assert_consistente()
+
+
+def test_update_recalcula_dias(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda()
+    coleta = nova_coleta(revenda["id"], 1, "2031-02-10", 5.0)
+    nova_coleta(revenda["id"], 1, "2031-02-11", 7.0)
+
+    resposta = client.put(f"{API}/coletas/{coleta['id']}", headers=auth,
+                          json={"data_coleta": "2031-03-01", "valor_venda": 4.0})
+    assert resposta.status_code == 200, resposta.text
+    assert _diario(revenda, 1, "2031-02-10") is None
+    assert _diario(revenda, 1, "2031-03-01") == (1, 4.0, 4.0, 4.0)
+    assert_consistente()
+
+
+def test_delete_remove_do_agregado(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda()
+    nova_coleta(revenda["id"], 2, "2031-04-01", 5.0)
+    coleta = nova_coleta(revenda["id"], 2, "2031-04-02", 5.5)
+
+    assert client.delete(f"{API}/coletas/{coleta['id']}", headers=auth).status_code == 204
+    assert _diario(revenda, 2, "2031-04-02") is None
+    assert_consistente()
+
+
+def test_bulk_create_soma_ao_dia(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda(municipio="SANTOS")
+    nova_coleta(revenda["id"], 1, "2031-05-01", 6.0)
+    linhas = "".join(
+        f'{{"data_coleta": "2031-05-0{dia}", "valor_venda": {valor}, "unidade_medida": "R$ / litro", '
+        f'"revenda_id": {revenda["id"]}, "produto_id": 1}}\n'
+        for dia, valor in [(2, 5.0), (3, 5.5)]
+    )
+    resposta = client.post(f"{API}/coletas/bulk", content=linhas,
+                           headers={**auth, "Content-Type": "application/x-ndjson"})
+
+    assert resposta.status_code == 200, resposta.text
+    assert _diario(revenda, 1, "2031-05-02") == (1, 5.0, 5.0, 5.0)
+    assert_consistente()
+
+
+def test_revenda_muda_de_estado(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda()
+    nova_coleta(revenda["id"], 3, "2031-06-01", 4.0)
+
+    resposta = client.put(f"{API}/revendas/{revenda['id']}", headers=auth,
+                          json={"estado": "RJ", "municipio": "RIO DE JANEIRO"})
+    assert resposta.status_code == 200, resposta.text
+    assert _diario(revenda, 3, "2031-06-01") is None
+    assert _diario(resposta.json(), 3, "2031-06-01") == (1, 4.0, 4.0, 4.0)
+    assert_consistente()
+
+
+def test_delete_revenda(client, auth, nova_revenda, nova_coleta):
+    revenda = nova_revenda()
+    nova_coleta(revenda["id"], 1, "2031-08-01", 5.0)
+
+    assert client.delete(f"{API}/revendas/{revenda['id']}", headers=auth).status_code == 204
+    assert _diario(revenda, 1, "2031-08-01") is None
+    assert_consistente()
+
+
+def test_delete_produto(client, auth, nova_revenda, nova_coleta):
+    produto = client.post(f"{API}/produtos", headers=auth, json={"nome": "PRODUTO DIARIO"}).json()
+    revenda = nova_revenda()
+    nova_coleta(revenda["id"], produto["id"], "2031-09-01", 3.0)
+
+    assert client.delete(f"{API}/produtos/{produto['id']}", headers=auth).status_code == 204
+    assert _diario(revenda, produto["id"], "2031-09-01") is None
+    assert_consistente()
+
+
+# Blocos de 2 linhas espalham dias e chaves repetidas por vários blocos
+@pytest.mark.parametrize("chunksize, mes", [(2, 10), (100, 11)])
+def test_carga_e_recarga(tmp_path, chunksize, mes):
+    linhas = [(revenda, f"{dia:02d}/{mes}/2031", f"{4 + revenda / 10 + dia / 100:.2f}".replace(".", ","))
+              for revenda in range(1, 4) for dia in range(1, 4)]
+    # Chave repetida no arquivo: vale a última linha, como no upsert
+    linhas.append((1, f"01/{mes}/2031", "9,99"))
+    curitiba = {"estado": "PR", "municipio": "CURITIBA"}
+
+    caminho = csv_anp(tmp_path / "carga.csv", linhas)
+    assert load_csv_data(caminho, chunksize=chunksize)["linhas_gravadas"] == len(linhas)
+    assert _diario(curitiba, 1, f"2031-{mes}-01")[0] == 3
+    assert_consistente()
+
+    # Recarga com valores novos substitui as coletas gravadas
+    caminho = csv_anp(tmp_path / "carga.csv", [(revenda, data, "5,00") for revenda, data, _ in linhas[:3]])
+    load_csv_data(caminho, chunksize=chunksize, force=True)
+    assert _diario(curitiba, 1, f"2031-{mes}-01")[1:] == (5.0 + 4.21 + 4.31, 4.21, 5.0)
+    assert_consistente()
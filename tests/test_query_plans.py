@@ -0,0 +1,30 @@
+"""
+Planos de consulta das listagens (casos de scripts/check_query_plans.py)
+
+Roda em um banco próprio, migrado do zero, como o script sem --database-url.
+"""
+import pytest
+from alembic import command
+from sqlalchemy import create_engine
+
+from check_query_plans import CASES, case_failures, seed
+from init_db import alembic_config
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('planos') / 'plans.db'}"
+    config = alembic_config()
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    seed(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("descricao, run, index, ordered", CASES, ids=[case[0] for case in CASES])
+def test_plano(engine, descricao, run, index, ordered):
+    falhas, plan = case_failures(engine, descricao, run, index, ordered)
+    assert not falhas, f"{', '.join(falhas)}\n{plan}"
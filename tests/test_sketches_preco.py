@@ -0,0 +1,90 @@
+"""
+Sketches de quantis sketches_preco e percentis de preço
+
+Depois de cada escrita da API ou do loader, os sketches devem estimar os
+mesmos quantis que SketchPrecoService.rebuild; os percentis da API são
+conferidos contra numpy.quantile.
+"""
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from app.services import SketchPrecoService
+from app.utils.tdigest import TDigest
+from load_data import load_csv_data
+from conftest import API, csv_anp, assert_igual_ao_rebuild
+
+QUANTIS = [0.0, 0.1, 0.5, 0.9, 1.0]
+
+
+def _sketches(db) -> list[tuple]:
+    """Chave, contagens e quantis de cada sketch (os bytes dependem da ordem das fusões)"""
+    return sorted(
+        (mes, produto_id, estado, regiao_sigla, quantidade, minimo, maximo,
+         tuple(TDigest.from_bytes(centroides, minimo, maximo).quantis(QUANTIS).round(9)))
+        for mes, produto_id, estado, regiao_sigla, quantidade, minimo, maximo, centroides
+        in db.execute(text("SELECT * FROM sketches_preco")).all()
+    )
+
+
+def assert_consistente():
+    assert_igual_ao_rebuild(_sketches, SketchPrecoService.rebuild)
+
+
+def test_escritas_da_api(client, auth, nova_revenda, nova_coleta):
+    sp, rj = nova_revenda(), nova_revenda(estado="RJ", municipio="NITEROI")
+    coleta = nova_coleta(sp["id"], 1, "2033-01-10", 5.0)
+    nova_coleta(rj["id"], 1, "2033-01-10", 6.0)
+    assert_consistente()
+
+    client.put(f"{API}/coletas/{coleta['id']}", headers=auth, json={"data_coleta": "2033-02-01"})
+    assert_consistente()
+
+    client.put(f"{API}/revendas/{rj['id']}", headers=auth, json={"estado": "ES", "municipio": "VITORIA"})
+    assert_consistente()
+
+    assert client.delete(f"{API}/coletas/{coleta['id']}", headers=auth).status_code == 204
+    assert_consistente()
+
+
+@pytest.mark.parametrize("chunksize", [3, 100])
+def test_carga_e_recarga(tmp_path, chunksize):
+    mes = 1 if chunksize == 3 else 2
+    linhas = [(revenda, f"{dia:02d}/{mes:02d}/2034", f"{5 + revenda / 10 + dia / 100:.2f}".replace(".", ","))
+              for revenda in range(50, 54) for dia in range(1, 5)]
+    caminho = csv_anp(tmp_path / "carga.csv", linhas)
+    load_csv_data(caminho, chunksize=chunksize)
+    assert_consistente()
+
+    # A recarga substitui coletas já fundidas aos sketches: o mês é recalculado
+    caminho = csv_anp(tmp_path / "carga.csv", [(revenda, data, "9,00") for revenda, data, _ in linhas[::3]])
+    load_csv_data(caminho, chunksize=chunksize, force=True)
+    assert_consistente()
+
+
+def test_percentis(client, auth, nova_revenda, nova_coleta, novo_produto):
+    produto = novo_produto("PRODUTO PERCENTIS")
+    sp, rj = nova_revenda(), nova_revenda(estado="RJ", municipio="NITEROI")
+    valores = {"SP": [4.0, 4.5, 5.0, 5.5, 6.0], "RJ": [6.0, 7.0]}
+    for revenda, uf in ((sp, "SP"), (rj, "RJ")):
+        for dia, valor in enumerate(valores[uf], start=1):
+            nova_coleta(revenda["id"], produto["id"], f"2033-03-{dia:02d}", valor)
+
+    resposta = client.get(f"{API}/coletas/percentis", headers=auth, params={
+        "produto": produto["nome"], "percentis": "50", "agrupar_por": "estado",
+    })
+    assert resposta.status_code == 200, resposta.text
+    itens = {item["estado"]: item for item in resposta.json()["items"]}
+    assert set(itens) == {"RJ", "SP"}
+    # Com poucos valores cada um é um centróide e a mediana é exata
+    for uf, item in itens.items():
+        assert (item["quantidade"], item["minimo"], item["maximo"]) == (
+            len(valores[uf]), min(valores[uf]), max(valores[uf])
+        )
+        assert item["percentis"]["p50"] == pytest.approx(np.median(valores[uf]))
+
+
+def test_percentis_invalidos(client, auth):
+    resposta = client.get(f"{API}/coletas/percentis", headers=auth,
+                          params={"produto": "GASOLINA", "percentis": "50,101"})
+    assert resposta.status_code == 400
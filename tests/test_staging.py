@@ -0,0 +1,28 @@
+"""
+Staging em Parquet: linhas rejeitadas vão para a quarentena do LoadMonitor
+"""
+import json
+
+import pandas as pd
+
+from load_monitor import LoadMonitor
+from stage_parquet import stage_files
+from conftest import csv_anp
+
+
+def test_rejeitadas_na_quarentena(tmp_path):
+    linhas = [(60, "01/01/2039", "5,00"), (60, "02/01/2039", "abc"), (60, "03/01/2039", "5,20"),
+              (61, "32/01/2039", "5,30"), (61, "04/01/2039", "5,40")]
+    caminho = csv_anp(tmp_path / "staging.csv", linhas)
+    quarentena = tmp_path / "quarentena.ndjson"
+
+    # Blocos de 2 linhas: a numeração segue entre os blocos
+    resumo = stage_files([caminho], str(tmp_path / "staging"), chunksize=2, workers=1,
+                         monitor=LoadMonitor(quarantine_path=str(quarentena)))
+
+    assert (resumo["linhas_lidas"], resumo["linhas_gravadas"], resumo["linhas_rejeitadas"]) == (5, 3, 2)
+    assert resumo["arquivos"][caminho]["status"] == "concluido"
+    rejeitadas = [json.loads(linha) for linha in quarentena.read_text(encoding="utf-8").splitlines()]
+    # Linha 1 do CSV é o cabeçalho
+    assert [(r["arquivo"], r["linha"]) for r in rejeitadas] == [(caminho, 3), (caminho, 5)]
+    assert len(pd.read_parquet(tmp_path / "staging" / "staging.parquet")) == 3
@@ -0,0 +1,57 @@
+"""
+Erro dos quantis do t-digest contra numpy.quantile
+
+A tolerância é o limite documentado em app/utils/tdigest.py: erro em
+posto de até 2π·√(q(1 − q))/δ.
+"""
+import numpy as np
+import pytest
+
+from app.utils.tdigest import TDigest, COMPRESSAO
+
+QUANTIS = np.array([0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99])
+LIMITE = 2 * np.pi * np.sqrt(QUANTIS * (1 - QUANTIS)) / COMPRESSAO
+
+
+def _erro_em_posto(valores: np.ndarray, estimados: np.ndarray) -> np.ndarray:
+    """Distância de cada quantil ao intervalo de postos do valor estimado (considera empates)"""
+    ordenados = np.sort(valores)
+    abaixo = np.searchsorted(ordenados, estimados, "left") / len(ordenados)
+    ate = np.searchsorted(ordenados, estimados, "right") / len(ordenados)
+    return np.maximum(0, np.maximum(abaixo - QUANTIS, QUANTIS - ate))
+
+
+def _valores(distribuicao: str) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    if distribuicao == "normal":
+        return rng.normal(6, 0.5, 200_000)
+    if distribuicao == "lognormal":
+        return rng.lognormal(1.7, 0.3, 200_000)
+    if distribuicao == "centavos":
+        # Preços com duas casas: muitos empates
+        return np.round(rng.normal(6, 0.5, 200_000), 2)
+    # Blocos em ordem crescente, o pior caso para fusões sucessivas
+    return np.sort(rng.normal(6, 0.5, 200_000))
+
+
+@pytest.mark.parametrize("distribuicao", ["normal", "lognormal", "centavos", "ordenada"])
+@pytest.mark.parametrize("blocos", [400, 2000])
+def test_fusoes_sucessivas(distribuicao, blocos):
+    valores = _valores(distribuicao)
+    digest = None
+    for bloco in np.array_split(valores, blocos):
+        novo = TDigest.from_values(bloco)
+        digest = novo if digest is None else TDigest.merge([digest, novo])
+
+    assert digest.quantidade == len(valores)
+    assert (digest.minimo, digest.maximo) == (valores.min(), valores.max())
+    assert np.all(_erro_em_posto(valores, digest.quantis(QUANTIS)) <= LIMITE)
+
+
+def test_fusao_de_uma_vez_e_serializacao():
+    valores = _valores("lognormal")
+    digest = TDigest.merge(TDigest.from_values(bloco) for bloco in np.array_split(valores, 500))
+    digest = TDigest.from_bytes(digest.to_bytes(), digest.minimo, digest.maximo)
+
+    assert np.all(_erro_em_posto(valores, digest.quantis(QUANTIS)) <= LIMITE)
+    np.testing.assert_allclose(digest.quantis(QUANTIS), np.quantile(valores, QUANTIS), rtol=0.01)